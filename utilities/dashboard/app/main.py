@@ -3,19 +3,30 @@ usage: bokeh server run_dashboard.py --show --args path/to/overview_tab_data_dic
 
 """
 import sys
-from pathlib import Path
+from functools import partial
 
-import pandas as pd
 from bokeh.models import Panel
 from bokeh.models import Tabs
+from bokeh.models.widgets import Div
 from bokeh.plotting import curdoc
 
+from utilities.dashboard.artifacts import current_generation
+from utilities.dashboard.artifacts import dashboard_kwargs
+from utilities.dashboard.callback_metrics import instrument_callback
+from utilities.dashboard.components.boxplots.create_component import create_boxplots
 from utilities.dashboard.components.intro_page.create_component import create_intro_page
 from utilities.dashboard.components.run_charts.create_component import create_run_charts
-from utilities.dashboard.components.boxplots.create_component import create_boxplots
 from utilities.dashboard.components.univariate_distributions.create_component import (
     create_univariate_distributions,
 )
+from utilities.dashboard.session_models import track_session
+from utilities.dashboard.session_profiling import building_tab
+from utilities.dashboard.session_profiling import start_session_profiler
+from utilities.dashboard.view_state import link_selectors
+from utilities.dashboard.view_state import link_tabs
+from utilities.dashboard.view_state import parse_view_state
+from utilities.dashboard.view_state import session_arguments
+from utilities.dashboard.view_state import TAB_SLUGS
 
 
 def assemble_dashboard_components(
@@ -28,55 +39,86 @@ def assemble_dashboard_components(
     run_charts_mapping,
     boxplots_data,
     boxplots_mapping,
+    active=0,
+    views=None,
+    defer=False,
 ):
     """Create the dashboard tabs.
 
     Args:
         intro_page_data (dict): Data to generate Introduction tab.
-        univariate_distributions_data (dict): Data to generate Group Differences
-            tab.
-        univariate_distributions_data (dict): Data to generate Group
-            Differences: April tab.
+        univariate_distributions_data (DistributionsStore): Data to generate Group
+            Differences tab.
+        univariate_distributions_data_april (DistributionsStore): Data to generate
+            Group Differences: April tab.
         shared_data (dict): Metadata of Group Differences tab.
         shared_data_april (dict): Metadata of Group Differences: April tab.
-        run_charts_data (dict): Data for Labor Supply tab.
+        run_charts_data (RunChartsStore): Data for Labor Supply tab.
         run_charts_mapping (dict): Metadata for Labor Supply tab.
-        boxplots_data (dict): Data for Childcare tab.
+        boxplots_data (BoxplotsStore): Data for Childcare tab.
         boxplots_mapping (dict): Metadata for Childcare tab.
+        active (int): Index of the tab that is shown first. Default is 0.
+        views (dict): Initial selection of each tab, keyed by tab slug, see
+            ``view_state.parse_view_state``. Default is the first options.
+        defer (bool): Only build the active tab. The others are built when they are
+            shown for the first time. Default is False.
 
     Returns:
-        bokeh Column
+        bokeh Tabs
 
     """
-
-    intro_page = create_intro_page(**intro_page_data, language=shared_data["language"])
-
-    univariate_distributions_page = create_univariate_distributions(
-        **univariate_distributions_data,
-        menu_labels=shared_data["menu_labels"],
-        variable_mappings=shared_data["variable_mappings"],
-    )
-
-    run_charts_page = create_run_charts(
-        data=run_charts_data,
-        variable_mappings=run_charts_mapping["variable_mappings"],
-        language=language,
-        menu_labels=shared_data["menu_labels"],
-    )
-
-    boxplots_page = create_boxplots(
-        data=boxplots_data,
-        variable_mappings=boxplots_mapping["variable_mappings"],
-        language=shared_data["language"],
-        menu_labels=shared_data["menu_labels"],
-    )
-
-    univariate_distributions_april_page = create_univariate_distributions(
-        **univariate_distributions_data_april,
-        menu_labels=shared_data_april["menu_labels"],
-        variable_mappings=shared_data_april["variable_mappings"],
-    )
-
+    views = {} if views is None else views
+    language = shared_data["language"]
+
+    # (component, builder) of every tab, in the order of view_state.TAB_SLUGS
+    builders = [
+        (
+            "intro_page",
+            partial(create_intro_page, **intro_page_data, language=language),
+        ),
+        (
+            "univariate_distributions",
+            partial(
+                create_univariate_distributions,
+                distributions=univariate_distributions_data,
+                menu_labels=shared_data["menu_labels"],
+                variable_mappings=shared_data["variable_mappings"],
+                view=views.get("march"),
+            ),
+        ),
+        (
+            "univariate_distributions",
+            partial(
+                create_univariate_distributions,
+                distributions=univariate_distributions_data_april,
+                menu_labels=shared_data_april["menu_labels"],
+                variable_mappings=shared_data_april["variable_mappings"],
+                view=views.get("april"),
+            ),
+        ),
+        (
+            "run_charts",
+            partial(
+                create_run_charts,
+                data=run_charts_data,
+                variable_mappings=run_charts_mapping["variable_mappings"],
+                language=language,
+                menu_labels=shared_data["menu_labels"],
+                view=views.get("labor_supply"),
+            ),
+        ),
+        (
+            "boxplots",
+            partial(
+                create_boxplots,
+                data=boxplots_data,
+                variable_mappings=boxplots_mapping["variable_mappings"],
+                language=language,
+                menu_labels=shared_data["menu_labels"],
+                view=views.get("childcare"),
+            ),
+        ),
+    ]
 
     if language == "german":
         tab_names = [
@@ -84,60 +126,77 @@ def assemble_dashboard_components(
             "Unterschiede zw. Gruppen: März 2020",
             "Unterschiede zw. Gruppen: April 2020",
             "Arbeitsangebot",
-            "Kinderbetreuung"
+            "Kinderbetreuung",
         ]
     elif language == "english":
-        tab_names = ["Introduction", "Group Differences: March 2020", "Group Differences: April 2020", "Labor Supply", "Childcare"]
-
-    page = Tabs(
-        tabs=[
-            Panel(child=intro_page, title=tab_names[0]),
-            Panel(child=univariate_distributions_page, title=tab_names[1]),
-            Panel(child=univariate_distributions_april_page, title=tab_names[2]),
-            Panel(child=run_charts_page, title=tab_names[3]),
-            Panel(child=boxplots_page, title=tab_names[4]),
+        tab_names = [
+            "Introduction",
+            "Group Differences: March 2020",
+            "Group Differences: April 2020",
+            "Labor Supply",
+            "Childcare",
         ]
-    )
+
+    pending = {}
+    panels = []
+    for i, (title, slug) in enumerate(zip(tab_names, TAB_SLUGS)):
+        if defer and i != active:
+            pending[i] = builders[i]
+            child = Div()
+        else:
+            child = build_tab(*builders[i], slug=slug)
+        panels.append(Panel(child=child, title=title))
+
+    page = Tabs(tabs=panels, active=active)
+    link_tabs(page)
+    if pending:
+        show_callback = partial(show_deferred_tab, tabs=page, pending=pending)
+        page.on_change("active", instrument_callback(show_callback, "tabs"))
     return page
 
 
+def build_tab(component, builder, slug):
+    """Build the layout of a tab and write its selection to the URL."""
+    with building_tab(slug):
+        layout = builder()
+    link_selectors(layout, slug)
+    return layout
+
+
+def show_deferred_tab(attr, old, new, tabs, pending):
+    """Build a deferred tab when it is shown for the first time."""
+    if new in pending:
+        tabs.tabs[new].child = build_tab(*pending.pop(new), slug=TAB_SLUGS[new])
+
+
 # ======================================================================================
 # The actual app
 # ======================================================================================
 
-data_dir = Path(sys.argv[1]).resolve()
-dashboard_data_shared = pd.read_pickle(data_dir / "dashboard_data_single.pickle")
-dashboard_data_april = pd.read_pickle(data_dir / "dashboard_data_single_april.pickle")
-dashboard_data_waves = pd.read_pickle(data_dir / "dashboard_data_waves.pickle")
-dashboard_data_boxplot = pd.read_pickle(data_dir / "dashboard_data_boxplot.pickle")
-
-kwargs = {
-    "intro_page_data": dashboard_data_shared["intro_page_data"],
-    "univariate_distributions_data": dashboard_data_shared[
-        "univariate_distributions_data"
-    ],
-    "univariate_distributions_data_april": dashboard_data_april[
-        "univariate_distributions_data"
-    ],
-    "shared_data": dashboard_data_shared["shared_data"],
-    "shared_data_april": dashboard_data_april["shared_data"],
-    "run_charts_data": dashboard_data_waves["run_charts_data"],
-    "run_charts_mapping": dashboard_data_waves["mapping"],
-    "boxplots_data": dashboard_data_boxplot["boxplots_data"],
-    "boxplots_mapping": dashboard_data_boxplot["mapping"],
-}
-
-
-language = dashboard_data_shared["shared_data"]["language"]
+# the artifacts are loaded once per process and shared by all sessions. A session
+# keeps its generation alive, even if newer dashboard data has been loaded since.
+generation = current_generation(sys.argv[1])
+store = generation.store
+kwargs = dashboard_kwargs(store)
+
+
+language = store.language
 
 doc = curdoc()
+track_session(doc)
+start_session_profiler(doc)
 if language == "english":
     doc.title = "Explore What People Believe and Do in Response to CoViD-19"
 elif language == "german":
     doc.title = "Was Menschen zur Corona-Epidemie wissen, erwarten und tun"
 
 
-overview_tab = assemble_dashboard_components(**kwargs)
+# a shared link opens its tab and selection. Only that tab is built before the
+# document is sent, the others are built when the user opens them.
+active, views = parse_view_state(session_arguments(doc))
+overview_tab = assemble_dashboard_components(
+    **kwargs, active=active, views=views, defer=doc.session_context is not None
+)
 # corr_tab = create_corr_tab(dashboard_data["correlation"])
 # timeline_tab = create_timeline_tab(dashboard_data["timeline"])
 # tabs = Tabs(tabs=[overview_tab, corr_tab], name="tabs")
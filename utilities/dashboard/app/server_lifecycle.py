@@ -0,0 +1,16 @@
+"""Server hooks of the dashboard app."""
+import os
+import sys
+
+from utilities.dashboard.hot_reload import ArtifactWatcher
+from utilities.dashboard.hot_reload import WATCH_INTERVAL_ENV
+
+# the hooks are called after the server restored sys.argv
+DATA_DIR = sys.argv[1]
+
+
+def on_server_loaded(server_context):
+    """Watch the dashboard data if configured."""
+    interval = os.environ.get(WATCH_INTERVAL_ENV)
+    if interval:
+        ArtifactWatcher(DATA_DIR, interval=int(interval)).start()
@@ -0,0 +1,168 @@
+"""Deltas of the dashboard data between two builds.
+
+The manifest of a build lists the hash of every entry of the dashboard data, e.g. of
+every group of the univariate distributions, run chart key and boxplot cell, see
+``artifacts.artifact_entries``. :func:`create_delta` compares the manifest of the data
+that a server holds with a new build and collects the entries that were added or
+changed, together with the order of all entries of the new build. It only needs the
+manifest of the server, not its pickles.
+
+:func:`apply_delta` checks that the data directory of the server is the base of the
+delta, rewrites the pickles whose entries changed and then writes a new manifest. A
+running dashboard picks the new manifest up and reads only the rewritten pickles.
+The other pickles are not touched.
+
+"""
+import pandas as pd
+
+from utilities.dashboard.artifacts import artifact_entries
+from utilities.dashboard.artifacts import artifact_path
+from utilities.dashboard.artifacts import ARTIFACTS
+from utilities.dashboard.artifacts import assemble_artifact
+from utilities.dashboard.artifacts import entry_hash
+from utilities.dashboard.artifacts import entry_id
+from utilities.dashboard.artifacts import read_manifest
+from utilities.dashboard.artifacts import write_artifact
+from utilities.dashboard.artifacts import write_manifest
+
+DELTA_FORMAT = 1
+
+
+def create_delta(base_manifest, data_dir):
+    """Collect the entries of the build in data_dir that are not in the base.
+
+    Args:
+        base_manifest (dict): Manifest of the data that the delta will be applied
+            to, see ``artifacts.read_manifest``.
+        data_dir (str or pathlib.Path): Directory of the new build.
+
+    Returns:
+        dict: The delta with the entry hashes of the "base" and of the new build
+            ("entries"), and the "values" of the added or changed entries. Both
+            hashes and values are keyed by suffix and entry id. Values are pairs of
+            key paths and values.
+
+    Raises:
+        ValueError: If a manifest has no entry hashes, or if an entry of the build
+            does not match the hash in its manifest.
+
+    """
+    manifest = read_manifest(data_dir)
+    _check_hashes(base_manifest, "The base manifest")
+    _check_hashes(manifest, f"The manifest in {data_dir}")
+
+    values = {}
+    for suffix, hashes in manifest["entries"].items():
+        base_hashes = base_manifest["entries"].get(suffix, {})
+        if list(hashes.items()) == list(base_hashes.items()):
+            continue
+        changed = {
+            id_ for id_, hash_ in hashes.items() if base_hashes.get(id_) != hash_
+        }
+        entries = artifact_entries(
+            suffix, pd.read_pickle(artifact_path(data_dir, suffix))
+        )
+        values[suffix] = {
+            entry_id(path): (path, value)
+            for path, value in entries
+            if entry_id(path) in changed
+        }
+        _check_entries(values[suffix], hashes, f"{suffix} in {data_dir}")
+    return {
+        "format": DELTA_FORMAT,
+        "base": base_manifest["entries"],
+        "entries": manifest["entries"],
+        "values": values,
+    }
+
+
+def apply_delta(delta, data_dir):
+    """Patch the dashboard data in data_dir with a delta.
+
+    The entries of the patched pickles that are kept are checked against the hashes
+    of the base. All patched pickles are assembled before the first one is written.
+    The manifest is written last, so a running dashboard reloads the data only once.
+
+    Args:
+        delta (dict): Delta as returned by :func:`create_delta`.
+        data_dir (str or pathlib.Path): Dashboard data directory of the base.
+
+    Returns:
+        list: Suffixes of the rewritten pickles.
+
+    Raises:
+        ValueError: If data_dir does not hold the base of the delta, or if the delta
+            is corrupt. The data is not modified in this case.
+
+    """
+    if delta.get("format") != DELTA_FORMAT:
+        raise ValueError(f"Unknown delta format {delta.get('format')}.")
+    manifest = read_manifest(data_dir)
+    _check_hashes(manifest, f"The manifest in {data_dir}")
+    not_base = ValueError(
+        f"The dashboard data in {data_dir} is not the base of the delta. Copy the "
+        "full build, or create the delta from the manifest in data_dir."
+    )
+    if manifest["entries"] != delta["base"]:
+        raise not_base
+
+    patched = {}
+    for suffix, values in delta["values"].items():
+        _check_entries(values, delta["entries"][suffix], f"{suffix} in the delta")
+        current = {
+            entry_id(path): (path, value)
+            for path, value in artifact_entries(
+                suffix, pd.read_pickle(artifact_path(data_dir, suffix))
+            )
+        }
+        kept = {
+            id_: current.get(id_, (None, None))
+            for id_ in delta["entries"][suffix]
+            if id_ not in values
+        }
+        try:
+            _check_entries(kept, delta["base"][suffix], f"{suffix} in {data_dir}")
+        except ValueError:
+            raise not_base from None
+        entries = [
+            values[id_] if id_ in values else kept[id_]
+            for id_ in delta["entries"][suffix]
+        ]
+        patched[suffix] = assemble_artifact(entries)
+
+    for suffix, dashboard_data in patched.items():
+        write_artifact(dashboard_data, data_dir, suffix, delta["entries"][suffix])
+    write_manifest(data_dir)
+    return list(patched)
+
+
+def summarize_delta(delta):
+    """Count the added, changed and removed entries of a delta by suffix."""
+    summary = {}
+    for suffix, hashes in delta["entries"].items():
+        base_hashes = delta["base"].get(suffix, {})
+        values = delta["values"].get(suffix, {})
+        summary[suffix] = {
+            "entries": len(hashes),
+            "added": len([id_ for id_ in values if id_ not in base_hashes]),
+            "changed": len([id_ for id_ in values if id_ in base_hashes]),
+            "removed": len([id_ for id_ in base_hashes if id_ not in hashes]),
+            "rewritten": suffix in delta["values"],
+        }
+    return summary
+
+
+def _check_entries(entries, hashes, name):
+    for id_, (_, value) in entries.items():
+        if id_ not in hashes or entry_hash(value) != hashes[id_]:
+            raise ValueError(f"The entry {id_} of {name} does not match its hash.")
+
+
+def _check_hashes(manifest, name):
+    hashes = {} if manifest is None else manifest.get("entries", {})
+    missing = [suffix for suffix in ARTIFACTS if suffix not in hashes]
+    if missing:
+        raise ValueError(
+            f"{name} has no entry hashes of {missing}. Rebuild the dashboard data "
+            "to create them."
+        )
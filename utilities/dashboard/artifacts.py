@@ -0,0 +1,349 @@
+"""Loading and validation of the dashboard data that is served by the app.
+
+``process_dashboard_source_data`` writes one pickle per data suffix to the data
+directory and, once all of them are written, a manifest with their sizes and
+modification times. A validated set of loaded pickles is a :class:`Generation`.
+
+The manifest also lists the content hash of every entry of the pickles, see
+:func:`artifact_entries`, e.g. of every group of the univariate distributions.
+``artifact_delta`` uses the hashes to ship only the entries that changed between
+two builds.
+
+All sessions of a server share the current generation of their data directory,
+so the components must never modify the artifacts in place. When the data is
+rebuilt, a new generation can be loaded with :func:`load_generation` and made
+current with :func:`publish_generation`. Sessions that were opened before keep
+their generation, which is freed once the last of them is destroyed.
+
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utilities.dashboard.components.run_charts.panel_store import open_panel_store
+from utilities.dashboard.sampling import dev_data_allowed
+from utilities.dashboard.sampling import DEV_SAMPLE_KEY
+from utilities.dashboard.store import DashboardStore
+
+ARTIFACTS = {
+    "single": ["intro_page_data", "univariate_distributions_data", "shared_data"],
+    "single_april": ["univariate_distributions_data", "shared_data"],
+    "waves": ["run_charts_data", "mapping"],
+    "boxplot": ["boxplots_data", "mapping"],
+}
+
+MANIFEST_NAME = "dashboard_data_manifest.json"
+
+# dicts that are split into one manifest entry per key, and the number of nested
+# levels that are split
+ENTRY_SPLITS = {
+    "single": {("univariate_distributions_data", "plot_data"): 1},
+    "single_april": {("univariate_distributions_data", "plot_data"): 1},
+    "waves": {
+        ("run_charts_data", "data"): 1,
+        ("run_charts_data", "selectors"): 1,
+        ("run_charts_data", "bounds"): 1,
+    },
+    "boxplot": {("boxplots_data",): 2},
+}
+
+_CURRENT = {}
+
+
+class Generation:
+    """A loaded and validated set of dashboard artifacts.
+
+    Args:
+        number (int): Counts the generations of a data directory, starting at 0.
+        fingerprint (tuple): Fingerprint of the files, see
+            :func:`artifact_fingerprint`.
+        artifacts (dict): Maps the suffixes in ARTIFACTS to the dashboard data.
+        stats (dict): Sizes and modification times of the pickles the artifacts were
+            loaded from. Default is None.
+        run_charts_panel (PanelStore): Panel of the run charts. Default is None.
+
+    Attributes:
+        store (DashboardStore): The artifacts, indexed for the components.
+
+    """
+
+    __slots__ = ("number", "fingerprint", "artifacts", "stats", "store", "__weakref__")
+
+    def __init__(
+        self, number, fingerprint, artifacts, stats=None, run_charts_panel=None
+    ):
+        self.number = number
+        self.fingerprint = fingerprint
+        self.artifacts = artifacts
+        self.stats = {} if stats is None else stats
+        self.store = DashboardStore(artifacts, run_charts_panel)
+
+
+def artifact_path(data_dir, suffix):
+    return Path(data_dir) / f"dashboard_data_{suffix}.pickle"
+
+
+def entries_path(data_dir, suffix):
+    return Path(data_dir) / f"dashboard_data_{suffix}.entries.json"
+
+
+def write_artifact(dashboard_data, data_dir, suffix, hashes=None):
+    """Pickle dashboard data such that readers never see a partial file.
+
+    The hashes of the entries are written next to the pickle, for the manifest.
+
+    Args:
+        hashes (dict): Hashes of the entries, see :func:`entry_hashes`, if they are
+            known. Default is None, i.e. they are computed.
+
+    """
+    path = artifact_path(data_dir, suffix)
+    tmp_path = path.with_name(path.name + ".tmp")
+    pd.to_pickle(dashboard_data, tmp_path)
+    os.replace(tmp_path, path)
+
+    if hashes is None:
+        hashes = entry_hashes(suffix, dashboard_data)
+    _write_json(hashes, entries_path(data_dir, suffix))
+
+
+def write_manifest(data_dir):
+    """Record that a complete set of artifacts was written to data_dir."""
+    manifest = {
+        "written": time.time(),
+        "files": _file_stats(data_dir),
+        "entries": {
+            suffix: _read_json(entries_path(data_dir, suffix))
+            for suffix in ARTIFACTS
+            if entries_path(data_dir, suffix).exists()
+        },
+    }
+    _write_json(manifest, Path(data_dir) / MANIFEST_NAME)
+
+
+def read_manifest(data_dir):
+    """Return the manifest of data_dir or None if there is none."""
+    path = Path(data_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return _read_json(path)
+
+
+def artifact_entries(suffix, dashboard_data):
+    """Split dashboard data into the entries that the manifest hashes.
+
+    The dicts in ENTRY_SPLITS are split by their keys, e.g. the plot data of the
+    univariate distributions into one entry per group and the boxplots data into one
+    entry per outcome and sample. Every other key on the way is one entry.
+
+    Returns:
+        list: Pairs of key paths and values in the order of the dashboard data.
+            :func:`assemble_artifact` puts them together again.
+
+    """
+    splits = ENTRY_SPLITS.get(suffix, {})
+    entries = []
+
+    def split(node, path, levels):
+        for key, value in node.items():
+            sub_path = path + (key,)
+            sub_levels = levels - 1 if levels else splits.get(sub_path, 0)
+            on_the_way = any(
+                len(split_path) > len(sub_path)
+                and split_path[: len(sub_path)] == sub_path
+                for split_path in splits
+            )
+            if type(value) is dict and value and (sub_levels or on_the_way):
+                split(value, sub_path, sub_levels)
+            else:
+                entries.append((sub_path, value))
+
+    split(dashboard_data, (), 0)
+    return entries
+
+
+def assemble_artifact(entries):
+    """Nest entries as returned by :func:`artifact_entries` into dashboard data."""
+    dashboard_data = {}
+    for path, value in entries:
+        node = dashboard_data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return dashboard_data
+
+
+def entry_id(path):
+    """Return the name of the entry at a key path in the manifest."""
+    return repr(path)
+
+
+def entry_hash(value):
+    return hashlib.sha256(pickle.dumps(value, protocol=4)).hexdigest()
+
+
+def entry_hashes(suffix, dashboard_data):
+    """Map the ids of the entries of dashboard data to their hashes, in order."""
+    return {
+        entry_id(path): entry_hash(value)
+        for path, value in artifact_entries(suffix, dashboard_data)
+    }
+
+
+def artifact_fingerprint(data_dir):
+    """Return a fingerprint that changes whenever the artifacts are rewritten.
+
+    If data_dir has a manifest, only a new manifest changes the fingerprint, so a
+    build that is still running does not. Otherwise, the fingerprint consists of
+    the sizes and modification times of the pickles.
+
+    """
+    manifest = read_manifest(data_dir)
+    if manifest is not None:
+        return ("manifest", manifest["written"])
+    return ("files",) + tuple(sorted(_file_stats(data_dir).items()))
+
+
+def load_generation(data_dir, number=0, previous=None):
+    """Load and validate the artifacts of data_dir as a new generation.
+
+    Args:
+        data_dir (str or pathlib.Path): Dashboard data directory.
+        number (int): Number of the generation.
+        previous (Generation): Generation of data_dir that is served. Pickles that
+            were not rewritten since it was loaded are not read again, so after a
+            partial rebuild or a delta, only the changed pickles are read.
+
+    Raises:
+        FileNotFoundError: If artifacts are missing.
+        ValueError: If the artifacts are invalid, or if they were built from a
+            sample and development data is not allowed.
+        RuntimeError: If the artifacts were rewritten while they were loaded.
+
+    """
+    data_dir = Path(data_dir).resolve()
+    missing = [
+        str(artifact_path(data_dir, suffix))
+        for suffix in ARTIFACTS
+        if not artifact_path(data_dir, suffix).exists()
+    ]
+    if missing:
+        raise FileNotFoundError(f"Missing dashboard data: {missing}")
+
+    fingerprint = artifact_fingerprint(data_dir)
+    stats = _file_stats(data_dir)
+    artifacts = {}
+    for suffix in ARTIFACTS:
+        if previous is not None and previous.stats.get(suffix) == stats[suffix]:
+            artifacts[suffix] = previous.artifacts[suffix]
+        else:
+            artifacts[suffix] = pd.read_pickle(artifact_path(data_dir, suffix))
+    manifest = read_manifest(data_dir)
+    if (
+        artifact_fingerprint(data_dir) != fingerprint
+        or _file_stats(data_dir) != stats
+        or (manifest is not None and manifest["files"] != stats)
+    ):
+        raise RuntimeError(f"The dashboard data in {data_dir} changed while loading.")
+    validate_artifacts(artifacts)
+    sampled = [suffix for suffix in ARTIFACTS if DEV_SAMPLE_KEY in artifacts[suffix]]
+    if sampled and not dev_data_allowed():
+        raise ValueError(
+            f"The dashboard data {sampled} in {data_dir} was built from a sample "
+            "for development. Rebuild it without --sample_frac and --max_rows, or "
+            "run the dashboard with --dev."
+        )
+    return Generation(number, fingerprint, artifacts, stats, open_panel_store(data_dir))
+
+
+def current_generation(data_dir):
+    """Return the current generation of data_dir and load the first one if needed."""
+    data_dir = Path(data_dir).resolve()
+    if data_dir not in _CURRENT:
+        _CURRENT[data_dir] = load_generation(data_dir)
+    return _CURRENT[data_dir]
+
+
+def publish_generation(data_dir, generation):
+    """Make generation the one that new sessions of data_dir use."""
+    _CURRENT[Path(data_dir).resolve()] = generation
+
+
+def load_artifacts(data_dir):
+    """Return the artifacts of the current generation of data_dir.
+
+    The artifacts are only read on the first call for a data directory.
+
+    Args:
+        data_dir (str or pathlib.Path): Dashboard data directory.
+
+    Returns:
+        dict: Maps the suffixes in ARTIFACTS to the unpickled dashboard data.
+
+    """
+    return current_generation(data_dir).artifacts
+
+
+def _file_stats(data_dir):
+    stats = {}
+    for suffix in ARTIFACTS:
+        path = artifact_path(data_dir, suffix)
+        if path.exists():
+            stat = path.stat()
+            stats[suffix] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(obj, path):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def validate_artifacts(artifacts):
+    """Check that the artifacts contain all data of the dashboard components.
+
+    Raises:
+        ValueError: If entries are missing or the languages do not match.
+
+    """
+    problems = []
+    for suffix, keys in ARTIFACTS.items():
+        missing = [key for key in keys if key not in artifacts[suffix]]
+        if missing:
+            problems.append(f"dashboard_data_{suffix} lacks {missing}")
+    if not problems:
+        languages = {
+            artifacts["single"]["shared_data"]["language"],
+            artifacts["single_april"]["shared_data"]["language"],
+        }
+        if len(languages) > 1:
+            problems.append(f"The dashboard data mixes languages {sorted(languages)}")
+    if problems:
+        raise ValueError("Invalid dashboard data:\n" + "\n".join(problems))
+
+
+def dashboard_kwargs(store):
+    """Map a DashboardStore to the arguments of ``assemble_dashboard_components``."""
+    return {
+        "intro_page_data": store.intro_page,
+        "univariate_distributions_data": store.distributions["single"],
+        "univariate_distributions_data_april": store.distributions["single_april"],
+        "shared_data": store.shared["single"],
+        "shared_data_april": store.shared["single_april"],
+        "run_charts_data": store.run_charts,
+        "run_charts_mapping": store.run_charts_mapping,
+        "boxplots_data": store.boxplots,
+        "boxplots_mapping": store.boxplots_mapping,
+    }
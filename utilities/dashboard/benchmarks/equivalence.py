@@ -0,0 +1,560 @@
+"""Differential checks of the data preparation against frozen reference engines.
+
+Each aggregation path of the dashboard build is run by a reference engine, a
+frozen copy in :mod:`utilities.dashboard.benchmarks.reference`, and by a candidate
+engine on the same randomized inputs. By default the candidates are the current
+implementations, i.e. the registered plot types, ``lineplot.prepare_data`` and
+``boxplot.process_data``. The inputs are synthetic LISS-shaped datasets of random
+size, cardinality and share of missing values, with random :data:`EDGE_CASES`:
+
+- "empty_category": a category without observations,
+- "all_nan_group": all values of the group's variables are missing for one
+  background category,
+- "single_observation": one background category has a single observation.
+
+The join of the background data in ``--low_memory`` builds is checked against the
+merge of the default build in the same way, on raw datasets with random
+overlapping columns and persons without background data.
+
+Every key and value of the results is compared, see :func:`compare_artifacts`.
+Numbers have to agree within a relative and an absolute tolerance, everything else
+exactly, including the order of keys. If the reference raises, the candidate has to
+raise the same type of exception. The rows of a failing input are reduced to a
+minimal dataset that still fails, which is pickled as a reproducer.
+
+"""
+import importlib
+import zlib
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_categorical_dtype
+from pandas.api.types import is_numeric_dtype
+
+from utilities.dashboard.benchmarks.reference import background_merge
+from utilities.dashboard.benchmarks.reference import boxplot as reference_boxplot
+from utilities.dashboard.benchmarks.reference import distplot as reference_distplot
+from utilities.dashboard.benchmarks.reference import (
+    general_barplot as reference_general_barplot,
+)
+from utilities.dashboard.benchmarks.reference import lineplot as reference_lineplot
+from utilities.dashboard.benchmarks.suite import boxplots_inputs
+from utilities.dashboard.benchmarks.suite import DEFAULT_CONFIG
+from utilities.dashboard.benchmarks.suite import run_charts_inputs
+from utilities.dashboard.benchmarks.suite import univariate_inputs
+from utilities.dashboard.benchmarks.synthetic_data import create_child_data
+from utilities.dashboard.benchmarks.synthetic_data import create_univariate_data
+from utilities.dashboard.benchmarks.synthetic_data import create_waves_data
+
+EDGE_CASES = ["empty_category", "all_nan_group", "single_observation"]
+
+RTOL = 1e-5
+
+ATOL = 1e-6
+
+# the metadata of the synthetic data does not depend on its size
+_METADATA_CONFIG = tuple(sorted(dict(DEFAULT_CONFIG, n_rows=100).items()))
+
+# differences that are reported per case
+_MAX_DIFFERENCES = 20
+
+
+def reference_engines():
+    """Return the reference engine of every aggregation path."""
+    return {
+        "stacked_barplot": partial(
+            reference_general_barplot.prepare_data, keep_last=True
+        ),
+        "barplot": partial(reference_general_barplot.prepare_data, keep_last=False),
+        "distplot": reference_distplot.prepare_data,
+        "lineplot": reference_lineplot.prepare_data,
+        "boxplot": reference_boxplot.process_data,
+        "background_join": background_merge.merge_background,
+    }
+
+
+def current_engines():
+    """Return the current implementation of every aggregation path."""
+    # imported here, so that the reference engines load without bokeh
+    from utilities.dashboard.components.boxplots import boxplot
+    from utilities.dashboard.components.run_charts import lineplot
+    from utilities.dashboard.components.univariate_distributions.plot_types import (
+        get_plot_type,
+    )
+    from utilities.dashboard.process_dashboard_source_data import _join_background
+
+    res = {
+        name: get_plot_type(name).prepare_data
+        for name in ["stacked_barplot", "barplot", "distplot"]
+    }
+    res["lineplot"] = lineplot.prepare_data
+    res["boxplot"] = boxplot.process_data
+    res["background_join"] = _join_background
+    return res
+
+
+def import_engine(spec):
+    """Import an engine given as "package.module:function"."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_equivalence_checks(
+    paths=None,
+    n_cases=20,
+    seed=0,
+    candidates=None,
+    rtol=RTOL,
+    atol=ATOL,
+    minimize=True,
+):
+    """Compare candidate engines with the reference engines on random inputs.
+
+    Args:
+        paths (list): Aggregation paths to check. Default is all.
+        n_cases (int): Number of random inputs per path.
+        seed (int): Seed of the inputs. The inputs of a path and case number are
+            the same in every run with the same seed.
+        candidates (dict): Maps paths to candidate engines. Default is the current
+            implementation of every path.
+        rtol (float): Relative tolerance of numbers.
+        atol (float): Absolute tolerance of numbers.
+        minimize (bool): Whether to minimize the inputs of failing cases.
+
+    Returns:
+        dict: Maps paths to lists of failures. A failure is a dict with the
+            "path", "case", "edge_cases", "kwargs" of the (minimized) input and
+            the "differences".
+
+    """
+    references = reference_engines()
+    engines = current_engines()
+    engines.update(candidates or {})
+    paths = list(references) if paths is None else paths
+
+    results = {}
+    for path in paths:
+        failures = []
+        for case in range(n_cases):
+            rng = _case_rng(seed, path, case)
+            kwargs, edge_cases = CASE_MAKERS[path](rng)
+            compare = partial(
+                compare_engines,
+                reference=references[path],
+                candidate=engines[path],
+                rtol=rtol,
+                atol=atol,
+            )
+            differences = compare(kwargs)
+            if not differences:
+                continue
+            if minimize:
+                kwargs = minimize_rows(kwargs, lambda kw: bool(compare(kw)))
+                differences = compare(kwargs)
+            failures.append(
+                {
+                    "path": path,
+                    "case": case,
+                    "edge_cases": edge_cases,
+                    "kwargs": kwargs,
+                    "differences": differences,
+                }
+            )
+        results[path] = failures
+    return results
+
+
+def compare_engines(kwargs, reference, candidate, rtol=RTOL, atol=ATOL):
+    """Run both engines on a copy of the inputs and compare the results.
+
+    Returns:
+        list: Descriptions of the differences. Empty if the results agree.
+
+    """
+    expected = _run(reference, kwargs)
+    actual = _run(candidate, kwargs)
+    if isinstance(expected, Exception) or isinstance(actual, Exception):
+        if type(expected) is type(actual):
+            return []
+        return [
+            f"reference returned {_describe(expected)}, candidate {_describe(actual)}"
+        ]
+    return compare_artifacts(expected, actual, rtol=rtol, atol=atol)[:_MAX_DIFFERENCES]
+
+
+def compare_artifacts(expected, actual, rtol=RTOL, atol=ATOL, path="result"):
+    """Compare two results key by key and value by value.
+
+    Returns:
+        list: Descriptions of the differences, with the path of each value.
+
+    """
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return [f"{path}: expected a dict, got {type(actual).__name__}"]
+        expected_keys = [_key(k) for k in expected]
+        actual_keys = [_key(k) for k in actual]
+        diffs = []
+        if expected_keys != actual_keys:
+            missing = [k for k in expected_keys if k not in actual_keys]
+            extra = [k for k in actual_keys if k not in expected_keys]
+            if missing or extra:
+                diffs.append(f"{path}: missing keys {missing}, unexpected keys {extra}")
+            else:
+                diffs.append(f"{path}: keys are in a different order")
+        actual_by_key = {_key(k): v for k, v in actual.items()}
+        for k, value in expected.items():
+            if _key(k) in actual_by_key:
+                diffs += compare_artifacts(
+                    value, actual_by_key[_key(k)], rtol, atol, f"{path}[{k!r}]"
+                )
+        return diffs
+
+    elif isinstance(expected, pd.DataFrame):
+        if not isinstance(actual, pd.DataFrame):
+            return [f"{path}: expected a DataFrame, got {type(actual).__name__}"]
+        expected_columns = expected.columns.tolist()
+        if expected_columns != actual.columns.tolist():
+            return [
+                f"{path}: expected columns {expected_columns}, got "
+                f"{actual.columns.tolist()}"
+            ]
+        diffs = compare_artifacts(
+            expected.index.to_numpy(), actual.index.to_numpy(), rtol, atol, path
+        )
+        for column in expected_columns:
+            column_path = f"{path}[{column!r}]"
+            if expected[column].dtype != actual[column].dtype:
+                diffs.append(
+                    f"{column_path}: expected {expected[column].dtype}, got "
+                    f"{actual[column].dtype}"
+                )
+            else:
+                diffs += compare_artifacts(
+                    expected[column].to_numpy(),
+                    actual[column].to_numpy(),
+                    rtol,
+                    atol,
+                    column_path,
+                )
+        return diffs
+
+    elif isinstance(expected, np.ndarray):
+        if not isinstance(actual, np.ndarray):
+            return [f"{path}: expected an array, got {type(actual).__name__}"]
+        elif expected.dtype != actual.dtype or expected.shape != actual.shape:
+            return [
+                f"{path}: expected {expected.dtype}{expected.shape}, got "
+                f"{actual.dtype}{actual.shape}"
+            ]
+        elif is_numeric_dtype(expected.dtype) and expected.dtype != bool:
+            if np.allclose(expected, actual, rtol=rtol, atol=atol, equal_nan=True):
+                return []
+            with np.errstate(invalid="ignore"):
+                error = np.nanmax(np.abs(expected.astype(float) - actual))
+            return [f"{path}: values differ by up to {error:.3g}"]
+        return compare_artifacts(expected.tolist(), actual.tolist(), rtol, atol, path)
+
+    elif isinstance(expected, (list, tuple)):
+        if type(expected) is not type(actual):
+            return [
+                f"{path}: expected a {type(expected).__name__}, "
+                f"got {type(actual).__name__}"
+            ]
+        elif len(expected) != len(actual):
+            return [f"{path}: expected {len(expected)} items, got {len(actual)}"]
+        diffs = []
+        for i, (exp, act) in enumerate(zip(expected, actual)):
+            diffs += compare_artifacts(exp, act, rtol, atol, f"{path}[{i}]")
+        return diffs
+
+    elif _is_float(expected) and _is_number(actual):
+        if np.isnan(expected) and np.isnan(actual):
+            return []
+        elif np.isclose(expected, actual, rtol=rtol, atol=atol):
+            return []
+        return [f"{path}: expected {expected!r}, got {actual!r}"]
+
+    elif _key(expected) != _key(actual):
+        return [f"{path}: expected {expected!r}, got {actual!r}"]
+    return []
+
+
+def minimize_rows(kwargs, fails, max_checks=200):
+    """Remove rows of the data as long as the inputs still fail.
+
+    The rows are removed in chunks, which get smaller when no chunk can be removed
+    (delta debugging).
+
+    Args:
+        kwargs (dict): Inputs of a failing case with the dataset under "data".
+        fails (callable): Returns whether inputs still fail.
+        max_checks (int): Maximal number of calls of fails.
+
+    Returns:
+        dict: kwargs with the reduced dataset.
+
+    """
+    data = kwargs["data"]
+    n_chunks = 2
+    checks = 0
+    while len(data) > 1 and checks < max_checks:
+        chunks = np.array_split(np.arange(len(data)), min(n_chunks, len(data)))
+        for chunk in chunks:
+            keep = np.ones(len(data), dtype=bool)
+            keep[chunk] = False
+            reduced = data.iloc[keep]
+            checks += 1
+            if fails({**kwargs, "data": reduced}):
+                data = reduced
+                n_chunks = max(n_chunks - 1, 2)
+                break
+            elif checks >= max_checks:
+                break
+        else:
+            if n_chunks >= len(data):
+                break
+            n_chunks = min(2 * n_chunks, len(data))
+    return {**kwargs, "data": data}
+
+
+def write_reproducers(results, out_dir):
+    """Pickle every failure of run_equivalence_checks to out_dir.
+
+    Returns:
+        dict: Maps the path and case number of each failure to its reproducer.
+
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    reproducers = {}
+    for failures in results.values():
+        for failure in failures:
+            key = (failure["path"], failure["case"])
+            reproducers[key] = out_dir / f"{key[0]}_case_{key[1]}.pickle"
+            pd.to_pickle(failure, reproducers[key])
+    return reproducers
+
+
+def replay_reproducer(path, candidate=None, rtol=RTOL, atol=ATOL):
+    """Compare the engines again on the inputs of a pickled failure.
+
+    Args:
+        path (pathlib.Path): Reproducer written by :func:`write_reproducers`.
+        candidate (callable): Candidate engine. Default is the current one.
+
+    Returns:
+        list: Descriptions of the differences. Empty if the engines agree now.
+
+    """
+    failure = pd.read_pickle(path)
+    name = failure["path"]
+    candidate = current_engines()[name] if candidate is None else candidate
+    return compare_engines(
+        failure["kwargs"],
+        reference=reference_engines()[name],
+        candidate=candidate,
+        rtol=rtol,
+        atol=atol,
+    )
+
+
+def format_equivalence_results(results, n_cases, reproducers=None):
+    reproducers = {} if reproducers is None else reproducers
+    lines = []
+    for path, failures in results.items():
+        lines.append(f"{path}: {n_cases - len(failures)} of {n_cases} cases agree")
+        for failure in failures:
+            edge_cases = ", ".join(failure["edge_cases"]) or "no edge cases"
+            n_rows = len(failure["kwargs"]["data"])
+            lines.append(f"  case {failure['case']} ({edge_cases}, {n_rows} rows):")
+            lines += [f"    {diff}" for diff in failure["differences"]]
+            key = (path, failure["case"])
+            if key in reproducers:
+                lines.append(f"    reproducer: {reproducers[key]}")
+    return "\n".join(lines)
+
+
+# ======================================================================================
+# random inputs
+# ======================================================================================
+
+
+def _univariate_case(plot_type, rng):
+    inputs = univariate_inputs(_METADATA_CONFIG)
+    vm = inputs["variable_mappings"]
+    groups = inputs["plot_type_to_groups"][plot_type]
+    variables = vm["group_to_variables"][groups[rng.randint(len(groups))]]
+    bg_vars = inputs["bg_vars"]
+
+    data = create_univariate_data(
+        n_rows=rng.randint(1, 400),
+        n_categories=rng.randint(1, 7),
+        n_bg_categories=rng.randint(1, 5),
+        missing_share=rng.choice([0, 0.05, 0.3]),
+        seed=rng.randint(2 ** 31),
+    )
+    data = data[variables + bg_vars]
+    data, edge_cases = _add_edge_cases(rng, data, bg_vars, variables)
+    kwargs = {
+        "data": data,
+        "variables": variables,
+        "bg_vars": bg_vars,
+        "nice_names": vm["variable_to_nice_name"],
+        "labels": vm["variable_to_label"],
+        "nothing_string": inputs["nothing_string"],
+    }
+    return kwargs, edge_cases
+
+
+def _lineplot_case(rng):
+    kwargs = dict(run_charts_inputs(_METADATA_CONFIG)[1])
+    data = create_waves_data(
+        n_rows=rng.randint(50, 2000),
+        n_months=rng.randint(4, 8),
+        missing_share=rng.choice([0, 0.05, 0.3]),
+        seed=rng.randint(2 ** 31),
+    )
+    bg_vars = [bg_var for bg_var in kwargs["bg_vars"] if bg_var != "None"]
+    data, edge_cases = _add_edge_cases(rng, data, bg_vars, kwargs["variables"])
+    kwargs["data"] = data
+    kwargs["language"] = ["english", "german"][rng.randint(2)]
+    return kwargs, edge_cases
+
+
+def _boxplot_case(rng):
+    kwargs = dict(boxplots_inputs(_METADATA_CONFIG)[1])
+    # the reference computes all quantiles once per row, so the datasets are small
+    data = create_child_data(
+        n_rows=rng.randint(5, 60),
+        missing_share=rng.choice([0, 0.05, 0.3]),
+        seed=rng.randint(2 ** 31),
+    )
+    # most background variables and the outcomes are derived from these columns
+    bg_vars = ["gender", "edu", "labor_force_coarse_mother", "labor_force_coarse"]
+    values = ["cc_gap", "hours_cc_female", "hours_cc_male"]
+    data, edge_cases = _add_edge_cases(rng, data, bg_vars, values)
+    kwargs["data"] = data
+    return kwargs, edge_cases
+
+
+def _background_join_case(rng):
+    n_persons = rng.randint(1, 200)
+    ids = rng.choice(np.arange(10 * n_persons), size=n_persons, replace=False)
+    n_months = rng.randint(1, 4)
+    index = pd.MultiIndex.from_product(
+        [ids, np.arange(n_months)], names=["personal_id", "month"]
+    )
+    n_rows = len(index)
+    columns = {
+        "q_float": rng.rand(n_rows),
+        "q_int": rng.randint(5, size=n_rows),
+        "age": rng.randint(18, 90, size=n_rows),
+        "gender": pd.Categorical(rng.choice(["female", "male"], size=n_rows)),
+    }
+    data = pd.DataFrame(columns, index=index)
+    data = data.sample(frac=1, random_state=rng.randint(2 ** 31))
+
+    # some persons have no background data and others are not in data
+    bg_ids = np.union1d(rng.choice(ids, size=rng.randint(n_persons + 1)), ids + 1)
+    bg_columns = {
+        "edu": pd.Categorical(rng.choice(["low", "medium", "high"], size=len(bg_ids))),
+        "income": rng.lognormal(size=len(bg_ids)),
+        "age": rng.randint(18, 90, size=len(bg_ids)),
+        "gender": rng.choice(["female", "male"], size=len(bg_ids)),
+    }
+    bg_data = pd.DataFrame(bg_columns, index=pd.Index(bg_ids, name="personal_id"))
+
+    edge_cases = []
+    overlap = [c for c in ["age", "gender"] if rng.rand() < 0.5]
+    if overlap:
+        edge_cases.append(f"overlapping columns: {overlap}")
+    data = data.drop(columns=[c for c in ["age", "gender"] if c not in overlap])
+    if rng.rand() < 0.3:
+        bg_data["id"] = rng.randint(5, size=len(bg_data))
+        edge_cases.append("id column in the background data")
+    return {"data": data, "bg_data": bg_data}, edge_cases
+
+
+CASE_MAKERS = {
+    "stacked_barplot": partial(_univariate_case, "stacked_barplot"),
+    "barplot": partial(_univariate_case, "barplot"),
+    "distplot": partial(_univariate_case, "distplot"),
+    "lineplot": _lineplot_case,
+    "boxplot": _boxplot_case,
+    "background_join": _background_join_case,
+}
+
+
+def _add_edge_cases(rng, data, bg_vars, value_vars, probability=0.4):
+    """Apply each edge case with the given probability to a random category.
+
+    Returns:
+        tuple: The modified data and the applied edge cases, described by the
+            background variable and category.
+
+    """
+    applied = []
+    for edge_case in EDGE_CASES:
+        if rng.rand() >= probability:
+            continue
+        bg_var = bg_vars[rng.randint(len(bg_vars))]
+        observed = data[bg_var].dropna().unique()
+        if edge_case == "empty_category" and is_categorical_dtype(data[bg_var]):
+            data = data.copy()
+            data[bg_var] = data[bg_var].cat.add_categories([f"{bg_var} empty"])
+        elif edge_case == "empty_category" and len(observed):
+            data = data[data[bg_var] != observed[0]]
+        elif edge_case == "all_nan_group" and len(observed):
+            data = data.copy()
+            is_group = data[bg_var] == observed[0]
+            for var in value_vars:
+                data[var] = data[var].mask(is_group)
+        elif edge_case == "single_observation" and len(observed):
+            is_group = (data[bg_var] == observed[0]).to_numpy()
+            keep = ~is_group
+            keep[np.flatnonzero(is_group)[:1]] = True
+            data = data[keep]
+        else:
+            continue
+        category = observed[0] if len(observed) else None
+        applied.append(f"{edge_case}: {bg_var}={category}")
+    return data, applied
+
+
+def _case_rng(seed, path, case):
+    return np.random.RandomState([seed, zlib.crc32(path.encode()), case])
+
+
+def _run(engine, kwargs):
+    kwargs = {
+        key: value.copy() if isinstance(value, pd.DataFrame) else value
+        for key, value in kwargs.items()
+    }
+    try:
+        return engine(**kwargs)
+    except Exception as e:
+        return e
+
+
+def _describe(result):
+    if isinstance(result, Exception):
+        return f"{type(result).__name__}: {result}"
+    return f"a {type(result).__name__}"
+
+
+def _key(value):
+    """Make missing values equal, so that they can be compared and looked up."""
+    if isinstance(value, float) and np.isnan(value):
+        return "<missing>"
+    elif isinstance(value, tuple):
+        return tuple(_key(v) for v in value)
+    return value
+
+
+def _is_float(value):
+    return isinstance(value, (float, np.floating))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
@@ -0,0 +1,113 @@
+"""Cold import time of the entry points of the dashboard.
+
+Every measurement imports the modules of a target in a fresh interpreter, so
+nothing is cached in ``sys.modules``. The targets are
+
+- "app": the modules that the Bokeh app imports when it builds a session,
+- "build": the CLI that builds the dashboard data and
+- "server": the CLI that starts the dashboard server.
+
+A target exceeds its budget if the median of the repetitions is above it.
+
+"""
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from utilities.dashboard.config import APP_DIR
+
+# seconds; the targets took about 0.9 s on a development machine once seaborn,
+# matplotlib and scipy were no longer imported on the way, compared to 1.5 s before
+DEFAULT_BUDGETS = {"app": 1.5, "build": 1.5, "server": 1.5}
+
+_MEASURE = """
+import importlib, json, time
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def import_targets():
+    """Return the modules of every target."""
+    return {
+        "app": _app_imports(),
+        "build": ["utilities.dashboard.process_dashboard_source_data"],
+        "server": ["utilities.dashboard.run_dashboard"],
+    }
+
+
+def measure_import_time(modules, repeat=5):
+    """Import modules in repeat fresh interpreters.
+
+    Returns:
+        list: Seconds that each import took, without interpreter startup.
+
+    """
+    repo_root = Path(__file__).resolve().parents[3]
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _MEASURE.format(modules=list(modules))],
+            cwd=repo_root,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        timings.append(json.loads(out.strip().splitlines()[-1]))
+    return timings
+
+
+def run_import_benchmark(budgets=None, repeat=5):
+    """Measure the cold import time of every target and compare it to its budget.
+
+    Args:
+        budgets (dict): Maps targets to budgets in seconds. Targets that are not
+            in budgets use DEFAULT_BUDGETS.
+        repeat (int): Number of fresh interpreters per target.
+
+    Returns:
+        dict: Maps targets to dicts with "median", "min", "budget" and
+            "over_budget".
+
+    """
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    results = {}
+    for target, modules in import_targets().items():
+        timings = measure_import_time(modules, repeat=repeat)
+        median = statistics.median(timings)
+        results[target] = {
+            "median": median,
+            "min": min(timings),
+            "budget": budgets[target],
+            "over_budget": median > budgets[target],
+        }
+    return results
+
+
+def format_import_results(results):
+    header = f"{'target':<8} {'median [s]':>10} {'min [s]':>8} {'budget [s]':>10}"
+    lines = [header, "-" * len(header)]
+    for target, res in results.items():
+        flag = "  OVER BUDGET" if res["over_budget"] else ""
+        lines.append(
+            f"{target:<8} {res['median']:10.3f} {res['min']:8.3f} "
+            f"{res['budget']:10.3f}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def _app_imports():
+    """Collect the modules that the app's main.py imports from its source."""
+    tree = ast.parse((APP_DIR / "main.py").read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module not in modules:
+            modules.append(node.module)
+        elif isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+    return modules
@@ -0,0 +1,417 @@
+"""Load test of the dashboard app with simulated sessions.
+
+A load test starts ``bokeh serve`` with the app on a local port, opens sessions
+with :mod:`bokeh.client` from a pool of threads and replays a script of selector
+changes on every tab. It measures
+
+- the time until a session's document has been pulled from the server,
+- the round trip of every selector change, i.e. until the server has run the
+  callbacks and the client has received the resulting changes, including the plots
+  that the callbacks build in the thread pool of the server,
+- the resident memory of the server process and
+- the size of the serialized session document.
+
+``ClientSession.force_roundtrip`` drops the changes that the server pushes while it
+waits for the reply. Whenever the test waits for changes that the server makes after
+its reply, e.g. tabs that are built when they are first shown or plots from the
+thread pool, it processes the messages of the server with :func:`run_until` instead.
+bokeh.client has no public method for this, so :func:`run_until` uses the connection
+of the session, which was tested with Bokeh :data:`TESTED_BOKEH_VERSION`.
+
+"""
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bokeh
+import numpy as np
+from bokeh.client import pull_session
+from bokeh.models import Div
+from bokeh.models import Select
+from bokeh.models import Tabs
+
+from utilities.dashboard.config import APP_DIR
+from utilities.dashboard.executor import LOADING_INDICATOR_NAME
+from utilities.dashboard.instrumentation import resident_memory
+
+PERCENTILES = [50, 90, 99]
+
+# seconds that a selector change may take until its plot is shown
+UPDATE_TIMEOUT = 60
+
+# minor version of Bokeh whose client connection run_until was tested with
+TESTED_BOKEH_VERSION = "2.4"
+
+
+def start_server(data_dir, port, timeout=120):
+    """Start ``bokeh serve`` with the app and wait until it accepts connections.
+
+    Args:
+        data_dir (pathlib.Path): Directory of the dashboard data.
+        port (int): Local port of the server.
+        timeout (float): Seconds to wait for the server.
+
+    Returns:
+        subprocess.Popen: The server process.
+
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "bokeh",
+        "serve",
+        str(APP_DIR),
+        "--port",
+        str(port),
+        "--allow-websocket-origin",
+        f"localhost:{port}",
+        "--args",
+        str(data_dir),
+    ]
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with code {process.returncode}.")
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise TimeoutError(f"The server did not start within {timeout} seconds.")
+
+
+def create_script(document, changes_per_selector=3):
+    """Create a script of selector changes for every tab of a session document.
+
+    Args:
+        document (bokeh.document.Document): A pulled session document.
+        changes_per_selector (int): Number of options selected per selector.
+
+    Returns:
+        list: List of (tab, selector, value) tuples, where tab is the index of a
+            tab and selector the index of a Select in layout order.
+
+    """
+    script = []
+    tabs = document.roots[0]
+    for tab, panel in enumerate(tabs.tabs):
+        for selector, select in enumerate(selects_in_layout_order(panel.child)):
+            options = [opt for opt in select.options if opt != select.value]
+            for value in options[:changes_per_selector] + [select.value]:
+                script.append((tab, selector, value))
+    return script
+
+
+def show_all_tabs(session):
+    """Show every tab of a pulled session once, so that the server builds it."""
+    tabs = session.document.roots[0]
+    for tab in range(len(tabs.tabs)):
+        show_tab(session, tabs, tab)
+    show_tab(session, tabs, 0)
+
+
+def show_tab(session, tabs, tab):
+    """Show a tab and wait until the server has built it."""
+    tabs.active = tab
+    # deferred tabs are empty Divs until they are shown for the first time
+    run_until(session, lambda: not _is_placeholder(tabs.tabs[tab].child))
+
+
+def run_until(session, predicate, timeout=UPDATE_TIMEOUT):
+    """Apply the changes that the server pushes until predicate() is true.
+
+    Args:
+        session (bokeh.client.ClientSession): A pulled session.
+        predicate (callable): Checked before every message of the server.
+        timeout (float): Seconds to wait.
+
+    Raises:
+        TimeoutError: If predicate() is still false after timeout seconds.
+        RuntimeError: If the client connection of the installed Bokeh differs from
+            the tested one.
+
+    """
+    connection = getattr(session, "_connection", None)
+    loop = getattr(connection, "_loop", None)
+    if not hasattr(connection, "_loop_until") or not hasattr(loop, "call_later"):
+        raise RuntimeError(
+            "The load test processes the messages of the server with the client "
+            f"connection of Bokeh {TESTED_BOKEH_VERSION}, which Bokeh "
+            f"{bokeh.__version__} does not have. Install Bokeh "
+            f"{TESTED_BOKEH_VERSION}, see environment.yml."
+        )
+    # the client loop otherwise only stops on a message that fulfills predicate
+    handle = loop.call_later(timeout, loop.stop)
+    try:
+        connection._loop_until(predicate)
+    finally:
+        loop.remove_timeout(handle)
+    if not predicate():
+        raise TimeoutError(f"The server did not update within {timeout} seconds.")
+
+
+class LoadingWatch:
+    """Observe the loading indicators of a component in a pulled document.
+
+    A component that builds its plot in the thread pool of the server shows its
+    loading indicator until the plot has been put into the document. The attribute
+    ``loaded`` becomes True when an indicator was hidden after :meth:`reset`
+    and after it had been shown.
+
+    Args:
+        layout (bokeh.models.LayoutDOM): Layout of a tab.
+
+    """
+
+    def __init__(self, layout):
+        self.indicators = list(layout.select({"name": LOADING_INDICATOR_NAME}))
+        self.shown = False
+        self.loaded = False
+        for indicator in self.indicators:
+            indicator.on_change("visible", self._changed)
+
+    def reset(self):
+        self.shown = False
+        self.loaded = False
+
+    def _changed(self, attr, old, new):
+        if new:
+            self.shown = True
+        elif self.shown:
+            self.loaded = True
+
+
+def run_session(url, script, results):
+    """Open one session, replay the script and record latencies in results."""
+    start = time.perf_counter()
+    session = pull_session(url=url)
+    results["session_open"].append(time.perf_counter() - start)
+
+    try:
+        document = session.document
+        tabs = document.roots[0]
+        results["document_size"].append(len(json.dumps(document.to_json())))
+        results["n_models"].append(len(document.roots[0].references()))
+
+        selects = {}
+        watches = {}
+        for tab, selector, value in script:
+            if tab not in selects:
+                show_tab(session, tabs, tab)
+                selects[tab] = selects_in_layout_order(tabs.tabs[tab].child)
+                watches[tab] = LoadingWatch(tabs.tabs[tab].child)
+            select = selects[tab][selector]
+            if select.disabled or value not in select.options or value == select.value:
+                # earlier changes of the script may have changed the selector
+                continue
+
+            start = time.perf_counter()
+            watch = watches[tab]
+            watch.reset()
+            select.value = value
+            if watch.indicators:
+                # the callbacks build the plot in the thread pool of the server
+                run_until(session, lambda: watch.loaded)
+            else:
+                # the server handles the patch before the request for server
+                # info, so the reply arrives after all changes of the callbacks
+                session.force_roundtrip()
+            key = f"{tabs.tabs[tab].title}: {select.title}"
+            results["callbacks"].setdefault(key, []).append(time.perf_counter() - start)
+    finally:
+        session.close()
+
+
+def run_load_test(
+    data_dir,
+    n_sessions=10,
+    concurrency=5,
+    changes_per_selector=3,
+    port=5080,
+    url=None,
+):
+    """Run a load test against a local server.
+
+    Args:
+        data_dir (pathlib.Path): Directory of the dashboard data.
+        n_sessions (int): Number of simulated sessions.
+        concurrency (int): Number of sessions that are open at the same time.
+        changes_per_selector (int): Number of options selected per selector.
+        port (int): Local port of the server that is started.
+        url (str): URL of an already running app. If given, no server is started
+            and the memory of the server is not measured.
+
+    Returns:
+        dict: The measurements, see :func:`summarize`.
+
+    """
+    process = None
+    if url is None:
+        process = start_server(data_dir, port)
+        url = f"http://localhost:{port}/{APP_DIR.name}"
+
+    results = {
+        "session_open": [],
+        "document_size": [],
+        "n_models": [],
+        "callbacks": {},
+        "rss": [],
+    }
+    lock = threading.Lock()
+    try:
+        # the first session pays the cold start and provides the script
+        start = time.perf_counter()
+        session = pull_session(url=url)
+        results["cold_start"] = time.perf_counter() - start
+        show_all_tabs(session)
+        script = create_script(session.document, changes_per_selector)
+        session.close()
+
+        sampler = _RssSampler(process.pid) if process is not None else None
+        if sampler is not None:
+            results["rss_before"] = resident_memory(process.pid)
+            sampler.start()
+
+        def _run(_):
+            session_results = {
+                "session_open": [],
+                "document_size": [],
+                "n_models": [],
+                "callbacks": {},
+            }
+            run_session(url, script, session_results)
+            with lock:
+                for key in ["session_open", "document_size", "n_models"]:
+                    results[key] += session_results[key]
+                for key, timings in session_results["callbacks"].items():
+                    results["callbacks"].setdefault(key, []).extend(timings)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(_run, range(n_sessions)))
+        results["duration"] = time.perf_counter() - start
+
+        if sampler is not None:
+            results["rss"] = sampler.stop()
+            results["rss_after"] = resident_memory(process.pid)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    results["n_sessions"] = n_sessions
+    results["concurrency"] = concurrency
+    return results
+
+
+def summarize(results):
+    """Summarize the measurements of a load test.
+
+    Returns:
+        dict: Dictionary with latency percentiles in seconds, the server memory in
+            bytes and the document size in bytes.
+
+    """
+    summary = {
+        "n_sessions": results["n_sessions"],
+        "concurrency": results["concurrency"],
+        "duration": results["duration"],
+        "cold_start": results["cold_start"],
+        "session_open": _percentiles(results["session_open"]),
+        "callbacks": {
+            key: _percentiles(timings) for key, timings in results["callbacks"].items()
+        },
+        "document_size": max(results["document_size"]),
+        "n_models": max(results["n_models"]),
+    }
+    if results["rss"]:
+        summary["rss"] = {
+            "before": results["rss_before"],
+            "peak": max(results["rss"]),
+            "after": results["rss_after"],
+        }
+    return summary
+
+
+def format_summary(summary):
+    lines = [
+        f"{summary['n_sessions']} sessions, {summary['concurrency']} at a time, "
+        f"{summary['duration']:.1f} s",
+        f"cold start: {summary['cold_start']:.3f} s",
+        f"document size: {summary['document_size'] / 1e6:.2f} MB, "
+        f"{summary['n_models']} models",
+    ]
+    if "rss" in summary:
+        rss = {key: val / 1e6 for key, val in summary["rss"].items()}
+        lines.append(
+            f"server RSS [MB]: {rss['before']:.0f} before, {rss['peak']:.0f} peak, "
+            f"{rss['after']:.0f} after"
+        )
+
+    rows = {"session open": summary["session_open"], **summary["callbacks"]}
+    width = max(len(key) for key in rows)
+    header = f"{'':{width}}  {'n':>5}" + "".join(
+        f"  {f'p{p} [ms]':>10}" for p in PERCENTILES
+    )
+    header += f"  {'max [ms]':>10}"
+    lines += ["", header, "-" * len(header)]
+    for key, stats in rows.items():
+        line = f"{key:{width}}  {stats['n']:5d}"
+        line += "".join(f"  {stats[f'p{p}'] * 1000:10.1f}" for p in PERCENTILES)
+        line += f"  {stats['max'] * 1000:10.1f}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def _percentiles(timings):
+    stats = {"n": len(timings), "max": max(timings)}
+    for p, value in zip(PERCENTILES, np.percentile(timings, PERCENTILES)):
+        stats[f"p{p}"] = float(value)
+    return stats
+
+
+def _is_placeholder(model):
+    return isinstance(model, Div) and not model.text
+
+
+def selects_in_layout_order(model):
+    """Return the Select widgets of a layout, depth first."""
+    if isinstance(model, Select):
+        return [model]
+    elif isinstance(model, Tabs):
+        children = [panel.child for panel in model.tabs]
+    else:
+        children = getattr(model, "children", [])
+    return [select for child in children for select in selects_in_layout_order(child)]
+
+
+class _RssSampler:
+    """Sample the resident memory of a process in a background thread."""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(resident_memory(self.pid))
+            self._stop.wait(self.interval)
@@ -0,0 +1,89 @@
+"""Model churn of one dashboard session under many selector changes.
+
+The app builds a session document in process, outside of a server, so the
+callbacks run synchronously. A script visits every option of every selector and
+returns to the initial selection, see ``load_test.create_script``. The script is
+replayed for many cycles. After each cycle the document shows the same selection
+again, so its number of models and the estimated size of its data must be the same
+after every cycle. If they grow, callbacks leave replaced models in the document.
+
+"""
+from bokeh.command.util import build_single_handler_application
+from bokeh.document import Document
+
+from utilities.dashboard.benchmarks.load_test import create_script
+from utilities.dashboard.benchmarks.load_test import selects_in_layout_order
+from utilities.dashboard.config import APP_DIR
+from utilities.dashboard.session_models import model_stats
+
+
+def build_session_document(data_dir):
+    """Build the document of one session of the app.
+
+    Raises:
+        RuntimeError: If the app fails to build the document.
+
+    """
+    application = build_single_handler_application(str(APP_DIR), [str(data_dir)])
+    doc = Document()
+    application.initialize_document(doc)
+    for handler in application.handlers:
+        if handler.failed:
+            raise RuntimeError(f"Building the document failed:\n{handler.error_detail}")
+    return doc
+
+
+def run_model_churn(data_dir, n_changes=2000, changes_per_selector=1000):
+    """Replay selector changes and record the models after every cycle.
+
+    Args:
+        data_dir (pathlib.Path): Directory of the dashboard data.
+        n_changes (int): Minimal number of selector changes. Whole cycles of the
+            script are replayed.
+        changes_per_selector (int): Maximal number of options per selector in
+            one cycle.
+
+    Returns:
+        dict: "initial" and "cycles" contain the model stats of the document
+            before the first and after every cycle, see
+            ``session_models.model_stats``. "n_changes" is the number of changes
+            that triggered callbacks.
+
+    """
+    doc = build_session_document(data_dir)
+    tabs = doc.roots[0]
+    script = create_script(doc, changes_per_selector)
+    selects = [selects_in_layout_order(panel.child) for panel in tabs.tabs]
+
+    res = {"initial": model_stats(doc), "cycles": [], "n_changes": 0}
+    while res["n_changes"] < n_changes:
+        for tab, selector, value in script:
+            select = selects[tab][selector]
+            if select.disabled or value not in select.options or select.value == value:
+                continue
+            select.value = value
+            res["n_changes"] += 1
+        res["cycles"].append(model_stats(doc))
+    return res
+
+
+def churn_growth(results):
+    """Return the growth of the stats from the first to the last cycle."""
+    first, last = results["cycles"][0], results["cycles"][-1]
+    return {key: last[key] - first[key] for key in first}
+
+
+def format_churn_results(results):
+    lines = [
+        f"{'after':<12} {'models':>8} {'data [kB]':>10}",
+        "-" * 32,
+        _format_row("start", results["initial"]),
+    ]
+    for i, stats in enumerate(results["cycles"], start=1):
+        lines.append(_format_row(f"cycle {i}", stats))
+    lines.append(f"{results['n_changes']} selector changes")
+    return "\n".join(lines)
+
+
+def _format_row(name, stats):
+    return f"{name:<12} {stats['models']:>8} {stats['data_bytes'] / 1e3:>10.1f}"
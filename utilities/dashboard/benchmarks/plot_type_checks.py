@@ -0,0 +1,246 @@
+"""Conformance checks of the registered plot types on synthetic data.
+
+Every registered plot type, see ``plot_types``, prepares the groups of its type in
+the synthetic data of the benchmarks and must fulfill the contract:
+
+- the plot data is a dict that can be pickled,
+- the plot data contains a share cube if and only if the plot type declares
+  "splits", and the splits by two background variables can be plotted,
+- ``setup_plot`` followed by ``condition_plot`` returns a Bokeh model for the
+  unconditional plot and for the split by every background variable,
+- if the plot type declares "incremental", conditioning a plot of another split on
+  a split gives the same models as building the plot for that split.
+
+:func:`check_entry_points` checks that an entry point that cannot be loaded is
+skipped without affecting the other entry points.
+
+A faster implementation of a plot type, e.g. from an entry point, can be swapped in
+if it passes these checks and the benchmarks.
+
+"""
+import logging
+import pickle
+from importlib.metadata import EntryPoint
+
+import numpy as np
+from bokeh.model import Model
+
+from utilities.dashboard.benchmarks.suite import prepare_group
+from utilities.dashboard.benchmarks.suite import univariate_inputs
+from utilities.dashboard.components.univariate_distributions.general_barplot import (
+    prepare_split_data,
+)
+from utilities.dashboard.components.univariate_distributions.general_barplot import (
+    split_name,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    ENTRY_POINT_GROUP,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    get_plot_type,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    plot_kwargs,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    plot_types,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    register_entry_points,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    register_plot_type,
+)
+from utilities.dashboard.components.univariate_distributions.share_cube import (
+    ShareCube,
+)
+
+
+def run_plot_type_checks(config, names=None):
+    """Check the registered plot types.
+
+    Args:
+        config (dict): Configuration of the synthetic data, see
+            ``suite.DEFAULT_CONFIG``.
+        names (list): Names of the plot types to check. Default is all.
+
+    Returns:
+        dict: Maps plot types to dicts with the checked "groups" and a list of
+            "problems". Plot types without groups in the synthetic data are not
+            checked.
+
+    """
+    inputs = univariate_inputs(tuple(sorted(config.items())))
+    registered = plot_types()
+    names = list(registered) if names is None else names
+    results = {}
+    for name in names:
+        groups = inputs["plot_type_to_groups"].get(name, [])
+        problems = []
+        for group in groups:
+            problems += [
+                f"{group}: {problem}"
+                for problem in check_group(registered[name], inputs, group)
+            ]
+        results[name] = {"groups": groups, "problems": problems}
+    return results
+
+
+def check_group(plot_type, inputs, group):
+    """Check a plot type on one group of the synthetic data.
+
+    Returns:
+        list: Descriptions of the violations of the contract.
+
+    """
+    try:
+        plot_data = prepare_group(inputs, plot_type.name, group)
+    except Exception as e:
+        return [f"prepare_data failed: {e!r}"]
+    if not isinstance(plot_data, dict):
+        return [f"prepare_data returned a {type(plot_data).__name__}, not a dict."]
+
+    problems = []
+    try:
+        pickle.dumps(plot_data)
+    except Exception as e:
+        problems.append(f"The plot data cannot be pickled: {e!r}")
+
+    nothing_string = inputs["nothing_string"]
+    nice_names = inputs["variable_mappings"]["variable_to_nice_name"]
+    bg_vars = [nice_names[var] for var in inputs["bg_vars"]]
+    splits = [(nothing_string, plot_data)] + [(bg_var, plot_data) for bg_var in bg_vars]
+
+    if plot_type.splits and "cube" not in plot_data:
+        problems.append("Declares splits, but the plot data has no share cube.")
+    elif "cube" in plot_data and not plot_type.splits:
+        problems.append("The plot data has a share cube, but splits are not declared.")
+    elif plot_type.splits and len(bg_vars) > 1:
+        split = tuple(bg_vars[:2])
+        try:
+            split_data = prepare_split_data(
+                share_cube=ShareCube(**plot_data["cube"]),
+                shares=plot_data["shares"],
+                split=split,
+                nothing_string=nothing_string,
+            )
+            splits.append((split_name(split), split_data))
+        except Exception as e:
+            problems.append(f"Deriving the split {split} failed: {e!r}")
+
+    built = {}
+    for bg_var, data in splits:
+        try:
+            built[bg_var] = _build(plot_type, data, bg_var, nothing_string)
+        except Exception as e:
+            problems.append(f"Building the plot for {bg_var} failed: {e!r}")
+            continue
+        if not isinstance(built[bg_var], Model):
+            problems.append(f"The plot for {bg_var} is not a Bokeh model.")
+
+    if plot_type.incremental and nothing_string in built:
+        for bg_var in bg_vars:
+            if bg_var not in built:
+                continue
+            plot = _build(plot_type, plot_data, nothing_string, nothing_string)
+            try:
+                plot_type.condition_plot(
+                    plot,
+                    **plot_kwargs(plot_data),
+                    bg_var=bg_var,
+                    nothing_string=nothing_string,
+                )
+            except Exception as e:
+                problems.append(f"Conditioning on {bg_var} failed: {e!r}")
+                continue
+            if _normalize(plot) != _normalize(built[bg_var]):
+                problems.append(
+                    f"Conditioning on {bg_var} differs from building the plot for it."
+                )
+    return problems
+
+
+def check_entry_points():
+    """Register a failing and a working entry point.
+
+    The working entry point registers the module of the built-in barplot under its
+    name. The built-in barplot is registered again afterwards.
+
+    Returns:
+        list: Descriptions of the problems. Empty if the failing entry point was
+            skipped and the working one was registered.
+
+    """
+    barplot = get_plot_type("barplot")
+    entry_points = [
+        EntryPoint("broken", "utilities.dashboard.missing_module", ENTRY_POINT_GROUP),
+        EntryPoint("barplot", barplot.module.__name__, ENTRY_POINT_GROUP),
+    ]
+    # the failure is expected, so it is not logged
+    logger = logging.getLogger(register_entry_points.__module__)
+    disabled, logger.disabled = logger.disabled, True
+    try:
+        skipped = register_entry_points(entry_points)
+    except Exception as e:
+        return [f"Registering the entry points raised {type(e).__name__}: {e}"]
+    finally:
+        logger.disabled = disabled
+        register_plot_type(barplot.name, barplot.module, barplot.capabilities)
+
+    problems = []
+    if list(skipped) != ["broken"]:
+        problems.append(f"Expected to skip the broken entry point, skipped {skipped}.")
+    if "broken" in plot_types():
+        problems.append("The broken entry point was registered.")
+    return problems
+
+
+def format_check_results(results):
+    lines = []
+    for name, res in results.items():
+        if not res["groups"]:
+            lines.append(f"{name}: no groups in the synthetic data, not checked")
+        elif res["problems"]:
+            lines.append(f"{name}: {len(res['problems'])} problems")
+            lines += [f"  {problem}" for problem in res["problems"]]
+        else:
+            lines.append(f"{name}: ok ({len(res['groups'])} groups)")
+    return "\n".join(lines)
+
+
+def _build(plot_type, data, bg_var, nothing_string):
+    data = plot_kwargs(data)
+    plot = plot_type.setup_plot(**data, bg_var=bg_var, nothing_string=nothing_string)
+    plot_type.condition_plot(plot, **data, bg_var=bg_var, nothing_string=nothing_string)
+    return plot
+
+
+def _normalize(value, seen=None):
+    """Convert models to nested tuples of their properties, independent of ids.
+
+    A model that was converted before is replaced by its position in the traversal,
+    so shared models and cycles are compared by their structure.
+
+    """
+    seen = {} if seen is None else seen
+    if isinstance(value, Model):
+        if value.id in seen:
+            return ("ref", seen[value.id])
+        seen[value.id] = len(seen)
+        props = value.properties_with_values(include_defaults=True)
+        return (
+            type(value).__name__,
+            tuple(
+                (key, _normalize(props[key], seen))
+                for key in sorted(props)
+                if key not in ("id", "name")
+            ),
+        )
+    elif isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return tuple((k, _normalize(v, seen)) for k, v in items)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_normalize(v, seen) for v in value)
+    elif isinstance(value, np.ndarray):
+        return ("array", value.dtype.str, value.tolist())
+    return value
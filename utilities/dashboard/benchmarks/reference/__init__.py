@@ -0,0 +1,14 @@
+"""Frozen reference engines of the dashboard data preparation.
+
+The modules are copies of the data preparation of ``general_barplot``,
+``share_cube``, ``distplot``, ``lineplot`` and ``boxplot`` at the time the
+equivalence checks were added, and of the merge of the background data, which the
+join of ``--low_memory`` builds has to reproduce. The dashboard shows whatever numbers these paths
+produce, so ``run_equivalence_checks.py`` compares the current implementations, or
+any other candidate, against these copies on randomized data.
+
+Do not optimize or fix these modules. If the dashboard data is meant to change,
+change the implementation in the component and update the copy in the same commit,
+so that the change is reviewed as a change of the results.
+
+"""
@@ -0,0 +1,17 @@
+"""Frozen copy of the merge of the background data in the default build."""
+
+
+def merge_background(data, bg_data):
+    """Merge bg_data on the first index level of data, like ``_load_liss_data``.
+
+    Args:
+        data (pd.DataFrame): Raw LISS dataset with the person id as first index level.
+        bg_data (pd.DataFrame): Background data indexed by the person id.
+
+    Returns:
+        pd.DataFrame: The merged dataset.
+
+    """
+    bg_data["id"] = bg_data.index
+    data["id"] = data.index.get_level_values(0)
+    return data.merge(bg_data, how="left", on="id")
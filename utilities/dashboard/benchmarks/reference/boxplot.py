@@ -0,0 +1,207 @@
+"""Frozen copy of the data preparation of ``boxplot``."""
+import copy
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+def _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var):
+    """Pre-process data.
+
+     Args:
+        data (pandas.DataFrame): Raw dataset.
+        bg_vars_1 (list): List of main background variables.
+        bg_var_2 (str): Secondary background variable.
+        outcomes (list): Outcome variables.
+        sample_var (str): Variable that divides the dataset into samples
+
+    Returns
+        pd.DataFrame: Formatted dataset.
+    """
+
+    data_copy = copy.deepcopy(data)
+
+    data_copy.reset_index(level=["month", "child_id"], inplace=True)
+
+    data_copy = data_copy[(data_copy["single_parent"] == 0)]
+
+    data_copy["covid"] = np.select(
+        condlist=[
+            data_copy["month"] <= "2020-02-29",
+            data_copy["month"] > "2020-02-29",
+        ],
+        choicelist=["pre", "post"],
+        default=np.nan,
+    )
+
+    data_copy["work_perc_home_cat"] = np.select(
+        condlist=[data_copy["gender"] == "female", data_copy["gender"] == "male"],
+        choicelist=[
+            data_copy["work_perc_home_cat_mother"],
+            data_copy["work_perc_home_cat_father"],
+        ],
+        default=np.nan,
+    )
+
+    data_copy["work_status_family"] = np.select(
+        condlist=[
+            (
+                np.logical_or(
+                    data_copy["labor_force_coarse_father"] == "full-time",
+                    data_copy["labor_force_coarse_father"] == "part-time",
+                )
+                & np.logical_or(
+                    data_copy["labor_force_coarse_mother"] == "full-time",
+                    data_copy["labor_force_coarse_mother"] == "part-time",
+                )
+            ),
+            (
+                np.logical_or(
+                    data_copy["labor_force_coarse_father"] == "full-time",
+                    data_copy["labor_force_coarse_father"] == "part-time",
+                )
+                & (data_copy["labor_force_coarse_mother"] == "not working")
+            ),
+        ],
+        choicelist=["both work", "father works"],
+        default=np.nan,
+    )
+
+    data_copy["essential_worker_w2"] = data_copy["essential_worker_w2"].replace(
+        {1.0: "yes", 0.0: "no"}
+    )
+    data_copy["net_income_2y_equiv_q3"] = data_copy["net_income_2y_equiv_q3"].replace(
+        {1.0: "first", 2.0: "second", 3.0: "third"}
+    )
+
+    data_copy["relative_cc_gap"] = data_copy["cc_gap"] / (
+        data_copy["hours_cc_female"] + data_copy["hours_cc_male"]
+    )
+
+    data_copy = data_copy[
+        bg_vars_1 + [bg_var_2] + outcomes + [sample_var] + ["youngest_child"]
+    ]
+
+    return data_copy
+
+
+def compute_quantities(data, bg_var_1, bg_var_2, outcome):
+    """Compute data for boxplot, for one main background variable.
+
+    Args:
+        data (pd.DataFrame): Dataset.
+        bg_var_1 (str): Main background variable.
+        bg_var_2 (str): Secondary background variable.
+        outcome (str): Outcome variable.
+
+    Returns:
+        dict
+
+    """
+    # create temporary dict of quantiles
+    temp_dict = {"q25": 0.25, "q50": 0.5, "q75": 0.75}
+
+    # empty list where to store data
+    data_res = []
+
+    for key, val in temp_dict.items():
+
+        if bg_var_1 == "child_id":
+
+            # compute quantiles for (grouped) data
+            groups = data.groupby([bg_var_1, bg_var_2])
+            out = pd.Series.to_frame(groups[outcome].quantile(q=val).rename(key))
+
+        else:
+
+            data = data[(data["youngest_child"] == 1)]
+            # compute quantiles for (grouped) data
+            groups = data.groupby([bg_var_1, bg_var_2])
+            out = pd.Series.to_frame(groups[outcome].quantile(q=val).rename(key))
+
+        # store data
+        data_res.append(out)
+
+    # compute "upper" and "lower" extreme for boxplot stems
+    inter_quartile_range = data_res[2]["q75"] - data_res[0]["q25"]
+    upper = data_res[2]["q75"] + 1.5 * inter_quartile_range
+    lower = data_res[0]["q25"] - 1.5 * inter_quartile_range
+
+    # add "upper" and "lower" to data. The result is a list of pd.DataFrames
+    data_res.append(upper)
+    data_res.append(lower)
+
+    # concatenate pd.DataFrames
+    data_res_fin = pd.concat(data_res, axis=1).rename(columns={0: "upper", 1: "lower"})
+
+    # delete the raws that contains nan values
+    if data_res_fin.isnull().values.any():
+        c = data_res_fin.index.names
+        data_res_fin = data_res_fin.reset_index()
+        rows_with_nan = data_res_fin[data_res_fin.isna().any(axis=1)][
+            bg_var_1
+        ].to_list()
+        data_res_fin = data_res_fin[~data_res_fin[bg_var_1].isin(rows_with_nan)]
+        data_res_fin = data_res_fin.set_index(c)
+    else:
+        pass
+
+    # convert result to dictionary of results
+    key = (bg_var_1, bg_var_2)
+    index = data_res_fin.index.tolist()
+    # the quantities are sent to the browser as binary float32 arrays
+    quantities = {col: data_res_fin[col].to_numpy(np.float32) for col in data_res_fin}
+    res = {key: {"cats": index, "data": quantities, "order": [i[1] for i in index]}}
+
+    return res
+
+
+def process_data(data, bg_vars_1, bg_var_2, outcomes, sample_var, nice_names):
+    """Compute data for boxplot, for arbitrary number of main background variables.
+
+    Args:
+        data (pd.DataFrame): Dataset.
+        bg_vars_1 (list): List of main background variables.
+        bg_var_2 (str): Secondary background variable.
+        outcomes (list): Outcome variables.
+        sample_var (str): Variable that divides the dataset into samples
+        nice_names (dict): Dictionary mapping variables to nice names.
+
+    Returns:
+        dict
+
+    """
+
+    data = _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var)
+
+    tot_res = {}
+
+    for outcome in outcomes:
+        out_res = {}
+
+        all_res = {}
+        for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
+
+            res = compute_quantities(data, var_1, var_2, outcome)
+            all_res.update(res)
+
+        out_res["all"] = all_res
+
+        for s in data[sample_var]:
+
+            s_res = {}
+            s_data = data[data[sample_var] == s]
+
+            for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
+
+                res = compute_quantities(s_data, var_1, var_2, outcome)
+                s_res.update(res)
+
+            out_res[s] = s_res
+
+        tot_res[outcome] = out_res
+
+    tot_res["nice_names"] = nice_names
+
+    return tot_res
@@ -0,0 +1,193 @@
+"""Frozen copy of the data preparation of ``distplot``."""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_categorical_dtype
+from pandas.api.types import is_integer_dtype
+from pandas.api.types import is_numeric_dtype
+
+
+def prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string):
+    """Create data for a distplot.
+
+    Args:
+        data (pd.DataFrame): The dataset that contains variable and background_variables.
+        variables (list): List of variables whose distributions are visualized. Can be
+            categorical or numerical. If the dtype is categorical or integer, the individual
+            values of the distribution are plotted. Else, a kernel density estimate of the
+            distribution is plotted. If categorical, all variables need to have the same
+            Categories.
+        bg_vars (list): pd.Categorical variables with background characteristics.
+        nice_names (dict): Maps variables to nice_names
+        labels (dict): Maps variables to labels
+        nothing_string (str): name of the "Nothing" category in English
+
+
+    Returns:
+        dict: Dictionary containing the kde data. The keys are 'x' as well
+            as (variable, bg_value) for all such combinations.
+            The values for x are gridpoints. The values for all other keys
+            are kerne density estimates, scaled such that they can be drawn
+            on a categorical y axis. All values are float32 arrays.
+
+    """
+    data = data.copy()
+    variables = [variables] if not isinstance(variables, list) else variables
+    bg_vars = [] if bg_vars is None else bg_vars
+
+    _check_variables_have_same_dtype(data, variables)
+    for var in bg_vars:
+        assert is_categorical_dtype(data[var]), "bg_vars have to be categorical."
+
+    if is_categorical_dtype(data[variables[0]]):
+        vartype = "categorical"
+    elif is_integer_dtype(data[variables[0]]):
+        vartype = "integer"
+    elif is_numeric_dtype:
+        vartype = "float"
+    else:
+        raise ValueError("Variables must be categorical, integer or float")
+
+    if vartype == "categorical":
+        x_min_label = data[variables[0]].cat.categories[0]
+        x_max_label = data[variables[0]].cat.categories[-1]
+
+    for var in variables:
+        data[var] = _to_float(data[var])
+
+    # the non kde distribution is extended to hit zero outside of
+    # the support of the data.
+    x_min = data[variables].min().min()
+    x_max = data[variables].max().max()
+
+    x_range = x_max - x_min
+
+    ext_x_min = x_min - 0.05 * x_range
+    ext_x_max = x_max + 0.05 * x_range
+
+    if vartype == "float":
+        x = np.linspace(ext_x_min, ext_x_max, 100).tolist()
+    else:
+        x = [ext_x_min] + np.arange(x_min, x_max + 1).tolist() + [ext_x_max]
+
+    x_info = {
+        "x_min": x_min,
+        "x_max": x_max,
+        "ext_x_min": ext_x_min,
+        "ext_ex_max": ext_x_max,
+        "x_type": vartype,
+    }
+    if vartype == "categorical":
+        x_info["x_min_label"] = x_min_label
+        x_info["x_max_label"] = x_max_label
+
+    raw_dist_data = {"x": x}
+
+    if vartype == "float":
+        # scipy is only needed to build the data, not to serve the dashboard
+        from scipy.stats import gaussian_kde
+
+        for var in variables:
+            kde = gaussian_kde(data[var].dropna())(x).clip(0, np.inf)
+            raw_dist_data[(nice_names[var], "")] = kde.tolist()
+            for bg_var in bg_vars:
+                bg_values = data[bg_var].cat.categories
+                for val in bg_values:
+                    sr = data[data[bg_var] == val][var].dropna()
+                    raw_dist_data[(nice_names[var], val)] = gaussian_kde(sr)(x)
+    else:
+        to_concat = [pd.DataFrame(index=x)]
+        for var in variables:
+            to_concat.append(
+                data[var]
+                .value_counts(normalize=True)
+                .to_frame(name=(nice_names[var], ""))
+            )
+            for bg_var in bg_vars:
+                new_df = (
+                    data.groupby(bg_var)[var].value_counts(normalize=True).unstack().T
+                )
+                new_df.columns = [
+                    (nice_names[var], old_col) for old_col in new_df.columns
+                ]
+                to_concat.append(new_df)
+
+        df = pd.concat(to_concat, axis=1).fillna(0)
+        for col in df.columns:
+            raw_dist_data[col] = df[col].tolist()
+
+    observations = {}
+    for var in variables:
+        observations[(nice_names[var], "")] = data[var].notnull().sum()
+        for bg_var in bg_vars:
+            bg_values = data[bg_var].cat.categories
+            for val in bg_values:
+                sr = data[data[bg_var] == val][var]
+                observations[(nice_names[var], val)] = sr.notnull().sum()
+
+    nice_name_to_label = {}
+    for var in variables:
+        nice_name_to_label[nice_names[var]] = labels[var]
+
+    selectors = {}
+    selectors[nothing_string] = tuple(
+        [(nice_names[var], "") for var in variables][::-1]
+    )
+    for bg_var in bg_vars:
+        selected = data[bg_var].cat.categories.tolist()
+        col_list = [col for col in raw_dist_data.keys() if col != "x"]
+        selectors[nice_names[bg_var]] = [col for col in col_list if col[1] in selected][
+            ::-1
+        ]
+
+    dist_data = _prepare_dist_data_for_bokeh_patch(raw_dist_data, selectors)
+
+    res = {
+        "dist_data": dist_data,
+        "selectors": selectors,
+        "questions": nice_name_to_label,
+        "x_info": x_info,
+        "observations": observations,
+    }
+
+    return res
+
+
+def _prepare_dist_data_for_bokeh_patch(raw_dist_data, selectors):
+    dist_data = {}
+    for bg_var, selector in selectors.items():
+        max_entry = max([max(raw_dist_data[sel]) for sel in selector])
+        scaling_factor = 0.8 / max_entry
+        for sel in selector:
+            scaled = np.array(raw_dist_data[sel], dtype=np.float32) * scaling_factor
+            scaled[0] = 0
+            scaled[-1] = 0
+            dist_data[sel] = scaled
+
+    dist_data["x"] = np.array(raw_dist_data["x"], dtype=np.float32)
+    return dist_data
+
+
+def _to_float(sr):
+    if is_categorical_dtype(sr):
+        assert sr.cat.ordered, "Only ordered categoricals can be used in distplots."
+        res = sr.cat.codes.replace({-1: np.nan}).astype(float)
+    else:
+        res = sr.astype(float)
+    return res
+
+
+def _check_variables_have_same_dtype(data, variables):
+    """Check that variables have the same dtype.
+
+    For categorical variable this means that they have the
+    same categories.
+
+    Args:
+        data (pd.DataFrame):
+        variables (list):
+
+    """
+    dtype = data[variables[0]].dtype
+    for var in variables:
+        if data[var].dtype != dtype:
+            raise ValueError("Variables have to have the same dtype.")
@@ -0,0 +1,189 @@
+"""Frozen copy of the data preparation of ``general_barplot``."""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype
+from pandas.api.types import is_categorical_dtype
+from pandas.api.types import is_integer_dtype
+
+from utilities.dashboard.benchmarks.reference.share_cube import create_share_cube
+from utilities.dashboard.benchmarks.reference.share_cube import ShareCube
+from utilities.palettes import get_colors
+from utilities.palettes import map_colors
+
+NON_DATA_COLS = {"label", "Question", "color", "Observations"}
+
+
+def prepare_data(
+    data, variables, bg_vars, nice_names, labels, keep_last, nothing_string
+):
+    """Calculate shares of a categorical variable, conditional on bg_vars.
+
+    This data can be used for histograms, stacked barplots, etc.
+
+    The shares are derived from a share cube, which is returned as well. It allows
+    to derive shares for splits that were not precomputed, for example the
+    interaction of two background variables (see :func:`prepare_split_data`).
+
+    Args:
+        data (pd.DataFrame): The dataset that contains variable and background_variables.
+        variables (list): Names of apd.Categorical variables of which the shares are calculated.
+        bg_vars (list): pd.Categorical variables with background characteristics.
+        nice_names (dict): Maps variables to nice names
+        labels (dict): Maps variables to labels
+        keep_last (bool): Whether to plot the last category
+        nothing_string (str): name of the "Nothing" category
+
+    Returns:
+        dict: Dictionary containing shares, selectors and the share cube.
+            The shares are a dictionary that corresponds to a bokeh
+            ColumnDataSource with the following columns:
+            - label: (variable, "{bg_var}: {bg_value})"
+            - Question, color: Label and color of the variable
+            - Observations: int32 array with the number of observations
+            - One float32 array of shares per value the variable can take
+            The selectors are a dictionary  where the keys are background
+            variables and the values are lists of labels.
+            The cube is a dictionary as returned by
+            :func:`share_cube.create_share_cube`, labelled with nice names.
+
+    """
+    variables = variables if isinstance(variables, list) else [variables]
+    bg_vars = [] if bg_vars is None else bg_vars
+    _check_variables_have_same_dtype(data, variables)
+    data = _convert_variables_to_categorical(data[variables + bg_vars], variables)
+
+    cube = create_share_cube(data, variables, bg_vars)
+    cube["variables"] = [nice_names[var] for var in variables]
+    cube["bg_vars"] = [nice_names[bg_var] for bg_var in bg_vars]
+
+    order = cube["categories"] if keep_last else cube["categories"][:-1]
+    res = _shares_from_cube(
+        share_cube=ShareCube(**cube),
+        splits=[()] + [(bg_var,) for bg_var in cube["bg_vars"]],
+        questions=[labels[var] for var in variables],
+        colors=get_colors("categorical", len(variables)),
+        categories=order,
+        nothing_string=nothing_string,
+    )
+    res["cube"] = cube
+    return res
+
+
+def prepare_split_data(share_cube, shares, split, nothing_string):
+    """Derive shares and selectors for a split that was not precomputed.
+
+    Args:
+        share_cube (ShareCube): Share cube of the group.
+        shares (dict): The precomputed shares of the group. Questions, colors and
+            plotted categories are taken from them.
+        split (tuple): Nice names of one or two background variables.
+        nothing_string (str): name of the "Nothing" category
+
+    Returns:
+        dict: Dictionary containing shares and selectors, see :func:`prepare_data`.
+            The selector of the split is stored under :func:`split_name`.
+
+    """
+    first_rows = [shares["label"].index((var, "")) for var in share_cube.variables]
+    return _shares_from_cube(
+        share_cube=share_cube,
+        splits=[(), tuple(split)],
+        questions=[shares["Question"][i] for i in first_rows],
+        colors=[shares["color"][i] for i in first_rows],
+        categories=[cat for cat in shares if cat not in NON_DATA_COLS],
+        nothing_string=nothing_string,
+    )
+
+
+def split_name(split):
+    """Name of the selector of a split of one or more background variables."""
+    return " & ".join(split)
+
+
+def _shares_from_cube(
+    share_cube, splits, questions, colors, categories, nothing_string
+):
+    keep = [share_cube.categories.index(cat) for cat in categories]
+    cells = {split: [", ".join(c) for c in share_cube.cells(split)] for split in splits}
+
+    share_dict = {"label": [], "Question": []}
+    # numeric columns are collected as arrays and sent to the browser in binary
+    color_codes = []
+    observation_blocks = []
+    share_blocks = {cat: [] for cat in categories}
+    for i, var in enumerate(share_cube.variables):
+        for split in splits:
+            shares, observations = share_cube.shares(split)
+            n_cells = len(cells[split])
+            share_dict["label"] += [(var, cell) for cell in cells[split]]
+            share_dict["Question"] += [questions[i]] * n_cells
+            color_codes.append(np.full(n_cells, i))
+            observation_blocks.append(observations[i].ravel())
+            var_shares = shares[i].reshape(len(share_cube.categories), n_cells)
+            for cat, k in zip(categories, keep):
+                share_blocks[cat].append(var_shares[k])
+
+    share_dict["color"] = map_colors(np.concatenate(color_codes), colors).tolist()
+    share_dict["Observations"] = np.concatenate(observation_blocks).astype(np.int32)
+    for cat, blocks in share_blocks.items():
+        share_dict[cat] = np.concatenate(blocks).astype(np.float32)
+
+    selectors = {}
+    selectors[nothing_string] = tuple([(var, "") for var in share_cube.variables][::-1])
+    for split in splits[1:]:
+        observed = {", ".join(c) for c in share_cube.observed_cells(split)}
+        selectors[split_name(split)] = tuple(
+            [
+                (var, cell)
+                for var in share_cube.variables
+                for cell in cells[split]
+                if cell in observed
+            ][::-1]
+        )
+    return {"shares": share_dict, "selectors": selectors}
+
+
+def _check_variables_have_same_dtype(data, variables):
+    """Check that variables have the same dtype.
+
+    For categorical variable this means that they have the
+    same categories.
+
+    Args:
+        data (pd.DataFrame):
+        variables (list):
+
+    """
+    dtype = data[variables[0]].dtype
+    for var in variables:
+        if data[var].dtype != dtype:
+            raise ValueError(
+                f"Variables have to have the same dtype. Not the case for {var}"
+            )
+
+
+def _convert_variables_to_categorical(data, variables):
+    """Convert variables to Categorical dtype with string labels.
+
+    This needs much more work
+
+    """
+    data = data.copy()
+    for var in variables:
+        if is_bool_dtype(data[var]):
+            data[var] = pd.Categorical(
+                data[var], categories=[True, False], ordered=True
+            )
+            data[var] = data[var].cat.rename_categories({False: "False", True: "True"})
+        elif is_integer_dtype(data[var]):
+            # data[var] = pd.Categorical(data[var], categories=sorted(data[var].unique()), ordered=True)
+            pass
+        elif is_categorical_dtype(data[var]):
+            cat_index = data[var].dtype.categories
+            if is_integer_dtype(cat_index):
+                to_str = {cat: str(cat) for cat in cat_index}
+                data[var] = data[var].cat.rename_categories(to_str)
+        else:
+            raise ValueError(f"{var}: {data[var].dtype} is not supported.")
+
+    return data
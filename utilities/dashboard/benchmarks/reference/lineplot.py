@@ -0,0 +1,144 @@
+"""Frozen copy of the data preparation of ``lineplot``."""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+def prepare_data(data, period, variables, bg_vars, nice_names, language):
+    """Prepare the run chart data.
+
+    Args:
+        data (pandas.DataFrame): A (relatively) raw dataset on which
+            the points that will form the line plot will be computed.
+        period (string): Name of time period column. The time period
+            column needs to be in datetime format.
+        variables (list): List of outcome variables.
+        bg_vars (list): List of background variables by which the sample can be
+            splitted.
+        nice_names (dict): Dictionary mapping variables to nice names.
+        language (string): german or english
+
+    Returns:
+        dict: A dictionary that contains all the possible lineplot points as
+            float32 arrays.
+
+    """
+    data = _preprocess_data(data, variables, bg_vars, period=[period])
+
+    res = {"data": {}, "selectors": {}, "bounds": {}}
+
+    for var, bg_var in itertools.product(variables, bg_vars):
+        # add data to the result dictionary
+        if bg_var != "None":
+            new = data.groupby([period, bg_var])[var].mean().unstack()
+            new = {
+                (var, col, bg_var): new[col].to_numpy(np.float32) for col in new.columns
+            }
+
+        else:
+            means = data.groupby(period)[var].mean()
+            new = {(var, None, None): means.to_numpy(np.float32)}
+
+        res["data"].update(new)
+
+        periods = sorted(data[period].unique())
+        periods = [pd.to_datetime(period) for period in periods]
+        periods = [period.strftime("%b %Y") for period in periods]
+        if language != "german":
+            periods[0] = "Pre-CoVid 19"
+        else:
+            periods[0] = "Vor-CoVid 19"
+            periods[1] = "März 2020"
+            periods[3] = "Mai 2020"
+        res["data"]["period"] = periods
+
+        # add selectors to the result dictionary
+        if bg_var != "None":
+            bg_vals = data[bg_var].dropna().unique().tolist()
+            selectors = [(var, val) for val in bg_vals]
+        else:
+            selectors = [(var, bg_var)]
+        res["selectors"][(var, bg_var)] = selectors
+
+    # add y-axis bounds, collecting the lines of each variable in one pass
+    lines = {}
+    for key, values in res["data"].items():
+        if key != "period":
+            lines.setdefault(key[0], []).append(values)
+    for var in variables:
+        ylim_min, ylim_max = _compute_ylim(lines[var])
+        res["bounds"][(var, "min_outcome")] = ylim_min
+        res["bounds"][(var, "max_outcome")] = ylim_max
+
+    # add nice names and labels
+    res["nice_names"] = nice_names
+
+    return res
+
+
+def _compute_ylim(arrays):
+    """Compute limits of y-axis, given the lines of an outcome variable."""
+    l = np.concatenate(arrays)
+    ylim_max = float(np.nanmax(l))
+    ylim_min = float(np.nanmin(l))
+
+    padding = 0.1 * (ylim_max - ylim_min)
+
+    return ylim_min - padding, ylim_max + padding
+
+
+def _preprocess_data(df, outcome_vars, bg_vars, period):
+    """Pre-process data (mostly data restrictions and renaming
+    problematic categories).
+
+     Args:
+        df (pandas.DataFrame): Raw dataset.
+        outcome_vars (list): List of outcome variables.
+        bg_vars (list): List of background variables by which we want to
+            split the sample.
+        period (list): List containing name of time period column.
+
+    Returns
+        pd.DataFrame: Formatted dataset.
+
+    """
+    df = df.reset_index(level="month")
+    df = df[df["month"] != "2019-11-01"]
+    df = df[(df.age <= 66) & (df.age >= 18) & (df.max_hours_total >= 10)]
+    _bg_vars = bg_vars.copy()
+    _bg_vars.remove("None")
+    df = df[outcome_vars + _bg_vars + period]
+
+    # rename problematic categories
+    df["parttime_baseline_covid"] = np.select(
+        condlist=[
+            df["parttime_baseline_covid"] == 1.0,
+            df["parttime_baseline_covid"] == 0.0,
+        ],
+        choicelist=["parttime", "not_parttime"],
+        default=np.nan,
+    )
+
+    df["essential_worker_w2"] = np.select(
+        condlist=[df["essential_worker_w2"] == 1.0, df["essential_worker_w2"] == 0.0],
+        choicelist=["essential_worker", "not_essential_worker"],
+        default=np.nan,
+    )
+
+    df["self_employed_baseline"] = np.select(
+        condlist=[
+            df["self_employed_baseline"] == 1.0,
+            df["self_employed_baseline"] == 0.0,
+        ],
+        choicelist=["self_employed", "employee"],
+        default=np.nan,
+    )
+
+    # Need to do this because of a bug, otherwise nans will be casted as strings:
+    # https://github.com/pandas-dev/pandas/issues/25353
+    df["parttime_baseline_covid"] = df["parttime_baseline_covid"].replace("nan", np.nan)
+    df["self_employed_baseline"] = df["self_employed_baseline"].replace("nan", np.nan)
+    df["essential_worker_w2"] = df["essential_worker_w2"].replace("nan", np.nan)
+
+    return df
@@ -0,0 +1,139 @@
+"""Integer-coded count cubes from which conditional shares are derived.
+
+A share cube stores the number of observations for every combination of variable,
+category and background categories of a group of variables. Shares conditional on
+zero, one or two background variables are obtained by summing over the remaining
+axes, so new splits do not require another pass over the data.
+
+"""
+import itertools
+from functools import lru_cache
+
+import numpy as np
+from pandas.api.types import is_categorical_dtype
+
+SHARE_CACHE_SIZE = 32
+
+
+def create_share_cube(data, variables, bg_vars):
+    """Count observations over variables, categories and background categories.
+
+    The last slot of the category axis and of each background axis counts the
+    missing values. Keeping them allows to reproduce unconditional shares, which
+    also use observations with missing background information.
+
+    Args:
+        data (pd.DataFrame): The dataset that contains variables and bg_vars.
+        variables (list): pd.Categorical variables with the same categories.
+        bg_vars (list): pd.Categorical variables with background characteristics.
+
+    Returns:
+        dict: Dictionary with the following entries:
+            - "counts": np.ndarray of shape (n_vars, n_cats + 1, *(n_bg_cats + 1))
+            - "variables": list of variables
+            - "categories": list of category labels as strings
+            - "bg_vars": list of background variables
+            - "bg_categories": list with one list of category labels per bg_var
+
+    """
+    for var in variables + bg_vars:
+        assert is_categorical_dtype(data[var]), f"{var} has to be categorical."
+
+    categories = [str(cat) for cat in data[variables[0]].cat.categories]
+    bg_categories = [[str(cat) for cat in data[b].cat.categories] for b in bg_vars]
+    bg_shape = tuple(len(cats) + 1 for cats in bg_categories)
+    n_bg_cells = int(np.prod(bg_shape))
+
+    if bg_vars:
+        bg_codes = [_codes_with_missing_last(data[b]) for b in bg_vars]
+        bg_flat = np.ravel_multi_index(bg_codes, bg_shape)
+    else:
+        bg_flat = np.zeros(len(data), dtype=np.int64)
+
+    n_slots = len(categories) + 1
+    dtype = np.min_scalar_type(len(data))
+    counts = np.empty((len(variables), n_slots, n_bg_cells), dtype=dtype)
+    for i, var in enumerate(variables):
+        flat = _codes_with_missing_last(data[var]) * n_bg_cells + bg_flat
+        counts[i] = np.bincount(flat, minlength=n_slots * n_bg_cells).reshape(
+            n_slots, n_bg_cells
+        )
+
+    return {
+        "counts": counts.reshape((len(variables), n_slots) + bg_shape),
+        "variables": list(variables),
+        "categories": categories,
+        "bg_vars": list(bg_vars),
+        "bg_categories": bg_categories,
+    }
+
+
+def _codes_with_missing_last(sr):
+    codes = sr.cat.codes.to_numpy().astype(np.int64)
+    codes[codes == -1] = len(sr.cat.categories)
+    return codes
+
+
+class ShareCube:
+    """Derive conditional shares from a share cube with a LRU cache.
+
+    Args:
+        counts (np.ndarray): Counts as returned by :func:`create_share_cube`.
+        variables (list): Labels of the variable axis.
+        categories (list): Labels of the category axis.
+        bg_vars (list): Labels of the background axes.
+        bg_categories (list): Category labels of each background axis.
+
+    """
+
+    def __init__(self, counts, variables, categories, bg_vars, bg_categories):
+        self.counts = counts
+        self.variables = variables
+        self.categories = categories
+        self.bg_vars = bg_vars
+        self.bg_categories = dict(zip(bg_vars, bg_categories))
+        self.shares = lru_cache(maxsize=SHARE_CACHE_SIZE)(self._shares)
+        self.observed_cells = lru_cache(maxsize=SHARE_CACHE_SIZE)(self._observed_cells)
+
+    def cells(self, split):
+        """Return all combinations of categories of split in the order of the cube."""
+        return list(itertools.product(*[self.bg_categories[b] for b in split]))
+
+    def _reduce(self, split):
+        """Sum out all background axes that are not in split, in split order."""
+        axes = [2 + self.bg_vars.index(bg_var) for bg_var in split]
+        to_sum = tuple(ax for ax in range(2, self.counts.ndim) if ax not in axes)
+        # sum in int64 to avoid overflow of the compact storage dtype
+        reduced = self.counts.sum(axis=to_sum, dtype=np.int64)
+        order = sorted(range(len(split)), key=lambda i: axes[i])
+        return np.moveaxis(reduced, range(2, 2 + len(split)), [2 + i for i in order])
+
+    def _shares(self, split):
+        """Compute shares and number of observations conditional on split.
+
+        Args:
+            split (tuple): Zero, one or two background variables.
+
+        Returns:
+            tuple: Shares of shape (n_vars, n_cats, *split_dims) and observations
+                of shape (n_vars, *split_dims). Cells without observations have
+                shares of zero. Both arrays are read-only.
+
+        """
+        reduced = self._reduce(split)
+        # drop the missing slot of every background axis in the split
+        reduced = reduced[(slice(None), slice(None)) + (slice(0, -1),) * len(split)]
+        valid = reduced[:, :-1]
+        observations = valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = valid / np.expand_dims(observations, 1)
+        shares = np.nan_to_num(shares)
+        shares.setflags(write=False)
+        observations.setflags(write=False)
+        return shares, observations
+
+    def _observed_cells(self, split):
+        """Return the combinations of categories of split that occur in the data."""
+        totals = self._reduce(split).sum(axis=(0, 1))
+        seen = totals[(slice(0, -1),) * len(split)].ravel() > 0
+        return tuple(cell for cell, s in zip(self.cells(split), seen) if s)
@@ -0,0 +1,400 @@
+"""Benchmarks of the dashboard data preparation and plot setup on synthetic data.
+
+Each benchmark is a function that receives the benchmark configuration and
+returns a pair ``(func, make_kwargs)``. Only ``func(**make_kwargs())`` is timed,
+so ``make_kwargs`` can copy inputs that ``func`` modifies in place.
+
+Results are compared against a stored baseline with :func:`compare_to_baseline`.
+
+"""
+import json
+import platform
+import statistics
+import time
+from functools import lru_cache
+
+from pandas.api.types import is_bool_dtype
+
+from utilities.dashboard.benchmarks.synthetic_data import create_child_data
+from utilities.dashboard.benchmarks.synthetic_data import create_univariate_data
+from utilities.dashboard.benchmarks.synthetic_data import create_waves_data
+from utilities.dashboard.benchmarks.synthetic_data import read_descriptions
+from utilities.dashboard.components.boxplots import boxplot
+from utilities.dashboard.components.run_charts import lineplot
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    get_plot_type,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    plot_kwargs,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    plot_types,
+)
+from utilities.dashboard.create_description_table import create_description_table
+from utilities.dashboard.schema import infer_schema
+from utilities.dashboard.shared import create_general_variable_mappings
+from utilities.dashboard.shared import get_menu_labels
+from utilities.dashboard.store import BoxplotsStore
+from utilities.dashboard.store import RunChartsStore
+
+DEFAULT_CONFIG = {
+    "n_rows": 5500,
+    "n_categories": 5,
+    "n_bg_categories": 3,
+    "language": "english",
+    "seed": 0,
+}
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark under name."""
+
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def run_benchmarks(config, names=None, repeat=5):
+    """Time the benchmarks.
+
+    Args:
+        config (dict): Configuration of the synthetic data, see DEFAULT_CONFIG.
+        names (list): Names of the benchmarks to run. Default is all.
+        repeat (int): Number of timed repetitions of each benchmark.
+
+    Returns:
+        dict: Maps benchmark names to dicts with the minimum and the median of
+            the timings in seconds.
+
+    """
+    names = list(BENCHMARKS) if names is None else names
+    frozen = tuple(sorted(config.items()))
+    results = {}
+    for name in names:
+        func, make_kwargs = BENCHMARKS[name](frozen)
+        timings = []
+        for _ in range(repeat):
+            kwargs = make_kwargs()
+            start = time.perf_counter()
+            func(**kwargs)
+            timings.append(time.perf_counter() - start)
+        results[name] = {"min": min(timings), "median": statistics.median(timings)}
+    return results
+
+
+def save_baseline(path, config, results):
+    baseline = {
+        "config": config,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Compare the fastest timings to those of a baseline.
+
+    Args:
+        results (dict): As returned by :func:`run_benchmarks`.
+        baseline (dict): As stored by :func:`save_baseline`.
+        threshold (float): Relative slowdown above which a benchmark counts as a
+            regression, e.g. 0.2 for 20%.
+
+    Returns:
+        dict: Maps benchmark names to dicts with the entries "baseline", "ratio"
+            and "regression". Benchmarks without a baseline are skipped.
+
+    """
+    comparison = {}
+    for name, res in results.items():
+        if name in baseline["results"]:
+            old = baseline["results"][name]["min"]
+            ratio = res["min"] / old if old > 0 else float("inf")
+            comparison[name] = {
+                "baseline": old,
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+    return comparison
+
+
+def format_results(results, comparison=None):
+    comparison = {} if comparison is None else comparison
+    width = max([len(name) for name in results] + [9])
+    header = (
+        f"{'benchmark':{width}}  {'min [s]':>9}  {'median [s]':>10}  {'baseline':>9}"
+    )
+    lines = [header, "-" * (len(header) + 12)]
+    for name, res in results.items():
+        line = f"{name:{width}}  {res['min']:9.4f}  {res['median']:10.4f}"
+        if name in comparison:
+            comp = comparison[name]
+            flag = "  REGRESSION" if comp["regression"] else ""
+            line += f"  {comp['baseline']:9.4f}  x{comp['ratio']:.2f}{flag}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+# ======================================================================================
+# inputs
+# ======================================================================================
+
+
+@lru_cache(maxsize=None)
+def univariate_inputs(config):
+    """Create the synthetic data and metadata of the univariate distributions.
+
+    Args:
+        config (tuple): Sorted items of a configuration, see DEFAULT_CONFIG.
+
+    Returns:
+        dict: The data, the background variables, the variable mappings, the
+            groups of each plot type and the name of the "Nothing" category.
+
+    """
+    config = dict(config)
+    language = config["language"]
+    descriptions = read_descriptions()
+    data = create_univariate_data(
+        n_rows=config["n_rows"],
+        n_categories=config["n_categories"],
+        n_bg_categories=config["n_bg_categories"],
+        seed=config["seed"],
+    )
+    group_info = descriptions["group_info"]
+    group_info = group_info[group_info[f"group_{language}"].notnull()]
+    desc = create_description_table(
+        raw_desc=descriptions["data_desc"],
+        background_table=descriptions["bg_desc"],
+        group_info=group_info,
+        data=data,
+        language=language,
+    )
+    vm = create_general_variable_mappings(
+        data=data,
+        language=language,
+        data_name="liss",
+        data_desc=desc,
+        group_info=group_info,
+    )
+    group_to_plot_type = group_info.set_index(f"group_{language}")[
+        "plot_type"
+    ].to_dict()
+    plot_type_to_groups = {}
+    for group in vm["group_to_variables"]:
+        plot_type = group_to_plot_type.get(group)
+        if plot_type in plot_types():
+            plot_type_to_groups.setdefault(plot_type, []).append(group)
+
+    bg_vars = vm["group_to_variables"]["Background Overview"]
+    return {
+        "data": data,
+        "bg_vars": [bg_var for bg_var in bg_vars if bg_var != "prov"],
+        "variable_mappings": vm,
+        "plot_type_to_groups": plot_type_to_groups,
+        "nothing_string": get_menu_labels(language)["nothing_category"],
+    }
+
+
+@lru_cache(maxsize=None)
+def _univariate_plot_data(config, plot_type):
+    inputs = univariate_inputs(config)
+    return {
+        group: plot_kwargs(prepare_group(inputs, plot_type, group))
+        for group in inputs["plot_type_to_groups"].get(plot_type, [])
+    }
+
+
+def prepare_group(inputs, plot_type, group):
+    """Prepare the plot data of a group of the synthetic data with a plot type."""
+    vm = inputs["variable_mappings"]
+    return get_plot_type(plot_type).prepare_data(
+        data=inputs["data"],
+        variables=vm["group_to_variables"][group],
+        bg_vars=inputs["bg_vars"],
+        nice_names=vm["variable_to_nice_name"],
+        labels=vm["variable_to_label"],
+        nothing_string=inputs["nothing_string"],
+    )
+
+
+@lru_cache(maxsize=None)
+def run_charts_inputs(config):
+    """Create the synthetic waves data and the arguments of the run charts."""
+    config = dict(config)
+    desc = read_descriptions()["run_charts_desc"]
+    data = create_waves_data(n_rows=config["n_rows"], seed=config["seed"])
+    vm = create_general_variable_mappings(
+        data=data, language=config["language"], data_name="liss", run_charts_desc=desc
+    )
+    kwargs = {
+        "period": "month",
+        "variables": vm["outcome_variables"],
+        "bg_vars": vm["background_variables"],
+        "nice_names": vm["nice_names_run_charts"],
+        "language": config["language"],
+    }
+    return data, kwargs
+
+
+@lru_cache(maxsize=None)
+def boxplots_inputs(config):
+    """Create the synthetic child data and the arguments of the boxplots."""
+    config = dict(config)
+    desc = read_descriptions()["boxplots_desc"]
+    data = create_child_data(n_rows=config["n_rows"], seed=config["seed"])
+    vm = create_general_variable_mappings(
+        data=data, language=config["language"], data_name="liss", boxplots_desc=desc
+    )
+    kwargs = {
+        "bg_vars_1": vm["background_variables"],
+        "bg_var_2": vm["secondary_background_variable"],
+        "outcomes": vm["outcome_variables"],
+        "sample_var": vm["sample_variable"],
+        "nice_names": vm["nice_names_boxplots"],
+    }
+    return data, kwargs
+
+
+# ======================================================================================
+# benchmarks
+# ======================================================================================
+
+
+def _prepare_univariate_benchmark(plot_type):
+    def prepare_all_groups(inputs):
+        for group in inputs["plot_type_to_groups"].get(plot_type, []):
+            prepare_group(inputs, plot_type, group)
+
+    def bench(config):
+        inputs = univariate_inputs(config)
+        return prepare_all_groups, lambda: {"inputs": inputs}
+
+    return bench
+
+
+def _setup_univariate_benchmark(plot_type):
+    def setup_all_plots(plot_data, nothing_string):
+        for group_data in plot_data.values():
+            get_plot_type(plot_type).setup_plot(
+                **group_data, bg_var=nothing_string, nothing_string=nothing_string
+            )
+
+    def bench(config):
+        kwargs = {
+            "plot_data": _univariate_plot_data(config, plot_type),
+            "nothing_string": univariate_inputs(config)["nothing_string"],
+        }
+        return setup_all_plots, lambda: kwargs
+
+    return bench
+
+
+def _condition_univariate_benchmark(plot_type):
+    def condition_all_plots(plots, bg_vars, nothing_string):
+        condition_plot = get_plot_type(plot_type).condition_plot
+        for group_data, plot in plots:
+            for bg_var in bg_vars:
+                condition_plot(
+                    plot, **group_data, bg_var=bg_var, nothing_string=nothing_string
+                )
+
+    def bench(config):
+        inputs = univariate_inputs(config)
+        nothing_string = inputs["nothing_string"]
+        nice_names = inputs["variable_mappings"]["variable_to_nice_name"]
+        # every split and back to the unconditional plot
+        bg_vars = [nice_names[var] for var in inputs["bg_vars"]] + [nothing_string]
+        plot_data = _univariate_plot_data(config, plot_type)
+        setup_plot = get_plot_type(plot_type).setup_plot
+
+        def make_kwargs():
+            plots = [
+                (
+                    group_data,
+                    setup_plot(
+                        **group_data,
+                        bg_var=nothing_string,
+                        nothing_string=nothing_string,
+                    ),
+                )
+                for group_data in plot_data.values()
+            ]
+            return {
+                "plots": plots,
+                "bg_vars": bg_vars,
+                "nothing_string": nothing_string,
+            }
+
+        return condition_all_plots, make_kwargs
+
+    return bench
+
+
+# every registered plot type, including those of entry points, is benchmarked
+for _name, _plot_type in plot_types().items():
+    benchmark(f"{_name}.prepare_data")(_prepare_univariate_benchmark(_name))
+    benchmark(f"{_name}.setup_plot")(_setup_univariate_benchmark(_name))
+    if _plot_type.incremental:
+        benchmark(f"{_name}.condition_plot")(_condition_univariate_benchmark(_name))
+
+
+@benchmark("lineplot.prepare_data")
+def _lineplot_prepare_data(config):
+    data, kwargs = run_charts_inputs(config)
+    # prepare_data resets the index of data in place
+    return lineplot.prepare_data, lambda: {"data": data.copy(), **kwargs}
+
+
+@benchmark("lineplot.setup_plot")
+def _lineplot_setup_plot(config):
+    data, kwargs = run_charts_inputs(config)
+    res = lineplot.prepare_data(data=data.copy(), **kwargs)
+    setup_kwargs = {
+        "store": RunChartsStore(res),
+        "variable": kwargs["variables"][0],
+        "bg_var": kwargs["bg_vars"][0],
+        "language": kwargs["language"],
+    }
+    return lineplot.setup_plot, lambda: setup_kwargs
+
+
+@benchmark("boxplot.process_data")
+def _boxplot_process_data(config):
+    data, kwargs = boxplots_inputs(config)
+    return boxplot.process_data, lambda: {"data": data, **kwargs}
+
+
+@benchmark("boxplot.setup_plot")
+def _boxplot_setup_plot(config):
+    data, kwargs = boxplots_inputs(config)
+    res = boxplot.process_data(data=data, **kwargs)
+    setup_kwargs = {
+        "store": BoxplotsStore(res),
+        "bg_var_1": kwargs["bg_vars_1"][0],
+        "bg_var_2": kwargs["bg_var_2"],
+        "outcome": kwargs["outcomes"][0],
+        "sample": "all",
+        "language": dict(config)["language"],
+    }
+    return boxplot.setup_plot, lambda: setup_kwargs
+
+
+@benchmark("schema.infer_schema")
+def _infer_schema(config):
+    data = univariate_inputs(config)["data"]
+    # the source data stores the boolean variables as floats with values 0 and 1
+    bools = [col for col, dtype in data.dtypes.items() if is_bool_dtype(dtype)]
+    raw = data.astype({col: float for col in bools})
+    return infer_schema, lambda: {"data": raw}
@@ -0,0 +1,323 @@
+"""Synthetic datasets with the schema of the LISS data used by the dashboard.
+
+The generators read the description tables in ``utilities/dashboard/liss`` and
+create random data for every variable they describe. Row counts and category
+cardinalities are configurable, so the dashboard build can be run and measured
+without access to the real LISS files.
+
+- :func:`create_univariate_data` returns data as produced by ``prepare_liss_data``
+  for the univariate distributions tabs.
+- :func:`create_waves_data` returns raw data for the run charts tab, like
+  ``liss_all_waves_data.pickle``.
+- :func:`create_child_data` returns raw data for the boxplots tab, like
+  ``child-long.parquet``.
+
+:func:`write_synthetic_dashboard_data` builds the dashboard data of all tabs from
+these datasets, so that the app can be served without the LISS files.
+
+"""
+import numpy as np
+import pandas as pd
+
+from utilities.dashboard.artifacts import write_artifact
+from utilities.dashboard.artifacts import write_manifest
+from utilities.dashboard.components.run_charts.create_data import (
+    write_run_charts_panel,
+)
+from utilities.dashboard.config import DASHBOARD_ROOT
+from utilities.dashboard.create_dashboard_data import create_dashboard_data
+from utilities.dashboard.create_description_table import create_description_table
+
+LISS_DIR = DASHBOARD_ROOT / "liss"
+
+# background variables of the run charts that are stored as 1.0 / 0.0 floats
+BINARY_RUN_CHART_VARS = [
+    "essential_worker_w2",
+    "parttime_baseline_covid",
+    "self_employed_baseline",
+]
+
+
+def read_descriptions(april=False):
+    """Read the description tables of the LISS data.
+
+    Args:
+        april (bool): Whether to read the tables of the April wave.
+
+    Returns:
+        dict: Dictionary with the entries "data_desc", "group_info", "bg_desc",
+            "run_charts_desc" and "boxplots_desc".
+
+    """
+    suffix = "_april" if april else ""
+    return {
+        "data_desc": pd.read_csv(
+            LISS_DIR / f"data_description{suffix}.csv", sep=";", encoding="utf8"
+        ),
+        "group_info": pd.read_csv(
+            LISS_DIR / f"group_info{suffix}.csv", sep=";", encoding="utf8"
+        ),
+        "bg_desc": pd.read_csv(
+            LISS_DIR / "background_variables.csv", sep=";", encoding="utf8"
+        ),
+        "run_charts_desc": pd.read_csv(
+            LISS_DIR / "run_charts_description.csv", sep=";", encoding="utf8"
+        ),
+        "boxplots_desc": pd.read_csv(
+            LISS_DIR / "boxplots_description.csv", sep=";", encoding="latin3"
+        ),
+    }
+
+
+def create_univariate_data(
+    n_rows=5500,
+    n_categories=5,
+    n_bg_categories=3,
+    missing_share=0.05,
+    april=False,
+    seed=0,
+):
+    """Create prepared data for the univariate distributions tabs.
+
+    Variables of stacked barplot groups are ordered categoricals, variables of
+    barplot groups are nullable booleans and variables of distplot groups are
+    floats. All variables of a group share their categories.
+
+    Args:
+        n_rows (int): Number of respondents.
+        n_categories (int): Number of categories of stacked barplot variables.
+        n_bg_categories (int): Number of categories of each background variable.
+        missing_share (float): Expected share of missing values per variable.
+        april (bool): Whether to use the description of the April wave.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        pd.DataFrame
+
+    """
+    rng = np.random.RandomState(seed)
+    descriptions = read_descriptions(april)
+    group_info = descriptions["group_info"]
+    plot_types = group_info.set_index("group_english")["plot_type"].dropna()
+
+    columns = {}
+    for bg_var in descriptions["bg_desc"]["new_name"]:
+        if bg_var != "prov":
+            labels = [f"{bg_var} {i + 1}" for i in range(n_bg_categories)]
+            sr = _categorical(rng, n_rows, labels)
+            columns[bg_var] = _with_missing(rng, sr, missing_share)
+
+    desc = descriptions["data_desc"]
+    desc = desc[desc["group_english"].isin(plot_types.index)]
+    labels = [f"category {i + 1}" for i in range(n_categories)]
+    for group, variables in desc.groupby("group_english", sort=False)["new_name"]:
+        plot_type = plot_types[group]
+        for var in variables:
+            if plot_type == "distplot":
+                sr = pd.Series(rng.normal(50, 20, n_rows).clip(0, 100))
+            elif plot_type == "barplot":
+                sr = pd.Series(rng.rand(n_rows) < rng.rand(), dtype="boolean")
+            else:
+                sr = _categorical(rng, n_rows, labels)
+            columns[var] = _with_missing(rng, sr, missing_share)
+
+    return pd.DataFrame(columns)
+
+
+def create_waves_data(n_rows=30000, n_months=6, missing_share=0.05, seed=0):
+    """Create raw data for the run charts tab.
+
+    The data has a MultiIndex of respondent ids and months. The first month is
+    November 2019, which is dropped by the run charts, followed by n_months
+    months starting in February 2020.
+
+    Args:
+        n_rows (int): Number of rows, spread evenly across months.
+        n_months (int): Number of months from February 2020 on. The German labels
+            of the run charts require at least four months.
+        missing_share (float): Expected share of missing values per variable.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        pd.DataFrame
+
+    """
+    rng = np.random.RandomState(seed)
+    desc = read_descriptions()["run_charts_desc"]
+    months = pd.DatetimeIndex(["2019-11-01"]).append(
+        pd.date_range("2020-02-01", periods=n_months, freq="MS")
+    )
+    n_persons = max(n_rows // len(months), 1)
+    index = pd.MultiIndex.from_product(
+        [range(n_persons), months], names=["personal_id", "month"]
+    )
+    n_rows = len(index)
+
+    columns = {
+        "age": rng.randint(16, 80, n_rows),
+        "max_hours_total": rng.uniform(0, 60, n_rows),
+    }
+    for var in desc.query("type == 'Outcome Variable'")["new_name"]:
+        columns[var] = _with_missing(
+            rng, pd.Series(rng.normal(30, 10, n_rows)), missing_share
+        ).to_numpy()
+
+    for bg_var, categories in _categories_by_variable(desc).items():
+        if bg_var == "None":
+            continue
+        elif bg_var in BINARY_RUN_CHART_VARS:
+            sr = pd.Series(rng.randint(0, 2, n_rows).astype(float))
+        else:
+            sr = pd.Series(rng.choice(categories, n_rows), dtype=object)
+        columns[bg_var] = _with_missing(rng, sr, missing_share).to_numpy()
+
+    return pd.DataFrame(columns, index=index)
+
+
+def create_child_data(n_rows=8000, missing_share=0.05, seed=0):
+    """Create raw data for the boxplots tab.
+
+    The data has a MultiIndex of household ids, months and the age group of the
+    child ("child_id"). Months are February 2020, before CoVid-19, and April 2020.
+
+    Args:
+        n_rows (int): Number of rows, spread evenly across months and children.
+        missing_share (float): Expected share of missing values per variable.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        pd.DataFrame
+
+    """
+    rng = np.random.RandomState(seed)
+    categories = _categories_by_variable(read_descriptions()["boxplots_desc"])
+    months = pd.DatetimeIndex(["2020-02-01", "2020-04-01"])
+    children = categories["child_id"]
+    n_households = max(n_rows // (len(months) * len(children)), 1)
+    index = pd.MultiIndex.from_product(
+        [range(n_households), months, children], names=["hh_id", "month", "child_id"]
+    )
+    n_rows = len(index)
+
+    def choice(values, p=None):
+        sr = pd.Series(rng.choice(values, n_rows, p=p), dtype=object)
+        return _with_missing(rng, sr, missing_share).to_numpy()
+
+    labor_force = categories["labor_force_coarse"]
+    hours_female = rng.gamma(2, 8, n_rows)
+    hours_male = rng.gamma(2, 5, n_rows)
+    columns = {
+        "single_parent": rng.choice([0, 1], n_rows, p=[0.85, 0.15]),
+        "youngest_child": rng.randint(0, 2, n_rows),
+        "gender": choice(["female", "male"]),
+        "edu": choice(categories["edu"]),
+        "labor_force_coarse": choice(labor_force),
+        "labor_force_coarse_mother": choice(labor_force),
+        "labor_force_coarse_father": choice(labor_force),
+        "work_perc_home_cat_mother": choice(categories["work_perc_home_cat"]),
+        "work_perc_home_cat_father": choice(categories["work_perc_home_cat"]),
+        "essential_worker_w2": rng.randint(0, 2, n_rows).astype(float),
+        "net_income_2y_equiv_q3": rng.randint(1, 4, n_rows).astype(float),
+        "hours_cc_female": hours_female,
+        "hours_cc_male": hours_male,
+        "cc_gap": hours_female - hours_male,
+    }
+    return pd.DataFrame(columns, index=index)
+
+
+def write_synthetic_dashboard_data(
+    out_dir, language="english", n_rows=1000, seed=0, run_chart_panel=False
+):
+    """Build dashboard data from synthetic datasets and pickle it to out_dir.
+
+    The files have the same names and structure as those written by
+    process_dashboard_source_data, so out_dir can be passed to the app.
+
+    Args:
+        out_dir (pathlib.Path): Directory of the dashboard data.
+        language (str): One of ["english", "german"].
+        n_rows (int): Number of rows of each synthetic dataset.
+        seed (int): Seed of the random number generator.
+        run_chart_panel (bool): Also write the run charts panel. Default is False.
+
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    descriptions = read_descriptions()
+
+    kwargs = {"language": language, "data_name": "liss"}
+    suffix_to_kwargs = {
+        "waves": {
+            "data": create_waves_data(n_rows=n_rows, seed=seed),
+            "run_charts_desc": descriptions["run_charts_desc"],
+        },
+        "boxplot": {
+            "data": create_child_data(n_rows=n_rows, seed=seed),
+            "boxplots_desc": descriptions["boxplots_desc"],
+        },
+    }
+    for suffix, april in [("single", False), ("single_april", True)]:
+        descriptions = read_descriptions(april)
+        data = create_univariate_data(n_rows=n_rows, april=april, seed=seed)
+        group_info = descriptions["group_info"]
+        group_info = group_info[group_info[f"group_{language}"].notnull()]
+        desc = create_description_table(
+            raw_desc=descriptions["data_desc"],
+            background_table=descriptions["bg_desc"],
+            group_info=group_info,
+            data=data,
+            language=language,
+        )
+        suffix_to_kwargs[suffix] = {
+            "data": data,
+            "data_desc": desc,
+            "group_info": group_info,
+            "april_wave": "yes" if april else None,
+        }
+
+    for suffix, suffix_kwargs in suffix_to_kwargs.items():
+        dashboard_data = create_dashboard_data(**suffix_kwargs, **kwargs)
+        write_artifact(dashboard_data, out_dir, suffix)
+        if run_chart_panel and suffix == "waves":
+            write_run_charts_panel(
+                suffix_kwargs["data"],
+                dashboard_data["mapping"]["variable_mappings"],
+                out_dir,
+            )
+    write_manifest(out_dir)
+
+
+def _categories_by_variable(desc):
+    """Map each (background) variable of a description table to its categories.
+
+    Categories are listed in the rows below their variable. In the run charts
+    description their names are prefixed with the name of the variable.
+
+    """
+    res = {}
+    current = None
+    for name, type_ in desc[["new_name", "type"]].itertuples(index=False):
+        if type_ in ["Category", "Sample Category"]:
+            if current is not None:
+                prefix = f"{current}_"
+                if name.startswith(prefix):
+                    name = name[len(prefix) :]
+                res[current].append(name)
+        elif "Variable" in type_ and type_ != "Outcome Variable":
+            current = name
+            res[current] = []
+        else:
+            current = None
+    return res
+
+
+def _categorical(rng, n_rows, labels):
+    # skewed probabilities, so that categories differ in size like in survey data
+    p = rng.dirichlet(np.ones(len(labels)) * 2)
+    codes = rng.choice(len(labels), n_rows, p=p)
+    return pd.Series(pd.Categorical.from_codes(codes, labels, ordered=True))
+
+
+def _with_missing(rng, sr, missing_share):
+    if missing_share > 0:
+        sr = sr.mask(rng.rand(len(sr)) < missing_share)
+    return sr
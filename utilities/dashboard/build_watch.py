@@ -0,0 +1,197 @@
+"""Rebuild parts of the dashboard data when its description files change.
+
+:class:`SourceDependencies` knows which parts of the dashboard data depend on
+which description file, and for the CSV files on which row:
+
+- a row of data_description.csv affects the groups of its variable,
+- a row of group_info.csv affects its group,
+- a row of run_charts_description.csv or boxplots_description.csv affects its
+  outcome if it describes an outcome and all outcomes otherwise,
+- background_variables.csv and added or removed groups affect all groups and
+- the text files only affect the texts, which are rebuilt with every part.
+
+:func:`watch_sources` polls the files and passes the affected parts to a rebuild
+function. The parts have the format of ``_select_parts`` in
+``process_dashboard_source_data``: suffixes map to None for a complete rebuild or
+to the selected "groups" or "outcomes". An empty selection rebuilds the texts.
+
+"""
+import time
+
+import pandas as pd
+
+from utilities.dashboard.config import BOXPLOTS_DIR
+from utilities.dashboard.config import INTRO_PAGE_DIR
+from utilities.dashboard.config import RUN_CHARTS_DIR
+from utilities.dashboard.config import UNIVARIATE_DISTRIBUTIONS_DIR
+
+WATCH_INTERVAL = 1.0
+
+# text files, keyed by the suffixes whose texts they contain
+TEXT_DIRS = {
+    ("single",): INTRO_PAGE_DIR / "metadata",
+    ("single", "single_april"): UNIVARIATE_DISTRIBUTIONS_DIR / "metadata",
+    ("waves",): RUN_CHARTS_DIR / "metadata",
+    ("boxplot",): BOXPLOTS_DIR / "metadata",
+}
+
+SELECTION_KEYS = {
+    "single": "groups",
+    "single_april": "groups",
+    "waves": "outcomes",
+    "boxplot": "outcomes",
+}
+
+
+class SourceDependencies:
+    """Dependencies of the dashboard data on the description files.
+
+    Args:
+        desc_dir (pathlib.Path): Directory with the description files.
+        lang (str): Dashboard language.
+
+    """
+
+    def __init__(self, desc_dir, lang):
+        self.group_col = f"group_{lang}"
+        # file name: (suffixes, key column, encoding, how rows affect the suffixes)
+        self.tables = {
+            "data_description.csv": (["single"], "new_name", "utf8", "group_of_row"),
+            "data_description_april.csv": (
+                ["single_april"],
+                "new_name",
+                "utf8",
+                "group_of_row",
+            ),
+            "group_info.csv": (["single"], self.group_col, "utf8", "group"),
+            "group_info_april.csv": (["single_april"], self.group_col, "utf8", "group"),
+            "background_variables.csv": (
+                ["single", "single_april"],
+                "new_name",
+                "utf8",
+                "all",
+            ),
+            "run_charts_description.csv": (["waves"], "new_name", "utf8", "outcome"),
+            "boxplots_description.csv": (["boxplot"], "new_name", "latin3", "outcome"),
+        }
+        self.paths = {name: desc_dir / name for name in self.tables}
+        for text_dir in TEXT_DIRS.values():
+            for path in sorted(text_dir.rglob("*.txt")):
+                self.paths[path] = path
+
+    def stamps(self):
+        """Return the modification times of all files."""
+        return {
+            name: path.stat().st_mtime_ns if path.exists() else None
+            for name, path in self.paths.items()
+        }
+
+    def snapshot(self):
+        """Read the rows of the tables and the contents of the text files.
+
+        Returns:
+            dict: Maps table names to dicts from keys to lists of rows, and text
+                files to their contents.
+
+        """
+        res = {}
+        for name, path in self.paths.items():
+            if name in self.tables:
+                key, encoding = self.tables[name][1:3]
+                table = pd.read_csv(
+                    path, sep=";", encoding=encoding, dtype=str, keep_default_na=False
+                )
+                rows = {}
+                for row in table.to_dict("records"):
+                    rows.setdefault(row[key], []).append(row)
+                res[name] = rows
+            else:
+                res[name] = path.read_text(encoding="utf-8")
+        return res
+
+    def affected(self, old, new):
+        """Determine the parts of the dashboard data that changed between snapshots.
+
+        Returns:
+            dict: Maps suffixes to None or to the selected "groups" or "outcomes".
+
+        """
+        parts = {}
+        for name, path in self.paths.items():
+            if old[name] == new[name]:
+                continue
+            if name not in self.tables:
+                for suffixes, text_dir in TEXT_DIRS.items():
+                    if text_dir in path.parents:
+                        for suffix in suffixes:
+                            _add(parts, suffix, [])
+                continue
+
+            suffixes, key, _, rule = self.tables[name]
+            changed = [
+                k
+                for k in set(old[name]) | set(new[name])
+                if old[name].get(k) != new[name].get(k)
+            ]
+            # a changed row affects the parts of its old and its new version
+            rows = [
+                row
+                for k in changed
+                for row in old[name].get(k, []) + new[name].get(k, [])
+            ]
+            if rule == "all" or (rule == "group" and set(old[name]) != set(new[name])):
+                items = None
+            elif rule == "group":
+                items = changed
+            elif rule == "group_of_row":
+                items = [row[self.group_col] for row in rows if row[self.group_col]]
+            elif all(row["type"] == "Outcome Variable" for row in rows):
+                items = [row[key] for row in rows]
+            else:
+                items = None
+            for suffix in suffixes:
+                _add(parts, suffix, items)
+        return parts
+
+
+def watch_sources(dependencies, rebuild, suffixes, interval=WATCH_INTERVAL):
+    """Call rebuild with the affected parts whenever the description files change.
+
+    A snapshot that cannot be read or a failed rebuild is reported and retried
+    after the next change. Runs until it is interrupted.
+
+    Args:
+        dependencies (SourceDependencies): The watched files.
+        rebuild (callable): Receives the affected parts of suffixes.
+        suffixes (list): Suffixes that can be rebuilt. Others are ignored.
+        interval (float): Seconds between checks of the files.
+
+    """
+    stamps = dependencies.stamps()
+    built = dependencies.snapshot()
+    while True:
+        time.sleep(interval)
+        current = dependencies.stamps()
+        if current == stamps:
+            continue
+        stamps = current
+        try:
+            snapshot = dependencies.snapshot()
+            parts = dependencies.affected(built, snapshot)
+            parts = {s: sel for s, sel in parts.items() if s in suffixes}
+            if parts:
+                rebuild(parts)
+        except Exception as e:
+            print(f"Rebuild failed, waiting for the next change: {e!r}")
+        else:
+            built = snapshot
+
+
+def _add(parts, suffix, items):
+    """Merge the items of suffix into parts. None means the complete suffix."""
+    if items is None or (suffix in parts and parts[suffix] is None):
+        parts[suffix] = None
+    else:
+        key = SELECTION_KEYS[suffix]
+        selected = parts.setdefault(suffix, {key: []})[key]
+        parts[suffix][key] = sorted(set(selected) | set(items))
@@ -0,0 +1,320 @@
+"""Latency, model and message size metrics of the dashboard's selector callbacks.
+
+Every ``on_change`` callback of the components is registered through
+:func:`instrument_callback`. Once metrics are enabled with
+:func:`enable_callback_metrics`, each call records
+
+- its latency,
+- the number of models it added to or removed from the document and
+- the size of the PATCH-DOC message that carries its changes to the browser,
+
+per component and callback. If a callback submits work to a
+:class:`~utilities.dashboard.executor.ComponentExecutor`, the executor takes over
+its measurement with :func:`defer_measurement`. The call is then recorded when the
+result has been applied to the document, so the latency spans the computation in the
+pool and the changes of the apply step are counted. Calls whose result is
+superseded by a later selection are not recorded.
+
+While metrics are disabled, the wrapper only adds one function call. Callbacks of
+profiled sessions run under the session's profiler, see
+:mod:`utilities.dashboard.session_profiling`.
+
+The handlers of :data:`METRICS_PATTERNS` expose the metrics in the Prometheus text
+format or as JSON, together with the model counts of the live sessions, see
+:mod:`utilities.dashboard.session_models`. ``server.create_server`` adds them to the
+Bokeh server, so they share its port. Every worker process of the server keeps its
+own metrics and a request is answered by one of them, so all series are labelled
+with the pid of the process.
+
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import tornado.web
+from bokeh.document.events import DocumentPatchedEvent
+from bokeh.io import curdoc
+from bokeh.protocol import Protocol
+
+from utilities.dashboard import session_models
+from utilities.dashboard.session_profiling import current_tab
+from utilities.dashboard.session_profiling import profile_call
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MESSAGE_SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+
+_ENABLED = False
+
+_METRICS = {}
+
+# measurements of the callbacks that are running, innermost last
+_RUNNING = []
+
+
+class _Histogram:
+    """Counts of observations in buckets with the sum of all observations."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        pos = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                pos = i
+                break
+        self.counts[pos] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs including +Inf."""
+        res = []
+        total = 0
+        for bound, count in zip(list(self.bounds) + [float("inf")], self.counts):
+            total += count
+            res.append((bound, total))
+        return res
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(b): c for b, c in self.cumulative()},
+        }
+
+
+def enable_callback_metrics():
+    global _ENABLED
+    _ENABLED = True
+
+
+def callback_metrics_enabled():
+    return _ENABLED
+
+
+def instrument_callback(callback, component):
+    """Wrap an ``on_change`` callback such that its calls are measured.
+
+    Args:
+        callback (callable): Callback with the signature (attr, old, new), usually
+            a functools.partial of a function.
+        component (str): Name of the dashboard component.
+
+    Returns:
+        callable: Wrapped callback with the same signature.
+
+    """
+    func = getattr(callback, "func", callback)
+    key = (component, getattr(func, "__name__", repr(func)))
+    # the callback is profiled with the tab that is being built
+    tab = current_tab()
+
+    def instrumented(attr, old, new):
+        if not _ENABLED:
+            return profile_call(tab, callback, attr, old, new)
+        return profile_call(tab, _measure, key, callback, attr, old, new)
+
+    return instrumented
+
+
+def _measure(key, callback, attr, old, new):
+    measurement = Measurement(key, curdoc())
+    _RUNNING.append(measurement)
+    try:
+        with measurement.collecting():
+            return callback(attr, old, new)
+    finally:
+        _RUNNING.pop()
+        if not measurement.deferred:
+            measurement.record()
+
+
+def defer_measurement():
+    """Take over the measurement of the callback that is running.
+
+    Returns:
+        Measurement or None: None if metrics are disabled or no instrumented
+            callback is running. Otherwise, the caller has to call
+            :meth:`Measurement.record` once the work of the callback is done.
+
+    """
+    if not _RUNNING:
+        return None
+    measurement = _RUNNING[-1]
+    measurement.deferred = True
+    return measurement
+
+
+class Measurement:
+    """Latency, model changes and document changes of one callback call.
+
+    Args:
+        key (tuple): Component and callback name.
+        doc (bokeh.document.Document): The session document.
+
+    """
+
+    __slots__ = ("key", "doc", "start", "before", "events", "deferred")
+
+    def __init__(self, key, doc):
+        self.key = key
+        self.doc = doc
+        self.start = time.perf_counter()
+        self.before = _model_ids(doc)
+        self.events = []
+        self.deferred = False
+
+    @contextmanager
+    def collecting(self):
+        """Collect the changes that the enclosed block makes to the document."""
+        self.doc.on_change(self._collect)
+        try:
+            yield
+        finally:
+            self.doc.remove_on_change(self._collect)
+
+    def record(self):
+        """Record the call with its latency until now."""
+        latency = time.perf_counter() - self.start
+        after = _model_ids(self.doc)
+        if self.key not in _METRICS:
+            _METRICS[self.key] = {
+                "latency": _Histogram(LATENCY_BUCKETS),
+                "message_bytes": _Histogram(MESSAGE_SIZE_BUCKETS),
+                "models_added": 0,
+                "models_removed": 0,
+            }
+        metrics = _METRICS[self.key]
+        metrics["latency"].observe(latency)
+        metrics["message_bytes"].observe(_message_size(self.events))
+        metrics["models_added"] += len(after - self.before)
+        metrics["models_removed"] += len(self.before - after)
+
+    def _collect(self, event):
+        if isinstance(event, DocumentPatchedEvent):
+            self.events.append(event)
+
+
+def _model_ids(doc):
+    return {model.id for root in doc.roots for model in root.references()}
+
+
+def _message_size(events):
+    """Return the number of bytes of a PATCH-DOC message with events."""
+    if not events:
+        return 0
+    msg = Protocol().create("PATCH-DOC", events)
+    size = len(msg.header_json) + len(msg.metadata_json) + len(msg.content_json)
+    for _, payload in msg.buffers:
+        size += memoryview(payload).nbytes
+    return size
+
+
+def reset_callback_metrics():
+    _METRICS.clear()
+
+
+def callback_metrics_to_dict():
+    """Return the metrics as nested dict of components and callbacks.
+
+    The entry "pid" holds the process id of the server process.
+
+    """
+    res = {"pid": os.getpid()}
+    for (component, callback), metrics in _METRICS.items():
+        res.setdefault(component, {})[callback] = {
+            "latency_seconds": metrics["latency"].to_dict(),
+            "message_bytes": metrics["message_bytes"].to_dict(),
+            "models_added": metrics["models_added"],
+            "models_removed": metrics["models_removed"],
+        }
+    return res
+
+
+def format_prometheus():
+    """Return the metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, entry, help_text in [
+        ("callback_seconds", "latency", "Latency of dashboard callbacks."),
+        (
+            "callback_message_bytes",
+            "message_bytes",
+            "Size of their PATCH-DOC messages.",
+        ),
+    ]:
+        lines += [
+            f"# HELP dashboard_{name} {help_text}",
+            f"# TYPE dashboard_{name} histogram",
+        ]
+        for key, metrics in _METRICS.items():
+            labels = _labels(key)
+            hist = metrics[entry]
+            for bound, count in hist.cumulative():
+                le = _format_bound(bound)
+                lines.append(f'dashboard_{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"dashboard_{name}_sum{{{labels}}} {hist.sum}")
+            lines.append(f"dashboard_{name}_count{{{labels}}} {hist.count}")
+
+    for entry in ["models_added", "models_removed"]:
+        lines += [
+            f"# HELP dashboard_callback_{entry}_total Models {entry.split('_')[1]} "
+            "by dashboard callbacks.",
+            f"# TYPE dashboard_callback_{entry}_total counter",
+        ]
+        for key, metrics in _METRICS.items():
+            lines.append(
+                f"dashboard_callback_{entry}_total{{{_labels(key)}}} {metrics[entry]}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def _labels(key):
+    component, callback = key
+    return f'pid="{os.getpid()}",component="{component}",callback="{callback}"'
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class _LocalHandler(tornado.web.RequestHandler):
+    """Only answer requests from the machine of the server."""
+
+    def prepare(self):
+        if self.request.remote_ip not in ("127.0.0.1", "::1"):
+            raise tornado.web.HTTPError(403)
+
+
+class MetricsHandler(_LocalHandler):
+    """Serve the callback metrics, as JSON if requested with ?format=json."""
+
+    def get(self):
+        if self.get_argument("format", "prometheus") == "json":
+            self.set_header("Content-Type", "application/json")
+            self.write(json.dumps(callback_metrics_to_dict()))
+        else:
+            self.set_header("Content-Type", "text/plain; version=0.0.4")
+            self.write(format_prometheus() + session_models.format_prometheus())
+
+
+class SessionsHandler(_LocalHandler):
+    """Serve the model counts of the live sessions of the process as JSON."""
+
+    def get(self):
+        self.set_header("Content-Type", "application/json")
+        self.write(
+            json.dumps({"pid": os.getpid(), "sessions": session_models.session_stats()})
+        )
+
+
+# the callback metrics and session gauges are served at /metrics, the model counts
+# of every live session at /sessions
+METRICS_PATTERNS = [(r"/metrics", MetricsHandler), (r"/sessions", SessionsHandler)]
@@ -1,23 +1,17 @@
-import sys
-import io
-import textwrap
 import copy
+import itertools
+
 import numpy as np
 import pandas as pd
-from bokeh.models import ColumnDataSource, FactorRange
-from bokeh.transform import factor_cmap
-from bokeh.palettes import Spectral6
-from utilities.colors import get_colors, plot_colors
-from bokeh.models import Legend, LegendItem
-from bokeh.models import DatetimeTickFormatter
-from bokeh.models.ranges import Range1d, DataRange1d
-from bokeh.models import ColumnDataSource, HoverTool, GlyphRenderer, Line
-import itertools
+from bokeh.models import ColumnDataSource
+from bokeh.models import FactorRange
+from bokeh.models import HoverTool
 from bokeh.models import Span
+from bokeh.plotting import figure
+from bokeh.transform import factor_cmap
 
-from pandas.api.types import is_datetime64_any_dtype as is_datetime
-from pandas.core.common import flatten
-from bokeh.plotting import figure, output_notebook, show
+from utilities.dashboard.instrumentation import span
+from utilities.palettes import get_colors
 
 
 def _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var):
@@ -41,34 +35,61 @@ def _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var):
     data_copy = data_copy[(data_copy["single_parent"] == 0)]
 
     data_copy["covid"] = np.select(
-            condlist=[data_copy["month"] <= "2020-02-29", data_copy["month"] > "2020-02-29"],
-            choicelist=["pre", "post"],
-             default=np.nan
-             )
+        condlist=[
+            data_copy["month"] <= "2020-02-29",
+            data_copy["month"] > "2020-02-29",
+        ],
+        choicelist=["pre", "post"],
+        default=np.nan,
+    )
 
     data_copy["work_perc_home_cat"] = np.select(
         condlist=[data_copy["gender"] == "female", data_copy["gender"] == "male"],
-        choicelist=[data_copy["work_perc_home_cat_mother"], data_copy["work_perc_home_cat_father"]],
+        choicelist=[
+            data_copy["work_perc_home_cat_mother"],
+            data_copy["work_perc_home_cat_father"],
+        ],
         default=np.nan,
     )
 
     data_copy["work_status_family"] = np.select(
         condlist=[
-        (np.logical_or(data_copy["labor_force_coarse_father"] == "full-time", data_copy["labor_force_coarse_father"] == "part-time") &
-        np.logical_or(data_copy["labor_force_coarse_mother"] == "full-time", data_copy["labor_force_coarse_mother"] == "part-time")),
-        (np.logical_or(data_copy["labor_force_coarse_father"] == "full-time", data_copy["labor_force_coarse_father"] == "part-time") &
-        (data_copy["labor_force_coarse_mother"] == "not working"))],
+            (
+                np.logical_or(
+                    data_copy["labor_force_coarse_father"] == "full-time",
+                    data_copy["labor_force_coarse_father"] == "part-time",
+                )
+                & np.logical_or(
+                    data_copy["labor_force_coarse_mother"] == "full-time",
+                    data_copy["labor_force_coarse_mother"] == "part-time",
+                )
+            ),
+            (
+                np.logical_or(
+                    data_copy["labor_force_coarse_father"] == "full-time",
+                    data_copy["labor_force_coarse_father"] == "part-time",
+                )
+                & (data_copy["labor_force_coarse_mother"] == "not working")
+            ),
+        ],
         choicelist=["both work", "father works"],
         default=np.nan,
     )
 
-    data_copy["essential_worker_w2"] = data_copy['essential_worker_w2'].replace({1.0: 'yes', 0.0: 'no'})
-    data_copy["net_income_2y_equiv_q3"] = data_copy['net_income_2y_equiv_q3'].replace({1.0: 'first', 2.0: 'second', 3.0: 'third'})
-
+    data_copy["essential_worker_w2"] = data_copy["essential_worker_w2"].replace(
+        {1.0: "yes", 0.0: "no"}
+    )
+    data_copy["net_income_2y_equiv_q3"] = data_copy["net_income_2y_equiv_q3"].replace(
+        {1.0: "first", 2.0: "second", 3.0: "third"}
+    )
 
-    data_copy["relative_cc_gap"] = data_copy["cc_gap"] / (data_copy["hours_cc_female"] + data_copy["hours_cc_male"])
+    data_copy["relative_cc_gap"] = data_copy["cc_gap"] / (
+        data_copy["hours_cc_female"] + data_copy["hours_cc_male"]
+    )
 
-    data_copy = data_copy[bg_vars_1 + [bg_var_2] + outcomes + [sample_var] + ["youngest_child"]]
+    data_copy = data_copy[
+        bg_vars_1 + [bg_var_2] + outcomes + [sample_var] + ["youngest_child"]
+    ]
 
     return data_copy
 
@@ -120,13 +141,15 @@ def compute_quantities(data, bg_var_1, bg_var_2, outcome):
     data_res.append(lower)
 
     # concatenate pd.DataFrames
-    data_res_fin = pd.concat(data_res, axis=1).rename(columns={0:"upper", 1:"lower"})
+    data_res_fin = pd.concat(data_res, axis=1).rename(columns={0: "upper", 1: "lower"})
 
     # delete the raws that contains nan values
     if data_res_fin.isnull().values.any():
         c = data_res_fin.index.names
         data_res_fin = data_res_fin.reset_index()
-        rows_with_nan = data_res_fin[data_res_fin.isna().any(axis=1)][bg_var_1].to_list()
+        rows_with_nan = data_res_fin[data_res_fin.isna().any(axis=1)][
+            bg_var_1
+        ].to_list()
         data_res_fin = data_res_fin[~data_res_fin[bg_var_1].isin(rows_with_nan)]
         data_res_fin = data_res_fin.set_index(c)
     else:
@@ -135,7 +158,9 @@ def compute_quantities(data, bg_var_1, bg_var_2, outcome):
     # convert result to dictionary of results
     key = (bg_var_1, bg_var_2)
     index = data_res_fin.index.tolist()
-    res = {key: {"cats": index, "data": data_res_fin.to_dict("list"), "order": [i[1] for i in index]}}
+    # the quantities are sent to the browser as binary float32 arrays
+    quantities = {col: data_res_fin[col].to_numpy(np.float32) for col in data_res_fin}
+    res = {key: {"cats": index, "data": quantities, "order": [i[1] for i in index]}}
 
     return res
 
@@ -156,35 +181,37 @@ def process_data(data, bg_vars_1, bg_var_2, outcomes, sample_var, nice_names):
 
     """
 
-    data = _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var)
+    with span("preprocess"):
+        data = _preprocess_data(data, bg_vars_1, bg_var_2, outcomes, sample_var)
 
     tot_res = {}
 
     for outcome in outcomes:
-        out_res = {}
-
-        all_res = {}
-        for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
+        with span(outcome):
+            out_res = {}
 
-            res = compute_quantities(data, var_1, var_2, outcome)
-            all_res.update(res)
+            all_res = {}
+            for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
 
-        out_res["all"] = all_res
+                res = compute_quantities(data, var_1, var_2, outcome)
+                all_res.update(res)
 
+            out_res["all"] = all_res
 
-        for s in data[sample_var]:
+            # each sample once, in order of appearance
+            for s in data[sample_var].unique():
 
-            s_res = {}
-            s_data = data[data[sample_var] == s]
+                s_res = {}
+                s_data = data[data[sample_var] == s]
 
-            for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
+                for var_1, var_2 in itertools.product(bg_vars_1, [bg_var_2]):
 
-                res = compute_quantities(s_data, var_1, var_2, outcome)
-                s_res.update(res)
+                    res = compute_quantities(s_data, var_1, var_2, outcome)
+                    s_res.update(res)
 
-            out_res[s] = s_res
+                out_res[s] = s_res
 
-        tot_res[outcome] = out_res
+            tot_res[outcome] = out_res
 
     tot_res["nice_names"] = nice_names
 
@@ -202,7 +229,9 @@ def _apply_styling(p, language):
     if language == "english":
         p.title.text = "Difference between mother's and father's childcare hours"
     elif language == "german":
-        p.title.text = "Unterschied zwischen den Kinderbetreuungszeiten von Mutter und Vater"
+        p.title.text = (
+            "Unterschied zwischen den Kinderbetreuungszeiten von Mutter und Vater"
+        )
     p.title.align = "center"
     p.title_location = "below"
     p.title.text_font_size = "12pt"
@@ -238,11 +267,12 @@ def _apply_styling(p, language):
     return p
 
 
-def setup_plot(data_dict, bg_var_1, bg_var_2, outcome, sample, language):
+def setup_plot(store, bg_var_1, bg_var_2, outcome, sample, language):
     """Create boxplot.
 
     Args:
-        data_dict (dict): Dictionary of data.
+        store (BoxplotsStore): Boxplots data, e.g. ``BoxplotsStore`` of the result
+            of :func:`process_data`.
         bg_var_1 (str): Main background variable.
         bg_var_2 (str): Secondary background variable.
         outcome (str): Outcome variable.
@@ -255,14 +285,12 @@ def setup_plot(data_dict, bg_var_1, bg_var_2, outcome, sample, language):
 
     """
 
-    # get data from dictionary
-    cats = data_dict[outcome][sample][(bg_var_1, bg_var_2)]["cats"]
-    data = data_dict[outcome][sample][(bg_var_1, bg_var_2)]["data"]
-    order = data_dict[outcome][sample][(bg_var_1, bg_var_2)]["order"]
-
-    #change names according to nice_names
-    cats = [(data_dict["nice_names"][s], data_dict["nice_names"][f]) for s,f in cats]
-    order = [data_dict["nice_names"][s] for s in order]
+    # get data, with categories in nice names, from the store
+    record = store.boxplot(outcome, sample, bg_var_1, bg_var_2)
+    # the lists are copied because bokeh may modify the values it is given
+    cats = list(record.factors)
+    data = record.quantities
+    order = list(record.order)
 
     # create figure
     p = figure(
@@ -270,45 +298,63 @@ def setup_plot(data_dict, bg_var_1, bg_var_2, outcome, sample, language):
         y_range=FactorRange(*cats, factor_padding=-0.42),
         plot_height=500,
         plot_width=800,
-        toolbar_location=None    )
-
-
+        toolbar_location=None,
+    )
 
     # create ColumnDataSource (see https://tinyurl.com/y46stcab)
-    source = ColumnDataSource(dict(
-        x=cats,
-        q25=data["q25"],
-        q50=data["q50"],
-        q75=data["q75"],
-        upper=data["upper"],
-        lower=data["lower"],
-        order=order,
-    ))
-
-
+    source = ColumnDataSource(
+        dict(
+            x=cats,
+            q25=data["q25"],
+            q50=data["q50"],
+            q75=data["q75"],
+            upper=data["upper"],
+            lower=data["lower"],
+            order=order,
+        )
+    )
 
     # get palette
-    palette=get_colors("categorical", number=2)*3
-    palette.reverse()
-
+    palette = (get_colors("categorical", number=2) * 3)[::-1]
 
     # this iterate the first color of the (reversed) palette every two rows
     # (we want the barplots to be grouped by CoVid-19 status)
-    mapper = factor_cmap(field_name='x', palette=palette, factors=order, start=1, end=2)
-
+    mapper = factor_cmap(field_name="x", palette=palette, factors=order, start=1, end=2)
 
     # stems
     r_75 = p.segment("upper", "x", "q75", "x", line_color="black", source=source)
     r_25 = p.segment("lower", "x", "q25", "x", line_color="black", source=source)
 
     # vertical line at 0
-    vline = Span(location=0, dimension='height', line_color='black', line_width=2, line_dash="dashed")
+    vline = Span(
+        location=0,
+        dimension="height",
+        line_color="black",
+        line_width=2,
+        line_dash="dashed",
+    )
     p.renderers.extend([vline])
 
-
     # boxes
-    r_box_1 = p.hbar("x", left="q25", right="q50", height=0.575, line_color="black", source=source, color=mapper, legend_field="order")
-    r_box_2 = p.hbar("x", left="q50", right="q75", height=0.575, line_color="black", source=source, color=mapper)
+    r_box_1 = p.hbar(
+        "x",
+        left="q25",
+        right="q50",
+        height=0.575,
+        line_color="black",
+        source=source,
+        color=mapper,
+        legend_field="order",
+    )
+    r_box_2 = p.hbar(
+        "x",
+        left="q50",
+        right="q75",
+        height=0.575,
+        line_color="black",
+        source=source,
+        color=mapper,
+    )
 
     # whiskers (almost-0 height rectangles, simpler than segments)
     r_lower = p.rect("lower", "x", 0.001, 0.3, line_color="black", source=source)
@@ -321,17 +367,18 @@ def setup_plot(data_dict, bg_var_1, bg_var_2, outcome, sample, language):
     p.legend.location = "center_right"
 
     TOOLTIPS = [
-    ("Maximum value", "@upper"),
-    ("75th quantile", "@q75"),
-    ("Median", "@q50"),
-    ("25th quantile", "@q25"),
-    ("Minimum value", "@lower")
+        ("Maximum value", "@upper"),
+        ("75th quantile", "@q75"),
+        ("Median", "@q50"),
+        ("25th quantile", "@q25"),
+        ("Minimum value", "@lower"),
     ]
 
     p.add_tools(
         HoverTool(
             renderers=[r_25, r_75, r_box_1, r_box_2, r_upper, r_lower],
             tooltips=TOOLTIPS,
-        ))
+        )
+    )
 
     return p
@@ -1,24 +1,31 @@
 from functools import partial
 
+from bokeh.io import curdoc
 from bokeh.layouts import Column
 from bokeh.layouts import Row
 from bokeh.models import Select
 from bokeh.models.widgets import Div
 
+from utilities.dashboard.callback_metrics import instrument_callback
 from utilities.dashboard.components.boxplots.boxplot import setup_plot
 from utilities.dashboard.config import PLOT_WIDTH
 from utilities.dashboard.config import TITLE_STYLE
+from utilities.dashboard.executor import ComponentExecutor
+from utilities.dashboard.executor import loading_indicator
+from utilities.dashboard.view_state import view_value
 
 
-def create_boxplots(data, variable_mappings, language, menu_labels):
+def create_boxplots(data, variable_mappings, language, menu_labels, view=None):
     """Create the childcare tab, showing boxplots for selected outcome and
     background variables.
 
     Args:
-        data (dict): Dictionary of boxplots data.
+        data (BoxplotsStore): Boxplots data.
         variable_mappings (dict): Dictionary of boxplots metadata.
         language (str): One of ["english", "german"].
         menu_labels (dict): Dictionary of menu labels.
+        view (dict): Initial selection, see ``view_state.parse_view_state``.
+            Default is the first outcome, background variable and sample.
 
     Returns:
         bokeh Column
@@ -36,28 +43,37 @@ def create_boxplots(data, variable_mappings, language, menu_labels):
     dict_bg_var = variable_mappings["background_variable_to_nice_name"]
     dict_sample_cat = variable_mappings["sample_cat_to_nice_name"]
 
-    outcome_variable = outcome_variables[0]
-    background_variable = background_variables[0]
-    sample_category = sample_categories[0]
+    outcome_options = [dict_var[var] for var in outcome_variables]
+    background_options = [dict_bg_var[var] for var in background_variables]
+    sample_options = [dict_sample_cat[cat] for cat in sample_categories]
+    outcome_variable = nice_name_to_outcome[
+        view_value(view, "outcome", outcome_options)
+    ]
+    background_variable = nice_name_to_background[
+        view_value(view, "bg_var", background_options)
+    ]
+    sample_category = nice_name_to_sample_cat[
+        view_value(view, "sample", sample_options)
+    ]
 
     selection_menus = [
         Select(
             title=menu_labels["outcome"],
-            options=[dict_var[var] for var in outcome_variables],
+            options=outcome_options,
             value=dict_var[outcome_variable],
             name="outcome_variable_selector",
             width=220,
         ),
         Select(
             title=menu_labels["split_by"],
-            options=[dict_bg_var[var] for var in background_variables],
+            options=background_options,
             value=dict_bg_var[background_variable],
             name="background_variable_selector",
             width=220,
         ),
         Select(
             title=menu_labels["sample"],
-            options=[dict_sample_cat[cat] for cat in sample_categories],
+            options=sample_options,
             value=dict_sample_cat[sample_category],
             name="sample_category_selector",
             width=220,
@@ -65,42 +81,47 @@ def create_boxplots(data, variable_mappings, language, menu_labels):
     ]
 
     boxplot = setup_plot(
-        data_dict=data,
+        store=data,
         bg_var_1=background_variable,
         bg_var_2=secondary_background_variable,
         outcome=outcome_variable,
         sample=sample_category,
-        language=language
+        language=language,
     )
 
     title = Div(
-        text=data["title"], style=TITLE_STYLE, margin=(10, 0, 10, 0), width=PLOT_WIDTH
+        text=data.texts["title"],
+        style=TITLE_STYLE,
+        margin=(10, 0, 10, 0),
+        width=PLOT_WIDTH,
     )
 
     top_text = Div(
-        text=data["top_text"],
+        text=data.texts["top_text"],
         margin=(10, 0, 10, 0),
         style={"text-align": "justify"},
         width=PLOT_WIDTH,
     )
 
     bottom_text = Div(
-        text=data["bottom_text"],
+        text=data.texts["bottom_text"],
         margin=(10, 0, 10, 0),
         style={"text-align": "justify"},
         width=PLOT_WIDTH,
     )
 
+    loading = loading_indicator(menu_labels)
     boxplots_page = Column(
-        title, top_text, Row(*selection_menus), boxplot, bottom_text
+        title, top_text, Row(*selection_menus, loading), boxplot, bottom_text
     )
+    executor = ComponentExecutor(curdoc(), "boxplots", indicator=loading)
 
     boxplots_selectors = boxplots_page.children[2].children
 
     outcome_variable_callback = partial(
         update_outcome_variable,
         boxplots_page=boxplots_page,
-        data_dict=data,
+        store=data,
         nice_name_to_background=nice_name_to_background,
         nice_name_to_outcome=nice_name_to_outcome,
         nice_name_to_sample_cat=nice_name_to_sample_cat,
@@ -108,14 +129,17 @@ def create_boxplots(data, variable_mappings, language, menu_labels):
         setup_plot=setup_plot,
         secondary_background_variable=secondary_background_variable,
         language=language,
+        executor=executor,
     )
 
-    boxplots_selectors[0].on_change("value", outcome_variable_callback)
+    boxplots_selectors[0].on_change(
+        "value", instrument_callback(outcome_variable_callback, "boxplots")
+    )
 
     background_variable_callback = partial(
         update_background_variable,
         boxplots_page=boxplots_page,
-        data_dict=data,
+        store=data,
         nice_name_to_background=nice_name_to_background,
         nice_name_to_outcome=nice_name_to_outcome,
         nice_name_to_sample_cat=nice_name_to_sample_cat,
@@ -123,14 +147,17 @@ def create_boxplots(data, variable_mappings, language, menu_labels):
         setup_plot=setup_plot,
         secondary_background_variable=secondary_background_variable,
         language=language,
+        executor=executor,
     )
 
-    boxplots_selectors[1].on_change("value", background_variable_callback)
+    boxplots_selectors[1].on_change(
+        "value", instrument_callback(background_variable_callback, "boxplots")
+    )
 
     sample_callback = partial(
         update_sample,
         boxplots_page=boxplots_page,
-        data_dict=data,
+        store=data,
         nice_name_to_background=nice_name_to_background,
         nice_name_to_outcome=nice_name_to_outcome,
         nice_name_to_sample_cat=nice_name_to_sample_cat,
@@ -138,9 +165,12 @@ def create_boxplots(data, variable_mappings, language, menu_labels):
         setup_plot=setup_plot,
         secondary_background_variable=secondary_background_variable,
         language=language,
+        executor=executor,
     )
 
-    boxplots_selectors[2].on_change("value", sample_callback)
+    boxplots_selectors[2].on_change(
+        "value", instrument_callback(sample_callback, "boxplots")
+    )
 
     return boxplots_page
 
@@ -150,7 +180,7 @@ def update_outcome_variable(
     old,
     new,
     boxplots_page,
-    data_dict,
+    store,
     nice_name_to_background,
     nice_name_to_outcome,
     nice_name_to_sample_cat,
@@ -158,19 +188,24 @@ def update_outcome_variable(
     setup_plot,
     secondary_background_variable,
     language,
+    executor,
 ):
     bg_var_1 = nice_name_to_background[selection_menus[1].value]
     sample = nice_name_to_sample_cat[selection_menus[2].value]
     outcome = nice_name_to_outcome[new]
-    new_boxplot = setup_plot(
-                    data_dict=data_dict,
-                    bg_var_1=bg_var_1,
-                    bg_var_2=secondary_background_variable,
-                    outcome=outcome,
-                    sample=sample,
-                    language=language
-                )
-    boxplots_page.children[3] = new_boxplot
+    # the new boxplot is built off the IO loop and then replaces the old one
+    executor.submit(
+        partial(
+            setup_plot,
+            store=store,
+            bg_var_1=bg_var_1,
+            bg_var_2=secondary_background_variable,
+            outcome=outcome,
+            sample=sample,
+            language=language,
+        ),
+        partial(_replace_boxplot, boxplots_page=boxplots_page),
+    )
     selection_menus[0].value = new
 
 
@@ -179,7 +214,7 @@ def update_background_variable(
     old,
     new,
     boxplots_page,
-    data_dict,
+    store,
     nice_name_to_background,
     nice_name_to_outcome,
     nice_name_to_sample_cat,
@@ -187,27 +222,33 @@ def update_background_variable(
     setup_plot,
     secondary_background_variable,
     language,
+    executor,
 ):
     bg_var_1 = nice_name_to_background[new]
     sample = nice_name_to_sample_cat[selection_menus[2].value]
     outcome = nice_name_to_outcome[selection_menus[0].value]
-    new_boxplot = setup_plot(
-                    data_dict=data_dict,
-                    bg_var_1=bg_var_1,
-                    bg_var_2=secondary_background_variable,
-                    outcome=outcome,
-                    sample=sample,
-                    language=language
-                )
-    boxplots_page.children[3] = new_boxplot
+    # the new boxplot is built off the IO loop and then replaces the old one
+    executor.submit(
+        partial(
+            setup_plot,
+            store=store,
+            bg_var_1=bg_var_1,
+            bg_var_2=secondary_background_variable,
+            outcome=outcome,
+            sample=sample,
+            language=language,
+        ),
+        partial(_replace_boxplot, boxplots_page=boxplots_page),
+    )
     selection_menus[1].value = new
 
+
 def update_sample(
     attr,
     old,
     new,
     boxplots_page,
-    data_dict,
+    store,
     nice_name_to_background,
     nice_name_to_outcome,
     nice_name_to_sample_cat,
@@ -215,17 +256,26 @@ def update_sample(
     setup_plot,
     secondary_background_variable,
     language,
+    executor,
 ):
     bg_var_1 = nice_name_to_background[selection_menus[1].value]
     sample = nice_name_to_sample_cat[new]
     outcome = nice_name_to_outcome[selection_menus[0].value]
-    new_boxplot = setup_plot(
-                    data_dict=data_dict,
-                    bg_var_1=bg_var_1,
-                    bg_var_2=secondary_background_variable,
-                    outcome=outcome,
-                    sample=sample,
-                    language=language
-                )
-    boxplots_page.children[3] = new_boxplot
+    # the new boxplot is built off the IO loop and then replaces the old one
+    executor.submit(
+        partial(
+            setup_plot,
+            store=store,
+            bg_var_1=bg_var_1,
+            bg_var_2=secondary_background_variable,
+            outcome=outcome,
+            sample=sample,
+            language=language,
+        ),
+        partial(_replace_boxplot, boxplots_page=boxplots_page),
+    )
     selection_menus[2].value = new
+
+
+def _replace_boxplot(new_boxplot, boxplots_page):
+    boxplots_page.children[3] = new_boxplot
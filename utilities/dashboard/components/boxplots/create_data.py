@@ -2,7 +2,7 @@ from utilities.dashboard.components.boxplots.boxplot import process_data
 from utilities.dashboard.config import BOXPLOTS_DIR
 
 
-def create_boxplots_data(data, variable_mappings, nice_names, language):
+def create_boxplots_data(data, variable_mappings, nice_names, language, outcomes=None):
     """Create data needed to generate boxplots tab.
 
     Args:
@@ -10,17 +10,23 @@ def create_boxplots_data(data, variable_mappings, nice_names, language):
         variable_mappings (dict): Dictionary of boxplots metadata.
         nice_names (dict): Dictionary mapping variables' names to nice names.
         language (str): One of ["english", "german"].
+        outcomes (list): Only create the boxplots of these outcome variables.
+            Default is None, i.e. all outcome variables.
 
     Returns:
         dict: Dictionary containing all data needed to generate the boxplots.
 
     """
-    outcomes = variable_mappings["outcome_variables"]
+    if outcomes is None:
+        outcomes = variable_mappings["outcome_variables"]
+    else:
+        outcomes = [
+            var for var in variable_mappings["outcome_variables"] if var in outcomes
+        ]
     bg_vars_1 = variable_mappings["background_variables"]
     bg_var_2 = variable_mappings["secondary_background_variable"]
     sample_var = variable_mappings["sample_variable"]
 
-
     boxplots_data = process_data(
         data=data,
         bg_vars_1=bg_vars_1,
@@ -34,13 +40,13 @@ def create_boxplots_data(data, variable_mappings, nice_names, language):
     with open(metadata_path / f"top_text_{language}.txt", "r", encoding="utf-8") as f:
         boxplots_data["top_text"] = f.read()
 
-    with open(metadata_path / f"bottom_text_{language}.txt", "r", encoding="utf-8") as f:
+    with open(
+        metadata_path / f"bottom_text_{language}.txt", "r", encoding="utf-8"
+    ) as f:
         boxplots_data["bottom_text"] = f.read()
 
     if language == "english":
-        boxplots_data[
-            "title"
-        ] = "How Does the CoVid-19 Pandemic Affect Childcare?"
+        boxplots_data["title"] = "How Does the CoVid-19 Pandemic Affect Childcare?"
     elif language == "german":
         boxplots_data[
             "title"
@@ -1,13 +1,13 @@
 from bokeh.models import Div
 
 
-def prepare_data(data, variables, bg_vars, nice_names, labels):
+def prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string):
     return {"shares": {}, "selectors": {}}
 
 
-def setup_plot(shares, selectors, bg_var):
+def setup_plot(shares, selectors, bg_var, nothing_string):
     return Div(text="This group is not being plotted at the moment.")
 
 
-def condition_plot(plot, selectors, bg_var, n_categories):
+def condition_plot(plot, shares, selectors, bg_var, nothing_string):
     pass
@@ -5,22 +5,29 @@ from bokeh.layouts import Row
 from bokeh.models import Select
 from bokeh.models.widgets import Div
 
+from utilities.dashboard.callback_metrics import instrument_callback
 from utilities.dashboard.components.run_charts.lineplot import setup_plot
 from utilities.dashboard.components.run_charts.lineplot import update_plot
 from utilities.dashboard.config import PLOT_WIDTH
 from utilities.dashboard.config import TITLE_STYLE
 from utilities.dashboard.shared import adjust_lower_level_selection_menu_to_higher_level
+from utilities.dashboard.view_state import view_value
 
 
-def create_run_charts(data, variable_mappings, language, menu_labels):
+def create_run_charts(data, variable_mappings, language, menu_labels, view=None):
     """Create the labor supply tab, showing run charts for selected outcome and
     background variables..
 
+    If the run charts data has a panel, the sample can also be split by a second
+    background variable and by the query background variables.
+
     Args:
-        data (dict): Dictionary of run charts data.
+        data (RunChartsStore): Run charts data.
         variable_mappings (dict): Dictionary of maps metadata.
         language (string): english or german.
         menu_labels (dict): Dictionary of menu labels.
+        view (dict): Initial selection, see ``view_state.parse_view_state``.
+            Default is the first outcome and background variable.
 
     Returns:
         bokeh Column
@@ -34,47 +41,68 @@ def create_run_charts(data, variable_mappings, language, menu_labels):
     dict_var = variable_mappings["outcome_variable_to_nice_name"]
     dict_bg_var = variable_mappings["background_variable_to_nice_name"]
 
-    outcome_variable = outcome_variables[0]
-    background_variable = background_variables[0]
+    if data.panel is not None:
+        background_variables = background_variables + variable_mappings.get(
+            "query_background_variables", []
+        )
+
+    outcome_options = [dict_var[var] for var in outcome_variables]
+    background_options = [dict_bg_var[var] for var in background_variables]
+    outcome_variable = nice_name_to_outcome[
+        view_value(view, "outcome", outcome_options)
+    ]
+    background_variable = nice_name_to_background[
+        view_value(view, "bg_var", background_options)
+    ]
 
     selection_menus = [
         Select(
             title=menu_labels["outcome"],
-            options=[dict_var[var] for var in outcome_variables],
+            options=outcome_options,
             value=dict_var[outcome_variable],
             name="outcome_variable_selector",
             width=220,
         ),
         Select(
             title=menu_labels["split_by"],
-            options=[dict_bg_var[var] for var in background_variables],
+            options=background_options,
             value=dict_bg_var[background_variable],
             name="background_variable_selector",
             width=220,
         ),
     ]
+    if data.panel is not None:
+        selection_menus.append(
+            Select(
+                title=menu_labels["and_by"],
+                options=background_options,
+                value=view_value(view, "bg_var_2", background_options),
+                name="second_background_variable_selector",
+                width=220,
+            )
+        )
 
     run_chart = setup_plot(
-        data_dict=data["data"],
-        selectors=data["selectors"],
-        bounds=data["bounds"],
-        nice_names_dict=data["nice_names"],
+        store=data,
         variable=outcome_variable,
-        bg_var=background_variable,
         language=language,
+        **_selected_background_variables(selection_menus, nice_name_to_background),
     )
 
     title = Div(
-        text=data["title"], style=TITLE_STYLE, margin=(10, 0, 10, 0), width=PLOT_WIDTH
+        text=data.texts["title"],
+        style=TITLE_STYLE,
+        margin=(10, 0, 10, 0),
+        width=PLOT_WIDTH,
     )
     top_text = Div(
-        text=data["top_text"],
+        text=data.texts["top_text"],
         margin=(10, 0, 10, 0),
         style={"text-align": "justify"},
         width=PLOT_WIDTH,
     )
     bottom_text = Div(
-        text=data["bottom_text"],
+        text=data.texts["bottom_text"],
         margin=(10, 0, 10, 0),
         style={"text-align": "justify"},
         width=PLOT_WIDTH,
@@ -84,12 +112,7 @@ def create_run_charts(data, variable_mappings, language, menu_labels):
         title, top_text, Row(*selection_menus), run_chart, bottom_text
     )
 
-    update_func = partial(
-        update_plot,
-        selectors=data["selectors"],
-        bounds=data["bounds"],
-        nice_names_dict=data["nice_names"],
-    )
+    update_func = partial(update_plot, store=data)
 
     _add_run_charts_callbacks(
         run_charts_page,
@@ -97,7 +120,7 @@ def create_run_charts(data, variable_mappings, language, menu_labels):
         update_func,
         nice_name_to_background,
         nice_name_to_outcome,
-        data["bounds"],
+        data,
     )
 
     return run_charts_page
@@ -109,7 +132,7 @@ def _add_run_charts_callbacks(
     update_func,
     nice_name_to_background,
     nice_name_to_outcome,
-    bounds,
+    store,
 ):
     # get selectors (0: Outcome variables, 1: Background variables)
     run_charts_selectors = run_charts_page.children[2].children
@@ -121,10 +144,12 @@ def _add_run_charts_callbacks(
         nice_name_to_outcome=nice_name_to_outcome,
         selection_menus=selection_menus,
         update_func=update_func,
-        bounds=bounds,
+        store=store,
     )
 
-    run_charts_selectors[0].on_change("value", outcome_variable_callback)
+    run_charts_selectors[0].on_change(
+        "value", instrument_callback(outcome_variable_callback, "run_charts")
+    )
 
     background_variable_callback = partial(
         update_background_variable,
@@ -133,10 +158,13 @@ def _add_run_charts_callbacks(
         nice_name_to_outcome=nice_name_to_outcome,
         selection_menus=selection_menus,
         update_func=update_func,
-        bounds=bounds,
+        store=store,
     )
 
-    run_charts_selectors[1].on_change("value", background_variable_callback)
+    for selector in run_charts_selectors[1:]:
+        selector.on_change(
+            "value", instrument_callback(background_variable_callback, "run_charts")
+        )
 
 
 def update_outcome_variable(
@@ -148,17 +176,14 @@ def update_outcome_variable(
     nice_name_to_outcome,
     selection_menus,
     update_func,
-    bounds,
+    store,
 ):
-    bg_var = nice_name_to_background[selection_menus[1].value]
     variable = nice_name_to_outcome[new]
     update_func(
         plot=run_charts_page.children[3],
-        bg_var=bg_var,
         variable=variable,
+        **_selected_background_variables(selection_menus, nice_name_to_background),
     )
-    run_charts_page.children[3].y_range.start = bounds[(variable, "min_outcome")]
-    run_charts_page.children[3].y_range.end = bounds[(variable, "max_outcome")]
     selection_menus[0].value = new
 
 
@@ -171,15 +196,18 @@ def update_background_variable(
     nice_name_to_outcome,
     selection_menus,
     update_func,
-    bounds,
+    store,
 ):
-    bg_var = nice_name_to_background[new]
     variable = nice_name_to_outcome[selection_menus[0].value]
     update_func(
         plot=run_charts_page.children[3],
         variable=variable,
-        bg_var=bg_var,
+        **_selected_background_variables(selection_menus, nice_name_to_background),
     )
-    run_charts_page.children[3].y_range.start = bounds[(variable, "min_outcome")]
-    run_charts_page.children[3].y_range.end = bounds[(variable, "max_outcome")]
-    selection_menus[1].value = new
+
+
+def _selected_background_variables(selection_menus, nice_name_to_background):
+    """Return the background variables of the selectors as keyword arguments."""
+    bg_vars = [nice_name_to_background[menu.value] for menu in selection_menus[1:]]
+    bg_var_2 = bg_vars[1] if len(bg_vars) > 1 else "None"
+    return {"bg_var": bg_vars[0], "bg_var_2": bg_var_2}
@@ -1,8 +1,12 @@
+from utilities.dashboard.components.run_charts.lineplot import _preprocess_data
 from utilities.dashboard.components.run_charts.lineplot import prepare_data
+from utilities.dashboard.components.run_charts.panel_store import write_panel_store
 from utilities.dashboard.config import RUN_CHARTS_DIR
 
 
-def create_run_charts_data(data, variable_mappings, nice_names, language):
+def create_run_charts_data(
+    data, variable_mappings, nice_names, language, outcomes=None
+):
     """Create data needed to generate run charts tab.
 
     Args:
@@ -10,12 +14,16 @@ def create_run_charts_data(data, variable_mappings, nice_names, language):
         variable_mappings (dict): Dictionary of run charts metadata.
         nice_names (dict): Dictionary mapping variables' names to nice names.
         language (string): english or german.
+        outcomes (list): Only create the run charts of these outcome variables.
+            Default is None, i.e. all outcome variables.
 
     Returns:
         dict: Dictionary containing all data needed to generate the run charts.
 
     """
     variables = variable_mappings["outcome_variables"]
+    if outcomes is not None:
+        variables = [var for var in variables if var in outcomes]
     bg_vars = variable_mappings["background_variables"]
 
     run_charts_data = prepare_data(
@@ -33,7 +41,9 @@ def create_run_charts_data(data, variable_mappings, nice_names, language):
         with open(metadata_path / f"top_text_english.txt", "r", encoding="utf-8") as f:
             run_charts_data["top_text"] = f.read()
 
-        with open(metadata_path / f"bottom_text_english.txt", "r", encoding="utf-8") as f:
+        with open(
+            metadata_path / f"bottom_text_english.txt", "r", encoding="utf-8"
+        ) as f:
             run_charts_data["bottom_text"] = f.read()
 
         run_charts_data[
@@ -44,7 +54,9 @@ def create_run_charts_data(data, variable_mappings, nice_names, language):
         with open(metadata_path / f"top_text_german.txt", "r", encoding="utf-8") as f:
             run_charts_data["top_text"] = f.read()
 
-        with open(metadata_path / f"bottom_text_german.txt", "r", encoding="utf-8") as f:
+        with open(
+            metadata_path / f"bottom_text_german.txt", "r", encoding="utf-8"
+        ) as f:
             run_charts_data["bottom_text"] = f.read()
 
         run_charts_data[
@@ -52,3 +64,31 @@ def create_run_charts_data(data, variable_mappings, nice_names, language):
         ] = "Wie wirkt sich die CoVid-19-Pandemie auf den Arbeitsmarkt aus?"
 
     return run_charts_data
+
+
+def write_run_charts_panel(data, variable_mappings, data_dir):
+    """Write the panel from which the dashboard computes splits on demand.
+
+    The panel holds the outcome variables and the background and query background
+    variables of the run charts, restricted and renamed like the data of the
+    precomputed lines.
+
+    Args:
+        data (pd.DataFrame): Raw dataframe to process.
+        variable_mappings (dict): Dictionary of run charts metadata.
+        data_dir (pathlib.Path): Dashboard data directory.
+
+    """
+    outcomes = variable_mappings["outcome_variables"]
+    bg_vars = (
+        variable_mappings["background_variables"]
+        + variable_mappings["query_background_variables"]
+    )
+    panel = _preprocess_data(data, outcomes, bg_vars, period=["month"])
+    write_panel_store(
+        panel=panel,
+        data_dir=data_dir,
+        period="month",
+        outcomes=outcomes,
+        bg_vars=[var for var in bg_vars if var != "None"],
+    )
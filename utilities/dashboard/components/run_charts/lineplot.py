@@ -1,12 +1,8 @@
-import io
 import itertools
-import textwrap
 
 import numpy as np
 import pandas as pd
-from bokeh.io import output_notebook
 from bokeh.models import ColumnDataSource
-from bokeh.models import DatetimeTickFormatter
 from bokeh.models import GlyphRenderer
 from bokeh.models import HoverTool
 from bokeh.models import Legend
@@ -14,12 +10,10 @@ from bokeh.models import LegendItem
 from bokeh.models import Line
 from bokeh.models import Range1d
 from bokeh.plotting import figure
-from bokeh.plotting import show
 from pandas.api.types import is_datetime64_any_dtype as is_datetime
-from pandas.core.common import flatten
 
-from utilities.colors import get_colors
-from utilities.colors import plot_colors
+from utilities.dashboard.instrumentation import span
+from utilities.palettes import get_colors
 
 
 def prepare_data(data, period, variables, bg_vars, nice_names, language):
@@ -37,21 +31,28 @@ def prepare_data(data, period, variables, bg_vars, nice_names, language):
         language (string): german or english
 
     Returns:
-        dict: A dictionary that contains all the possible lineplot points.
+        dict: A dictionary that contains all the possible lineplot points as
+            float32 arrays.
 
     """
-    data = _preprocess_data(data, variables, bg_vars, period=[period])
+    with span("preprocess"):
+        data = _preprocess_data(data, variables, bg_vars, period=[period])
 
     res = {"data": {}, "selectors": {}, "bounds": {}}
 
     for var, bg_var in itertools.product(variables, bg_vars):
         # add data to the result dictionary
-        if bg_var != "None":
-            new = data.groupby([period, bg_var])[var].mean().unstack()
-            new = {(var, col, bg_var): new[col].tolist() for col in new.columns}
-
-        else:
-            new = {(var, None, None): data.groupby(period)[var].mean().tolist()}
+        with span(f"{var} by {bg_var}"):
+            if bg_var != "None":
+                new = data.groupby([period, bg_var])[var].mean().unstack()
+                new = {
+                    (var, col, bg_var): new[col].to_numpy(np.float32)
+                    for col in new.columns
+                }
+
+            else:
+                means = data.groupby(period)[var].mean()
+                new = {(var, None, None): means.to_numpy(np.float32)}
 
         res["data"].update(new)
 
@@ -74,9 +75,13 @@ def prepare_data(data, period, variables, bg_vars, nice_names, language):
             selectors = [(var, bg_var)]
         res["selectors"][(var, bg_var)] = selectors
 
-    # add y-axis bounds
+    # add y-axis bounds, collecting the lines of each variable in one pass
+    lines = {}
+    for key, values in res["data"].items():
+        if key != "period":
+            lines.setdefault(key[0], []).append(values)
     for var in variables:
-        ylim_min, ylim_max = _compute_ylim(res["data"], var)
+        ylim_min, ylim_max = _compute_ylim(lines[var])
         res["bounds"][(var, "min_outcome")] = ylim_min
         res["bounds"][(var, "max_outcome")] = ylim_max
 
@@ -86,11 +91,11 @@ def prepare_data(data, period, variables, bg_vars, nice_names, language):
     return res
 
 
-def _compute_ylim(data_dict, variable):
-    """Compute limits of y-axis, given outcome variable."""
-    l = [v for k, v in data_dict.items() if k[0] == variable]
-    ylim_max = np.nanmax(list(flatten(l)))
-    ylim_min = np.nanmin(list(flatten(l)))
+def _compute_ylim(arrays):
+    """Compute limits of y-axis, given the lines of an outcome variable."""
+    l = np.concatenate(arrays)
+    ylim_max = float(np.nanmax(l))
+    ylim_min = float(np.nanmin(l))
 
     padding = 0.1 * (ylim_max - ylim_min)
 
@@ -112,7 +117,7 @@ def _preprocess_data(df, outcome_vars, bg_vars, period):
         pd.DataFrame: Formatted dataset.
 
     """
-    df.reset_index(level="month", inplace=True)
+    df = df.reset_index(level="month")
     df = df[df["month"] != "2019-11-01"]
     df = df[(df.age <= 66) & (df.age >= 18) & (df.max_hours_total >= 10)]
     _bg_vars = bg_vars.copy()
@@ -153,87 +158,104 @@ def _preprocess_data(df, outcome_vars, bg_vars, period):
     return df
 
 
-def setup_plot(
-    data_dict,
-    selectors,
-    bounds,
-    variable,
-    bg_var,
-    nice_names_dict,
-    language,
-):
+def setup_plot(store, variable, bg_var, language, bg_var_2="None"):
     """Create the basic plot.
 
+    If the store has a panel, the plot also gets a fixed pool of lines for the
+    splits that are computed from it, see :func:`_add_query_lines`.
+
     Args:
-        data_dict (dict): Maps a combination of variable and value of
-            a background variable to points that form the lineplot.
-        selectors (dict): Maps a combination of variable and background
-            variable to a list of keys of the data_dict.
-        bounds (dict): Maps a combination of variable and bounds value needed to
-            adjust the plot's y-axis.
+        store (RunChartsStore): Run charts data, e.g. ``RunChartsStore`` of the
+            result of :func:`prepare_data`.
         variable (str): Name of the variable that will be shown intially.
         bg_var (str): Name of the initially selected background variable.
-        nice_names_dict (dict): Dictionary mapping variables to nice names.
         language (string): german or english
+        bg_var_2 (str): Name of the initially selected second background
+            variable. Default is "None".
 
     Returns:
         bokeh.figure: Basic plot.
 
     """
-    fig = figure(x_range=data_dict["period"], frame_width=535, frame_height=300)
+    fig = figure(x_range=store.periods, frame_width=535, frame_height=300)
     fig.toolbar_location = None
 
-    for col in data_dict:
-        if col != "period":
-
-            cat = f"{col[-1]}_{col[1]}"  # string identifying bg_var and cat
-            obs = len(data_dict["period"])
-
-            source = ColumnDataSource(
-                dict(
-                    x=data_dict["period"],
-                    y=data_dict[col],
-                    # Is there any better way of doing this?
-                    cat=[nice_names_dict.get(cat)] * obs,
-                )
-            )
-
-            r = fig.line(
-                source=source,
-                y="y",
-                x="x",
-                # Need to string each element because
-                # 'join' method cannot handle None
-                name="-".join(str(i) for i in col),
-                line_width=3,
-            )
-
-            _add_HoverTool(fig, r, col, nice_names_dict, language)
+    # all lines share the periods, so they share one source with one column each
+    lines = store.line_keys()
+    ys = {f"y{k}": store.data[col] for k, col in enumerate(lines)}
+    source = ColumnDataSource({"x": store.periods, **ys})
+
+    for k, col in enumerate(lines):
+        r = fig.line(
+            source=source,
+            y=f"y{k}",
+            x="x",
+            # Need to string each element because
+            # 'join' method cannot handle None
+            name="-".join(str(i) for i in col),
+            line_width=3,
+        )
+
+        _add_HoverTool(fig, r, col, f"y{k}", store.nice_names, language)
+
+    if store.panel is not None:
+        _add_query_lines(fig, store, language)
 
     _apply_styling(fig)
 
-    update_plot(fig, selectors, bounds, variable, bg_var, nice_names_dict)
+    update_plot(fig, store, variable, bg_var, bg_var_2)
 
     return fig
 
 
-def _add_HoverTool(p, renderers, col, nice_names_dict, language):
+def _add_query_lines(p, store, language):
+    """Add hidden lines that show the splits computed from the panel.
+
+    There are as many lines as the largest split by two variables has, so showing a
+    split only updates their data source and never adds models to the document.
+
+    """
+    n_lines = store.panel.max_lines(2)
+    empty = np.full(len(store.periods), np.nan, dtype=np.float32)
+    data = {"x": store.periods}
+    for k in range(n_lines):
+        data[f"q{k}"] = empty
+        data[f"l{k}"] = [""] * len(store.periods)
+    source = ColumnDataSource(data, name="query_lines")
+
+    if language == "german":
+        labels = ["Datum der Umfrage", "Gruppe", "Mittelwert"]
+    else:
+        labels = ["Date of survey", "Group", "Mean"]
+
+    for k in range(n_lines):
+        r = p.line(source=source, y=f"q{k}", x="x", name=f"query-{k}", line_width=3)
+        r.visible = False
+        tooltips = list(zip(labels, ["@x", f"@l{k}", f"@q{k}"]))
+        p.add_tools(HoverTool(renderers=[r], tooltips=tooltips))
+
+    return p
+
+
+def _add_HoverTool(p, renderers, col, y, nice_names_dict, language):
     """Add HoverTool to main plot."""
     bg_var_name = col[-1]
     var_name = col[0]
+    # the category is the same for all points of a line
+    cat = nice_names_dict.get(f"{col[-1]}_{col[1]}")
 
     if language == "german":
         TOOLTIPS = [
-            (nice_names_dict.get(var_name), "@y"),
+            (nice_names_dict.get(var_name), f"@{y}"),
             ("Datum der Umfrage", "@x"),
-            (nice_names_dict.get(bg_var_name), "@cat"),
+            (nice_names_dict.get(bg_var_name), str(cat)),
         ]
-        
-    else: 
+
+    else:
         TOOLTIPS = [
-            (nice_names_dict.get(var_name), "@y"),
+            (nice_names_dict.get(var_name), f"@{y}"),
             ("Date of survey", "@x"),
-            (nice_names_dict.get(bg_var_name), "@cat"),
+            (nice_names_dict.get(bg_var_name), str(cat)),
         ]
 
     kwargs = {"tooltips": TOOLTIPS[:-1]} if col[1] is None else {"tooltips": TOOLTIPS}
@@ -283,20 +305,20 @@ def _apply_styling(p):
     return p
 
 
-def update_plot(plot, selectors, bounds, variable, bg_var, nice_names_dict):
+def update_plot(plot, store, variable, bg_var, bg_var_2="None"):
     """Activate and de-activate the lines according to variable and bg_var.
 
+    Splits that were not precomputed are shown with the query lines of the plot.
+
     Args:
         plot (bokeh.figure): The plot that will be updated.
-        selectors (dict): Maps tuples of (variable, bg_var) to a a list
-            of active lines
-        bounds (dict): Maps a combination of variable and bounds needed to
-            adjust the plot's y-axis.
+        store (RunChartsStore): Run charts data.
         variable (str): Name of the selected variable (this corresponds
             to a key in the data dictionary).
         bg_var (str): Name of the background variable. Only used to select
             lines.
-        nice_names_dict (dict): Dictionary mapping variables to nice names.
+        bg_var_2 (str): Name of the second background variable. Default is
+            "None". Other values require a store with a panel.
 
     Returns:
         bokeh.figure
@@ -307,29 +329,71 @@ def update_plot(plot, selectors, bounds, variable, bg_var, nice_names_dict):
 
     legend_items = []
     color_iterator = _get_color_iterator()
-
-    for sel, color in zip(selectors[(variable, bg_var)], color_iterator):
-        name = "-".join(str(i) for i in (*sel, bg_var))
-        lines = plot.select({"name": name})
-
-        lines.glyph.line_color = color
-        lines.visible = True
-
-        # store legend items
-        if bg_var != "None":
-            cat = nice_names_dict.get(f"{bg_var}_{sel[1]}")
-            item = (cat, lines)
-            legend_items.append(item)
+    nice_names_dict = store.nice_names
+    ylim = store.ylim(variable)
+
+    if store.precomputed(variable, bg_var, bg_var_2):
+        for key, color in zip(store.lines(variable, bg_var), color_iterator):
+            name = "-".join(str(i) for i in key)
+            lines = plot.select({"name": name})
+
+            lines.glyph.line_color = color
+            lines.visible = True
+
+            # store legend items
+            if bg_var != "None":
+                cat = nice_names_dict.get(f"{bg_var}_{key[1]}")
+                item = (cat, lines)
+                legend_items.append(item)
+    else:
+        split_lines = store.split_lines(variable, bg_var, bg_var_2)
+        bg_vars = [v for v in dict.fromkeys([bg_var, bg_var_2]) if v != "None"]
+        legend_items = _update_query_lines(
+            plot, split_lines, bg_vars, nice_names_dict, color_iterator
+        )
+        values = [v for v in split_lines.values() if not np.isnan(v).all()]
+        if values:
+            ylim_min, ylim_max = _compute_ylim(values)
+            ylim = (min(ylim[0], ylim_min), max(ylim[1], ylim_max))
 
     _add_legend(plot, legend_items)
 
     # update y-axis label and y-axis range
-    if plot.yaxis.axis_label != nice_names_dict[variable]:
-        _update_yaxis(plot, bounds, variable, nice_names_dict)
+    _update_yaxis(plot, store, variable, ylim)
 
     return plot
 
 
+def _update_query_lines(p, split_lines, bg_vars, nice_names_dict, color_iterator):
+    """Show the lines of a split from the panel with the query lines of the plot."""
+    source = p.select_one({"name": "query_lines"})
+    n_periods = len(source.data["x"])
+    n_lines = sum(name.startswith("q") for name in source.data)
+    data = {"x": source.data["x"]}
+    for k in range(n_lines):
+        data[f"q{k}"] = np.full(n_periods, np.nan, dtype=np.float32)
+        data[f"l{k}"] = [""] * n_periods
+
+    legend_items = []
+    lines = zip(split_lines.items(), color_iterator)
+    for k, ((cats, values), color) in enumerate(lines):
+        label = ", ".join(
+            str(nice_names_dict.get(f"{bg_var}_{cat}", cat))
+            for bg_var, cat in zip(bg_vars, cats)
+        )
+        data[f"q{k}"] = values
+        data[f"l{k}"] = [label] * n_periods
+
+        line = p.select_one({"name": f"query-{k}"})
+        line.glyph.line_color = color
+        line.visible = True
+        if bg_vars:
+            legend_items.append((label, [line]))
+
+    source.data = data
+    return legend_items
+
+
 def _get_color_iterator():
     """Get color iterator."""
     palette = get_colors("categorical", number=12)
@@ -339,9 +403,15 @@ def _get_color_iterator():
 
 
 def _add_legend(p, legend_items):
-    """Add legend to plot, given legend items."""
+    """Show legend items in the legend of the plot.
+
+    The legend is created on the first call and its items are replaced afterwards,
+    so updates do not accumulate legends in the document.
+
+    """
     if p.legend:
-        p.legend.visible = False
+        p.legend.items = legend_items
+        return p
 
     legend = Legend(
         items=legend_items,
@@ -356,11 +426,12 @@ def _add_legend(p, legend_items):
     return p
 
 
-def _update_yaxis(p, bounds, variable, nice_names_dict):
+def _update_yaxis(p, store, variable, ylim):
     """Update lineplot y-axis according to the outcome variables selected."""
-    p.yaxis.axis_label = nice_names_dict[variable]
+    if p.yaxis.axis_label != store.nice_names[variable]:
+        p.yaxis.axis_label = store.nice_names[variable]
 
-    p.y_range.start = bounds[(variable, "min_outcome")]
-    p.y_range.end = bounds[(variable, "max_outcome")]
+    if (p.y_range.start, p.y_range.end) != ylim:
+        p.y_range.start, p.y_range.end = ylim
 
     return p
@@ -0,0 +1,194 @@
+"""Run chart lines of any split, computed on demand from the panel.
+
+The run charts data only holds the lines of the background variables in
+``run_charts_description.csv``. With ``--run_chart_panel``, the build also writes the
+preprocessed panel of ``lineplot._preprocess_data`` to an SQLite file next to the
+pickles, with an index per background variable. A :class:`PanelStore` computes the
+mean of an outcome per period for any background variable or pair of background
+variables from it, including the "Query Background Variable" rows of the description,
+whose lines are not precomputed. Results are cached per store.
+
+Connections are opened per process, so a store can be created before the server
+forks its workers.
+
+"""
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+PANEL_STORE_NAME = "dashboard_data_waves_panel.sqlite"
+
+PANEL_FORMAT = 1
+
+# splits by outcome that are kept per store
+QUERY_CACHE_SIZE = 256
+
+
+def panel_store_path(data_dir):
+    return Path(data_dir) / PANEL_STORE_NAME
+
+
+def write_panel_store(panel, data_dir, period, outcomes, bg_vars):
+    """Write the preprocessed run charts panel to an indexed SQLite file.
+
+    The file is written next to the pickles and replaces an existing one at once, so
+    readers never see a partial file.
+
+    Args:
+        panel (pandas.DataFrame): Panel as returned by ``lineplot._preprocess_data``.
+        data_dir (str or pathlib.Path): Dashboard data directory.
+        period (str): Name of the time period column.
+        outcomes (list): Outcome variables.
+        bg_vars (list): Background variables, without "None".
+
+    """
+    periods = sorted(panel[period].unique())
+    table = panel[outcomes + bg_vars].copy()
+    table.insert(0, "period", panel[period].map({p: i for i, p in enumerate(periods)}))
+    for bg_var in bg_vars:
+        sr = table[bg_var].astype(object)
+        table[bg_var] = sr.where(sr.isnull(), sr.astype(str))
+    meta = {
+        "format": PANEL_FORMAT,
+        "n_periods": len(periods),
+        "outcomes": outcomes,
+        "background_variables": {
+            bg_var: sorted(table[bg_var].dropna().unique()) for bg_var in bg_vars
+        },
+    }
+
+    path = panel_store_path(data_dir)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    connection = sqlite3.connect(tmp_path)
+    try:
+        table.to_sql("panel", connection, index=False)
+        for k, bg_var in enumerate(bg_vars):
+            connection.execute(
+                f"CREATE INDEX panel_bg_{k} ON panel ({_quote(bg_var)}, period)"
+            )
+        connection.execute("CREATE INDEX panel_period ON panel (period)")
+        connection.execute("CREATE TABLE meta (value TEXT)")
+        connection.execute("INSERT INTO meta VALUES (?)", (json.dumps(meta),))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+def open_panel_store(data_dir):
+    """Return the :class:`PanelStore` of data_dir, or None if it has no panel."""
+    path = panel_store_path(data_dir)
+    return PanelStore(path) if path.exists() else None
+
+
+class PanelStore:
+    """Mean outcomes per period of any split of the run charts panel.
+
+    Args:
+        path (str or pathlib.Path): SQLite file written by
+            :func:`write_panel_store`.
+
+    Attributes:
+        n_periods (int): Number of periods of every line.
+        outcomes (list): Outcome variables.
+        categories (dict): Maps the background variables to their sorted
+            categories.
+
+    """
+
+    __slots__ = (
+        "path",
+        "n_periods",
+        "outcomes",
+        "categories",
+        "means",
+        "_connection",
+        "_pid",
+        "_lock",
+    )
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        with self._lock:
+            (raw,) = self._connect().execute("SELECT value FROM meta").fetchone()
+        meta = json.loads(raw)
+        if meta["format"] != PANEL_FORMAT:
+            raise ValueError(
+                f"{self.path} has panel format {meta['format']}, expected "
+                f"{PANEL_FORMAT}. Rebuild the dashboard data with --run_chart_panel."
+            )
+        self.n_periods = meta["n_periods"]
+        self.outcomes = meta["outcomes"]
+        self.categories = meta["background_variables"]
+        self.means = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._means)
+
+    def max_lines(self, n_splits=2):
+        """Return the largest number of lines of a split by n_splits variables."""
+        counts = sorted((len(c) for c in self.categories.values()), reverse=True)
+        return int(np.prod(counts[:n_splits])) if counts else 1
+
+    def _means(self, outcome, bg_vars):
+        """Return the mean of outcome per period and combination of categories.
+
+        Like ``lineplot.prepare_data``, rows with a missing category are dropped
+        and missing outcomes are ignored.
+
+        Args:
+            outcome (str): Outcome variable.
+            bg_vars (tuple): Background variables. An empty tuple gives the mean
+                of the whole sample.
+
+        Returns:
+            dict: Maps tuples of categories, in the order of bg_vars, to float32
+                arrays with one value per period. The tuples are sorted.
+
+        """
+        unknown = [
+            var
+            for var in (outcome, *bg_vars)
+            if var not in self.outcomes and var not in self.categories
+        ]
+        if unknown:
+            raise KeyError(f"{unknown} are not in the run charts panel {self.path}.")
+
+        columns = [_quote(bg_var) for bg_var in bg_vars]
+        where = " AND ".join(f"{column} IS NOT NULL" for column in columns)
+        query = (
+            f"SELECT {', '.join(columns + ['period'])}, AVG({_quote(outcome)}) "
+            f"FROM panel {'WHERE ' + where if where else ''} "
+            f"GROUP BY {', '.join(columns + ['period'])}"
+        )
+        with self._lock:
+            rows = self._connect().execute(query).fetchall()
+
+        res = {}
+        for *cats, period, mean in rows:
+            if tuple(cats) not in res:
+                res[tuple(cats)] = np.full(self.n_periods, np.nan, dtype=np.float32)
+            res[tuple(cats)][period] = np.nan if mean is None else mean
+        return dict(sorted(res.items()))
+
+    def _connect(self):
+        # SQLite connections must not be used across a fork
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
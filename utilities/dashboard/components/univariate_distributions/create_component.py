@@ -1,43 +1,42 @@
 from functools import partial
 
+from bokeh.io import curdoc
 from bokeh.layouts import Column
 from bokeh.layouts import Row
 from bokeh.models import Select
 from bokeh.models.widgets import Div
 
-from utilities.dashboard.components.univariate_distributions import barplot
-from utilities.dashboard.components.univariate_distributions import distplot
-from utilities.dashboard.components.univariate_distributions import stacked_barplot
+from utilities.dashboard.callback_metrics import instrument_callback
+from utilities.dashboard.components.univariate_distributions.general_barplot import (
+    split_name,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    get_plot_type,
+)
+from utilities.dashboard.components.univariate_distributions.plot_types import (
+    plot_kwargs,
+)
 from utilities.dashboard.config import HEADER_STYLE
 from utilities.dashboard.config import PLOT_WIDTH
 from utilities.dashboard.config import TITLE_STYLE
+from utilities.dashboard.executor import ComponentExecutor
+from utilities.dashboard.executor import loading_indicator
 from utilities.dashboard.shared import adjust_lower_level_selection_menu_to_higher_level
 from utilities.dashboard.shared import create_caption_for_variable_group
-
-
-plot_modules = {
-    "stacked_barplot": stacked_barplot,
-    "barplot": barplot,
-    "distplot": distplot,
-}
+from utilities.dashboard.view_state import view_value
 
 
 def create_univariate_distributions(
-    group_to_plot_type,
-    background_variables,
-    variable_mappings,
-    plot_data,
-    menu_labels,
+    distributions, variable_mappings, menu_labels, view=None
 ):
     """Create the overview tab showing the distribution of any group of variables.
 
     Args:
-        group_to_plot_type (dict): Dictionary mapping group to type of plot
-            associated with it (stacked barplot, barplot, or distplot).
-        background_variables (list): List of background variables.
+        distributions (DistributionsStore): Plot data and plot type of each group.
         variable_mappings (dict): Dictionary of metadata.
-        plot_data (dict): Dictionary of shares and selectors.
         menu_labels (dict): Dictionary of menu labels.
+        view (dict): Initial selection, see ``view_state.parse_view_state``.
+            Default is the first group without a split.
 
     Returns:
         bokeh Column
@@ -56,11 +55,13 @@ def create_univariate_distributions(
     for g, variables in group_to_variables.items():
         group_to_nicenames[g] = [variable_to_nice_name[var] for var in variables]
     # start values
-    topic = topics[0]
+    nothing_string = menu_labels["nothing_category"]
+    topic = view_value(view, "topic", topics)
     subtopics = topic_to_groups[topic]
-    group = subtopics[0]
-    plot_type = group_to_plot_type[group]
-    setup_plot = getattr(plot_modules[plot_type], "setup_plot")
+    group = view_value(view, "subtopic", subtopics)
+    background_variables = distributions.background_variables
+    background_options = [nothing_string] + background_variables
+    record = distributions.group(group)
 
     create_caption = partial(
         create_caption_for_variable_group,
@@ -88,33 +89,54 @@ def create_univariate_distributions(
         ),
         Select(
             title=menu_labels["split_by"],
-            options=[menu_labels["nothing_category"]] + background_variables,
-            value=menu_labels["nothing_category"],
+            options=background_options,
+            value=view_value(view, "bg_var", background_options),
+            name="background_variable_selector",
             width=100,
         ),
+        Select(
+            title=menu_labels["and_by"],
+            options=background_options,
+            value=view_value(view, "bg_var_2", background_options),
+            name="second_background_variable_selector",
+            width=100,
+            disabled=True,
+        ),
     ]
+    # restricts the second split, no callbacks are attached yet
+    _adjust_second_background_selector(
+        plot_selectors[2:], record.has_cube, nothing_string
+    )
+    bg_vars = tuple(selector.value for selector in plot_selectors[2:])
 
-    plot = setup_plot(
-        **plot_data[group],
-        bg_var=menu_labels["nothing_category"],
-        nothing_string=menu_labels["nothing_category"],
-    )  # noqa
+    plot = build_plot(record, bg_vars, nothing_string)[2]
     plot_caption = create_caption(group=group)
-    bg_info = Div(text="", margin=(10, 0, 10, 0), style=HEADER_STYLE)
+    bg_info = Div(
+        text=_background_info(
+            bg_vars, variable_to_label, nice_name_to_variable, nothing_string
+        ),
+        margin=(10, 0, 10, 0),
+        style=HEADER_STYLE,
+    )
 
     title = Div(
-        text=plot_data["title"], style=TITLE_STYLE, margin=(10, 0, 10, 0), width=PLOT_WIDTH
+        text=distributions.texts["title"],
+        style=TITLE_STYLE,
+        margin=(10, 0, 10, 0),
+        width=PLOT_WIDTH,
     )
     plot_intro = Div(
-        text=plot_data["plot_intro"],
+        text=distributions.texts["plot_intro"],
         margin=(10, 0, 10, 0),
         style={"text-align": "justify"},
         width=PLOT_WIDTH,
     )
 
+    loading = loading_indicator(menu_labels)
     plot_page = Column(
-        title, plot_intro,
-        Row(*plot_selectors),
+        title,
+        plot_intro,
+        Row(*plot_selectors, loading),
         plot,
         plot_caption,
         bg_info,
@@ -126,31 +148,48 @@ def create_univariate_distributions(
         high_to_lower=topic_to_groups,
         lower_selector=plot_selectors[1],
     )
-    plot_selectors[0].on_change("value", topic_callback)
+    plot_selectors[0].on_change(
+        "value", instrument_callback(topic_callback, "univariate_distributions")
+    )
+
+    # the plot in the page: its group and whether it shows a derived split
+    shown = {"group": group, "derived": bg_vars[1] != nothing_string}
+    executor = ComponentExecutor(
+        curdoc(), "univariate_distributions", indicator=loading
+    )
 
     subtopic_callback = partial(
         set_subtopic,
-        plot_data=plot_data,
+        distributions=distributions,
         page=plot_page,
         background_selector=plot_selectors[2],
-        group_to_plot_type=group_to_plot_type,
         caption_callback=create_caption,
-        nothing_string=menu_labels["nothing_category"],
+        nothing_string=nothing_string,
+        shown=shown,
+        executor=executor,
+    )
+    plot_selectors[1].on_change(
+        "value", instrument_callback(subtopic_callback, "univariate_distributions")
     )
-    plot_selectors[1].on_change("value", subtopic_callback)
 
     background_var_callback = partial(
         condition_on_background_var,
         subtopic_selector=plot_selectors[1],
-        plot_data=plot_data,
+        background_selectors=plot_selectors[2:],
+        distributions=distributions,
         page=plot_page,
-        group_to_plot_type=group_to_plot_type,
         variable_to_label=variable_to_label,
         group_to_variables=group_to_variables,
         nice_name_to_variable=nice_name_to_variable,
-        nothing_string=menu_labels["nothing_category"],
+        nothing_string=nothing_string,
+        shown=shown,
+        executor=executor,
+    )
+    background_var_callback = instrument_callback(
+        background_var_callback, "univariate_distributions"
     )
     plot_selectors[2].on_change("value", background_var_callback)
+    plot_selectors[3].on_change("value", background_var_callback)
 
     return plot_page
 
@@ -159,27 +198,29 @@ def set_subtopic(
     attr,
     old,
     new,
-    group_to_plot_type,
-    plot_data,
+    distributions,
     page,
     background_selector,
     caption_callback,
     nothing_string,
+    shown,
+    executor,
 ):
     """Adjust title, header and plot to new subtopic."""
-    plot, caption, bg_info = page.children[-3:]
-
-    plot_type = group_to_plot_type[new]
-    setup_plot = getattr(plot_modules[plot_type], "setup_plot")
-
-    new_p = setup_plot(
-        **plot_data[new], bg_var=nothing_string, nothing_string=nothing_string
-    )
-    new_caption = caption_callback(group=new)
-
-    page.children[-3] = new_p
-    page.children[-2] = new_caption
-    background_selector.value = nothing_string
+    page.children[-2] = caption_callback(group=new)
+    if background_selector.value != nothing_string:
+        # the reset triggers condition_on_background_var, which shows the new group
+        background_selector.value = nothing_string
+    else:
+        show_plot(
+            page=page,
+            record=distributions.group(new),
+            group=new,
+            bg_vars=(nothing_string, nothing_string),
+            nothing_string=nothing_string,
+            shown=shown,
+            executor=executor,
+        )
 
 
 def condition_on_background_var(
@@ -187,34 +228,142 @@ def condition_on_background_var(
     old,
     new,
     subtopic_selector,
-    plot_data,
+    background_selectors,
+    distributions,
     page,
-    group_to_plot_type,
     variable_to_label,
     group_to_variables,
     nice_name_to_variable,
     nothing_string,
+    shown,
+    executor,
 ):
     """Adjust the plot and information on background variable according to the
     selected subtopic.
 
+    Splits by one background variable are precomputed. Splits by two background
+    variables are derived from the share cube of the group and kept by the store,
+    so all sessions share them.
+
     """
-    plot, caption, bg_info = page.children[-3:]
-    page.children = page.children[:-3]
     group = subtopic_selector.value
-    plot_type = group_to_plot_type[group]
-    condition_plot = getattr(plot_modules[plot_type], "condition_plot")
+    record = distributions.group(group)
+    if _adjust_second_background_selector(
+        background_selectors, record.has_cube, nothing_string
+    ):
+        # resetting the second selector triggered this callback again
+        return
 
-    condition_plot(
-        plot,
-        **plot_data[group],
-        bg_var=new,
-        nothing_string=nothing_string,
+    bg_vars = tuple(selector.value for selector in background_selectors)
+    page.children[-1].text = _background_info(
+        bg_vars, variable_to_label, nice_name_to_variable, nothing_string
+    )
+    show_plot(page, record, group, bg_vars, nothing_string, shown, executor)
+
+
+def show_plot(page, record, group, bg_vars, nothing_string, shown, executor):
+    """Show the plot of group, split by up to two background variables.
+
+    A new plot is built in the executor if the group changed, if a split by two
+    background variables is shown or requested or if the plot type cannot update a
+    plot in place. Otherwise, the plot in the page is conditioned on the new split.
+
+    Args:
+        page (bokeh Column): The tab. Its last three children are the plot, the
+            caption and the information on the background variables.
+        record (GroupRecord): Plot data of group.
+        group (str): The selected group.
+        bg_vars (tuple): Values of the two background selectors.
+        nothing_string (str): name of the "Nothing" category
+        shown (dict): Group of the plot in the page and whether it shows a derived
+            split. Updated once the plot is shown.
+        executor (ComponentExecutor): Executor of the component.
+
+    """
+    derived = bg_vars[1] != nothing_string
+    plot_type = get_plot_type(record.plot_type)
+    rebuild = (
+        derived
+        or shown["derived"]
+        or shown["group"] != group
+        or not plot_type.incremental
     )
 
-    if new == nothing_string:
-        bg_info.text = ""
+    def compute():
+        return build_plot(record, bg_vars, nothing_string, rebuild)
+
+    def apply(result):
+        group_data, selected, plot = result
+        old_plot, caption, bg_info = page.children[-3:]
+        if plot is None:
+            plot = old_plot
+            plot_type.condition_plot(
+                plot, **group_data, bg_var=selected, nothing_string=nothing_string
+            )
+        page.children = page.children[:-3] + [plot, caption, bg_info]
+        shown["group"] = group
+        shown["derived"] = derived
+
+    executor.submit(compute, apply)
+
+
+def build_plot(record, bg_vars, nothing_string, rebuild=True):
+    """Build the plot of a group, split by up to two background variables.
+
+    Args:
+        record (GroupRecord): Plot data of the group.
+        bg_vars (tuple): Values of the two background selectors.
+        nothing_string (str): name of the "Nothing" category
+        rebuild (bool): Whether to build a new plot. Default is True.
+
+    Returns:
+        tuple: The data of the split, the selected split and the plot, which is
+            None if rebuild is False.
+
+    """
+    bg_var, second_bg_var = bg_vars
+    if second_bg_var != nothing_string:
+        split = (bg_var, second_bg_var)
+        group_data = record.split_data(split, nothing_string)
+        selected = split_name(split)
     else:
-        bg_info.text = variable_to_label[nice_name_to_variable[new]]
+        group_data = plot_kwargs(record.data)
+        selected = bg_var
+    plot = None
+    if rebuild:
+        plot_type = get_plot_type(record.plot_type)
+        plot = plot_type.setup_plot(
+            **group_data, bg_var=selected, nothing_string=nothing_string
+        )
+        plot_type.condition_plot(
+            plot, **group_data, bg_var=selected, nothing_string=nothing_string
+        )
+    return group_data, selected, plot
+
+
+def _background_info(bg_vars, variable_to_label, nice_name_to_variable, nothing_string):
+    return "<br> <br>".join(
+        variable_to_label[nice_name_to_variable[var]]
+        for var in bg_vars
+        if var != nothing_string
+    )
+
 
-    page.children += [plot, caption, bg_info]
+def _adjust_second_background_selector(background_selectors, has_cube, nothing_string):
+    """Restrict the second split to groups with a share cube and other variables.
+
+    Returns:
+        bool: Whether the value of the second selector was reset.
+
+    """
+    first, second = background_selectors
+    second.disabled = not has_cube or first.value == nothing_string
+    second.options = [nothing_string] + [
+        opt for opt in first.options if opt not in (nothing_string, first.value)
+    ]
+    reset = second.value != nothing_string and (
+        second.disabled or second.value == first.value
+    )
+    if reset:
+        second.value = nothing_string
+    return reset
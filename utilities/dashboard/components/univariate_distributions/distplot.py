@@ -1,17 +1,26 @@
 import numpy as np
 import pandas as pd
+from bokeh.models import ColumnDataSource
+from bokeh.models import CustomJSTransform
 from bokeh.models import FactorRange
 from bokeh.models import HoverTool
 from bokeh.plotting import figure
 from pandas.api.types import is_categorical_dtype
 from pandas.api.types import is_integer_dtype
 from pandas.api.types import is_numeric_dtype
-from scipy.stats.kde import gaussian_kde
 
-from utilities.colors import get_colors
+from utilities.palettes import get_colors
 
+# shifts densities by the synthetic coordinate of their factor on the y range
+_OFFSET_BY_FACTOR_JS = """
+const offset = y_range.synthetic(factor)
+return xs.map((x) => x + offset)
+"""
 
-def prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string):
+
+def prepare_data(
+    data, variables, bg_vars, nice_names, labels, nothing_string, schema=None
+):
     """Create data for a distplot.
 
     Args:
@@ -25,26 +34,33 @@ def prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string):
         nice_names (dict): Maps variables to nice_names
         labels (dict): Maps variables to labels
         nothing_string (str): name of the "Nothing" category in English
+        schema (Schema): Schema of data. If given, the dtypes of the variables are
+            taken from it instead of the data.
 
 
     Returns:
         dict: Dictionary containing the kde data. The keys are 'x' as well
             as (variable, bg_value) for all such combinations.
             The values for x are gridpoints. The values for all other keys
-            are kerne density estimates.
+            are kerne density estimates, scaled such that they can be drawn
+            on a categorical y axis. All values are float32 arrays.
 
     """
     data = data.copy()
     variables = [variables] if not isinstance(variables, list) else variables
     bg_vars = [] if bg_vars is None else bg_vars
 
-    _check_variables_have_same_dtype(data, variables)
+    if schema is None:
+        dtypes = {var: data[var].dtype for var in variables + bg_vars}
+    else:
+        dtypes = schema.dtypes
+    _check_variables_have_same_dtype(dtypes, variables)
     for var in bg_vars:
-        assert is_categorical_dtype(data[var]), "bg_vars have to be categorical."
+        assert is_categorical_dtype(dtypes[var]), "bg_vars have to be categorical."
 
-    if is_categorical_dtype(data[variables[0]]):
+    if is_categorical_dtype(dtypes[variables[0]]):
         vartype = "categorical"
-    elif is_integer_dtype(data[variables[0]]):
+    elif is_integer_dtype(dtypes[variables[0]]):
         vartype = "integer"
     elif is_numeric_dtype:
         vartype = "float"
@@ -87,6 +103,9 @@ def prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string):
     raw_dist_data = {"x": x}
 
     if vartype == "float":
+        # scipy is only needed to build the data, not to serve the dashboard
+        from scipy.stats import gaussian_kde
+
         for var in variables:
             kde = gaussian_kde(data[var].dropna())(x).clip(0, np.inf)
             raw_dist_data[(nice_names[var], "")] = kde.tolist()
@@ -159,12 +178,12 @@ def _prepare_dist_data_for_bokeh_patch(raw_dist_data, selectors):
         max_entry = max([max(raw_dist_data[sel]) for sel in selector])
         scaling_factor = 0.8 / max_entry
         for sel in selector:
-            scaled = (np.array(raw_dist_data[sel]) * scaling_factor).tolist()
+            scaled = np.array(raw_dist_data[sel], dtype=np.float32) * scaling_factor
             scaled[0] = 0
             scaled[-1] = 0
-            dist_data[sel] = [(sel[0], sel[1], d) for d in scaled]
+            dist_data[sel] = scaled
 
-    dist_data["x"] = raw_dist_data["x"]
+    dist_data["x"] = np.array(raw_dist_data["x"], dtype=np.float32)
     return dist_data
 
 
@@ -177,20 +196,20 @@ def _to_float(sr):
     return res
 
 
-def _check_variables_have_same_dtype(data, variables):
+def _check_variables_have_same_dtype(dtypes, variables):
     """Check that variables have the same dtype.
 
     For categorical variable this means that they have the
     same categories.
 
     Args:
-        data (pd.DataFrame):
+        dtypes (dict): Maps the variables to their dtypes.
         variables (list):
 
     """
-    dtype = data[variables[0]].dtype
+    dtype = dtypes[variables[0]]
     for var in variables:
-        if data[var].dtype != dtype:
+        if dtypes[var] != dtype:
             raise ValueError("Variables have to have the same dtype.")
 
 
@@ -209,7 +228,10 @@ def setup_plot(
 
     for cat in categories:
         var = cat[0]
-        p.line(dist_data["x"], dist_data[cat], color=var_to_color[var], line_width=3)
+        # the densities are sent as binary arrays and only offset in the browser
+        source = ColumnDataSource({"x": dist_data["x"], "density": dist_data[cat]})
+        y = {"field": "density", "transform": _offset_by_factor(p.y_range, cat)}
+        p.line("x", y, source=source, color=var_to_color[var], line_width=3)
         if nothing_string == "Nothing":
             tooltips = [
                 ("Question", questions[var]),
@@ -220,13 +242,8 @@ def setup_plot(
                 ("Frage", questions[var]),
                 ("Antworten insg.", str(observations[cat])),
             ]
-        zero_vals = [(item[0], item[1], 0) for item in dist_data[cat]]
-        renderer = p.patches(
-            [dist_data["x"], dist_data["x"]],
-            [zero_vals, dist_data[cat]],
-            color=var_to_color[var],
-            alpha=0.15,
-        )
+        # the densities are zero at both ends, so the patch closes on the baseline
+        renderer = p.patch("x", y, source=source, color=var_to_color[var], alpha=0.15)
         hover = HoverTool(tooltips=tooltips, renderers=[renderer])
         p.tools.append(hover)
 
@@ -238,6 +255,14 @@ def setup_plot(
     return p
 
 
+def _offset_by_factor(y_range, factor):
+    return CustomJSTransform(
+        args={"y_range": y_range, "factor": list(factor)},
+        func="return x + y_range.synthetic(factor)",
+        v_func=_OFFSET_BY_FACTOR_JS,
+    )
+
+
 def _specific_styling(p, x_info):
     # make the range nicer
     p.y_range.range_padding_units = "absolute"
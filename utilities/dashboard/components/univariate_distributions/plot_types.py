@@ -0,0 +1,244 @@
+"""Registry of the plot types of the univariate distributions.
+
+The plot type of a group is set in the column "plot_type" of group_info.csv. A plot
+type is a module or another object with three functions:
+
+- ``prepare_data(data, variables, bg_vars, nice_names, labels, nothing_string)``
+  returns a picklable dict, the plot data of a group. It is stored in the dashboard
+  data. If it also accepts ``schema``, it receives the
+  :class:`~utilities.dashboard.schema.Schema` of data and can take the dtypes of the
+  variables from it.
+- ``setup_plot(**plot_kwargs(plot_data), bg_var, nothing_string)`` returns a Bokeh
+  layout of the group, split by the background variable with the nice name bg_var.
+- ``condition_plot(plot, **plot_kwargs(plot_data), bg_var, nothing_string)`` splits a
+  plot that ``setup_plot`` returned by another background variable.
+
+:func:`plot_kwargs` leaves out the entries of the plot data in :data:`DATA_KEYS`,
+which are not used for plotting.
+
+A plot type declares the :data:`CAPABILITIES` that it has:
+
+- "incremental": ``condition_plot`` can update a plot for any split in place. Without
+  it, the dashboard builds a new plot whenever the split changes.
+- "splits": the plot data contains a share cube, "cube", from which
+  ``general_barplot.prepare_split_data`` derives splits by two background variables.
+
+The built-in plot types are registered when this module is imported. Other packages
+provide plot types through the entry point group :data:`ENTRY_POINT_GROUP`, e.g. in
+setup.py::
+
+    entry_points={
+        "utilities.dashboard.plot_types": ["fast_barplot = my_package.fast_barplot"]
+    }
+
+The entry point is a module or an object with a ``capabilities`` attribute. An entry
+point with the name of a built-in plot type replaces it. An entry point that cannot be
+loaded or does not fulfill the contract is logged and skipped. ``run_plot_type_checks.py``
+checks that every registered plot type fulfills the contract, and
+``run_benchmarks.py`` times each of them.
+
+"""
+import inspect
+import logging
+import sys
+
+from utilities.dashboard.components.debugging import no_plot
+from utilities.dashboard.components.univariate_distributions import barplot
+from utilities.dashboard.components.univariate_distributions import distplot
+from utilities.dashboard.components.univariate_distributions import stacked_barplot
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "utilities.dashboard.plot_types"
+
+CAPABILITIES = {"incremental", "splits"}
+
+# entries of the plot data that are not passed to setup_plot and condition_plot
+DATA_KEYS = {"cube"}
+
+# keyword arguments that the functions of a plot type must accept
+CONTRACT = {
+    "prepare_data": [
+        "data",
+        "variables",
+        "bg_vars",
+        "nice_names",
+        "labels",
+        "nothing_string",
+    ],
+    "setup_plot": ["bg_var", "nothing_string"],
+    "condition_plot": ["plot", "bg_var", "nothing_string"],
+}
+
+_REGISTRY = {}
+
+_ENTRY_POINTS_LOADED = False
+
+
+class PlotType:
+    """A registered plot type.
+
+    Args:
+        name (str): Name of the plot type in group_info.csv.
+        module: Object with the functions of :data:`CONTRACT`.
+        capabilities (set): Subset of :data:`CAPABILITIES`.
+
+    """
+
+    __slots__ = ("name", "module", "capabilities")
+
+    def __init__(self, name, module, capabilities):
+        self.name = name
+        self.module = module
+        self.capabilities = frozenset(capabilities)
+
+    @property
+    def prepare_data(self):
+        return self.module.prepare_data
+
+    @property
+    def setup_plot(self):
+        return self.module.setup_plot
+
+    @property
+    def condition_plot(self):
+        return self.module.condition_plot
+
+    @property
+    def accepts_schema(self):
+        """Whether prepare_data accepts the schema of the data."""
+        return not _missing_arguments(self.prepare_data, ["schema"])
+
+    @property
+    def incremental(self):
+        return "incremental" in self.capabilities
+
+    @property
+    def splits(self):
+        return "splits" in self.capabilities
+
+    def __repr__(self):
+        return f"PlotType({self.name!r}, capabilities={sorted(self.capabilities)})"
+
+
+def register_plot_type(name, module, capabilities=None):
+    """Register a plot type under name, replacing a plot type of the same name.
+
+    Args:
+        name (str): Name of the plot type in group_info.csv.
+        module: Object with the functions of :data:`CONTRACT`.
+        capabilities (set): Subset of :data:`CAPABILITIES`. Default is the attribute
+            ``capabilities`` of module or no capabilities.
+
+    Returns:
+        PlotType: The registered plot type.
+
+    Raises:
+        TypeError: If module does not fulfill :data:`CONTRACT`.
+        ValueError: If a capability is unknown.
+
+    """
+    if capabilities is None:
+        capabilities = getattr(module, "capabilities", ())
+    unknown = set(capabilities) - CAPABILITIES
+    if unknown:
+        raise ValueError(f"Plot type {name} has unknown capabilities {unknown}.")
+    for func_name, arguments in CONTRACT.items():
+        func = getattr(module, func_name, None)
+        if not callable(func):
+            raise TypeError(f"Plot type {name} has no function {func_name}.")
+        missing = _missing_arguments(func, arguments)
+        if missing:
+            raise TypeError(
+                f"{func_name} of plot type {name} does not accept {missing}."
+            )
+    _REGISTRY[name] = PlotType(name, module, capabilities)
+    return _REGISTRY[name]
+
+
+def plot_kwargs(plot_data):
+    """Return the entries of the plot data of a group that are passed to the plot."""
+    return {key: value for key, value in plot_data.items() if key not in DATA_KEYS}
+
+
+def get_plot_type(name):
+    """Return the registered plot type name.
+
+    Raises:
+        KeyError: If no plot type of this name is registered.
+
+    """
+    # entry points may replace built-in plot types, so they are loaded first
+    load_entry_points()
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(
+            f"Unknown plot type {name}. Registered are {sorted(_REGISTRY)}."
+        ) from None
+
+
+def plot_types():
+    """Return a dict of all registered plot types, including entry points."""
+    load_entry_points()
+    return dict(_REGISTRY)
+
+
+def load_entry_points():
+    """Register the plot types of the entry point group. Only loads them once."""
+    global _ENTRY_POINTS_LOADED
+    if _ENTRY_POINTS_LOADED:
+        return
+    register_entry_points(_entry_points())
+    _ENTRY_POINTS_LOADED = True
+
+
+def register_entry_points(entry_points):
+    """Register the plot types of entry points.
+
+    An entry point that cannot be loaded or registered is logged and skipped, so it
+    does not prevent the other plot types from being registered.
+
+    Args:
+        entry_points (iterable): importlib.metadata.EntryPoint objects.
+
+    Returns:
+        dict: Maps the names of the skipped entry points to their exceptions.
+
+    """
+    skipped = {}
+    for entry_point in entry_points:
+        try:
+            register_plot_type(entry_point.name, entry_point.load())
+        except Exception as e:
+            logger.error(
+                "Skipping plot type entry point %s = %s",
+                entry_point.name,
+                entry_point.value,
+                exc_info=e,
+            )
+            skipped[entry_point.name] = e
+    return skipped
+
+
+def _entry_points():
+    from importlib.metadata import entry_points
+
+    if sys.version_info >= (3, 10):
+        return entry_points(group=ENTRY_POINT_GROUP)
+    return entry_points().get(ENTRY_POINT_GROUP, [])
+
+
+def _missing_arguments(func, arguments):
+    parameters = inspect.signature(func).parameters.values()
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return []
+    kinds = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    accepted = {p.name for p in parameters if p.kind in kinds}
+    return [arg for arg in arguments if arg not in accepted]
+
+
+register_plot_type("stacked_barplot", stacked_barplot, {"incremental", "splits"})
+register_plot_type("barplot", barplot, {"incremental", "splits"})
+register_plot_type("distplot", distplot, {"incremental"})
+register_plot_type("no_plot", no_plot, {"incremental"})
@@ -1,9 +1,10 @@
+from utilities.dashboard.components.boxplots.create_data import create_boxplots_data
 from utilities.dashboard.components.intro_page.create_data import create_intro_page_data
 from utilities.dashboard.components.run_charts.create_data import create_run_charts_data
-from utilities.dashboard.components.boxplots.create_data import create_boxplots_data
 from utilities.dashboard.components.univariate_distributions.create_data import (
     create_univariate_distributions_data,
 )
+from utilities.dashboard.instrumentation import span
 from utilities.dashboard.shared import create_general_variable_mappings
 from utilities.dashboard.shared import get_menu_labels
 
@@ -17,7 +18,10 @@ def create_dashboard_data(
     run_charts_desc=None,
     boxplots_desc=None,
     kde_cutoff=7,
-    april_wave=None
+    april_wave=None,
+    groups=None,
+    outcomes=None,
+    schema=None,
 ):
     """Create a dict with all data needed to generate a dashboard component.
 
@@ -35,38 +39,51 @@ def create_dashboard_data(
         language (str): One of ["english", "german"]
         april_wave (str): "yes" if the data is april wave data for the
             univariate distributions: april dashboard tab. Default is None.
+        groups (list): Only create the plot data of these groups. Default is
+            None, i.e. all groups.
+        outcomes (list): Only create the run charts or boxplots data of these
+            outcome variables. Default is None, i.e. all outcomes.
+        schema (Schema): Schema of data, which the univariate distributions use
+            instead of inspecting the dtypes of the data. Default is None.
 
     Returns:
         dict: Dictionary whose entries depend on the pd.DataFrame(s) passed.
 
     """
-    shared_data = _create_shared_dashboad_data(
-        data=data,
-        data_desc=data_desc,
-        run_charts_desc=run_charts_desc,
-        boxplots_desc=boxplots_desc,
-        group_info=group_info,
-        language=language,
-        data_name=data_name,
-    )
+    with span("shared data"):
+        shared_data = _create_shared_dashboad_data(
+            data=data,
+            data_desc=data_desc,
+            run_charts_desc=run_charts_desc,
+            boxplots_desc=boxplots_desc,
+            group_info=group_info,
+            language=language,
+            data_name=data_name,
+        )
     variable_mappings = shared_data["variable_mappings"]
     menu_labels = shared_data["menu_labels"]
 
     if group_info is not None:
-        groups = _get_groups(group_info, language)
+        all_groups = _get_groups(group_info, language)
+        if groups is None:
+            groups = all_groups
+        else:
+            groups = [group for group in all_groups if group in groups]
 
     if data_desc is not None:
 
-        univariate_distributions_data = create_univariate_distributions_data(
-            data=data,
-            variable_mappings=variable_mappings,
-            nice_names=variable_mappings["variable_to_nice_name"],
-            groups=groups,
-            group_info=group_info,
-            menu_labels=menu_labels,
-            language=language,
-            april_wave=april_wave,
-        )
+        with span("univariate distributions"):
+            univariate_distributions_data = create_univariate_distributions_data(
+                data=data,
+                variable_mappings=variable_mappings,
+                nice_names=variable_mappings["variable_to_nice_name"],
+                groups=groups,
+                group_info=group_info,
+                menu_labels=menu_labels,
+                language=language,
+                april_wave=april_wave,
+                schema=schema,
+            )
 
         res = {}
         res["shared_data"] = shared_data
@@ -74,23 +91,27 @@ def create_dashboard_data(
         res["univariate_distributions_data"] = univariate_distributions_data
 
     if run_charts_desc is not None:
-        run_charts_data = create_run_charts_data(
-            data=data,
-            variable_mappings=variable_mappings,
-            nice_names=variable_mappings["nice_names_run_charts"],
-            language=language,
-        )
+        with span("run charts"):
+            run_charts_data = create_run_charts_data(
+                data=data,
+                variable_mappings=variable_mappings,
+                nice_names=variable_mappings["nice_names_run_charts"],
+                language=language,
+                outcomes=outcomes,
+            )
         res = {}
         res["mapping"] = shared_data
         res["run_charts_data"] = run_charts_data
 
     if boxplots_desc is not None:
-        boxplots_data = create_boxplots_data(
-            data=data,
-            variable_mappings=variable_mappings,
-            nice_names=variable_mappings["nice_names_boxplots"],
-            language=language
-        )
+        with span("boxplots"):
+            boxplots_data = create_boxplots_data(
+                data=data,
+                variable_mappings=variable_mappings,
+                nice_names=variable_mappings["nice_names_boxplots"],
+                language=language,
+                outcomes=outcomes,
+            )
         res = {}
         res["mapping"] = shared_data
         res["boxplots_data"] = boxplots_data
@@ -98,6 +119,51 @@ def create_dashboard_data(
     return res
 
 
+def splice_dashboard_data(existing, update, groups=None, outcomes=None):
+    """Replace the rebuilt parts of existing dashboard data.
+
+    Metadata such as variable mappings and texts is cheap to build and always
+    taken from update. Plot data is taken from update for the rebuilt groups or
+    outcomes and from existing for all others.
+
+    Args:
+        existing (dict): Dashboard data as returned by create_dashboard_data.
+        update (dict): Dashboard data built for some groups or outcomes.
+        groups (list): Groups of the univariate distributions in update.
+        outcomes (list): Outcomes of the run charts or boxplots in update.
+
+    Returns:
+        dict: The spliced dashboard data.
+
+    """
+    res = {**existing, **update}
+    if groups is not None and "univariate_distributions_data" in update:
+        new = update["univariate_distributions_data"]
+        old_plot_data = existing["univariate_distributions_data"]["plot_data"]
+        res["univariate_distributions_data"] = {
+            **new,
+            "plot_data": {**old_plot_data, **new["plot_data"]},
+        }
+
+    if outcomes is not None and "run_charts_data" in update:
+        new = update["run_charts_data"]
+        spliced = dict(new)
+        # entries are keyed by tuples that start with the outcome
+        for key in ["data", "selectors", "bounds"]:
+            spliced[key] = {
+                k: v
+                for k, v in existing["run_charts_data"][key].items()
+                if not (isinstance(k, tuple) and k[0] in outcomes)
+            }
+            spliced[key].update(new[key])
+        res["run_charts_data"] = spliced
+
+    if outcomes is not None and "boxplots_data" in update:
+        res["boxplots_data"] = {**existing["boxplots_data"], **update["boxplots_data"]}
+
+    return res
+
+
 def _get_groups(group_info, language):
     """Get variables' group from `group_info`, given language.
 
@@ -42,8 +42,8 @@ def _add_background_vars(desc, bg_desc, language):
     bg_desc = bg_desc[keep_cols]
     bg_desc = bg_desc[bg_desc["new_name"].notnull()]
 
-    doubled = [x for x in bg_desc["new_name"].values if x in desc["new_name"].values]
-    assert len(doubled) == 0, "Doubles between data description and background."
+    doubled = bg_desc["new_name"].isin(desc["new_name"])
+    assert not doubled.any(), "Doubles between data description and background."
 
     desc = pd.concat([desc, bg_desc])
 
@@ -57,7 +57,9 @@ def _add_background_vars(desc, bg_desc, language):
 def _use_group_info(desc, group_info, language):
     present_groups = desc[f"group_{language}"].unique()
     known_groups = group_info[f"group_{language}"].unique()
-    missing_in_desc = [x for x in known_groups if x not in present_groups]
+    missing_in_desc = known_groups[
+        ~pd.Index(known_groups).isin(present_groups)
+    ].tolist()
     assert (
         len(missing_in_desc) == 0
     ), f"The following groups are in group_info but not in the dataset: {missing_in_desc}"
@@ -66,14 +68,15 @@ def _use_group_info(desc, group_info, language):
     desc = desc[desc[f"group_{language}"].isin(known_groups)].copy()
     topic_sr = group_info.set_index(f"group_{language}")[f"topic_{language}"]
     group_to_topic = topic_sr.to_dict()
-    desc[f"topic_{language}"] = desc[f"group_{language}"].replace(group_to_topic)
+    desc[f"topic_{language}"] = desc[f"group_{language}"].map(group_to_topic)
     return desc
 
 
 def _keep_only_vars_in_the_data(desc, data):
     expected_vars = desc.index
-    keep_vars = [x for x in expected_vars if x in data.columns]
-    dropped_vars = [x for x in expected_vars if x not in data.columns]
+    in_data = expected_vars.isin(data.columns)
+    keep_vars = expected_vars[in_data]
+    dropped_vars = expected_vars[~in_data].tolist()
     old_len = len(desc)
     desc = desc.loc[keep_vars]
     len_after_var_drop = len(desc)
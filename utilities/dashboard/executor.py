@@ -0,0 +1,178 @@
+"""Run the expensive part of selector callbacks outside of the server's IO loop.
+
+Bokeh runs all callbacks of all sessions of a server process on one IO loop, so a
+callback that builds a large plot delays every other session. A
+:class:`ComponentExecutor` splits such a callback in two steps:
+
+- ``compute`` builds new models that are not part of the document yet, e.g. a
+  figure with ``setup_plot``. It runs in a thread pool that is shared by all
+  sessions of the process.
+- ``apply`` puts the result into the document. It is scheduled on the IO loop with
+  ``doc.add_next_tick_callback``, which is the only method of a document that may
+  be called from another thread.
+
+While a computation is pending, the component shows a loading indicator. Every
+submission supersedes the pending one of the same executor: it is cancelled if it
+has not started yet and its result is discarded otherwise. So only the result of
+the latest selection reaches the browser.
+
+``compute`` runs under the profiler of the session if it profiles the tab in which
+the executor was created, see :mod:`utilities.dashboard.session_profiling`. If callback metrics are enabled, the
+executor takes over the measurement of the callback that submitted the work and
+records it once ``apply`` has run, see :mod:`utilities.dashboard.callback_metrics`.
+
+The pool size is read from the environment variable ``DASHBOARD_CALLBACK_WORKERS``,
+which ``run_dashboard`` sets. With 0 workers, or for documents that do not belong to
+a server session, e.g. in a notebook, callbacks run synchronously.
+
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from bokeh.models.widgets import Div
+
+from utilities.dashboard.callback_metrics import defer_measurement
+from utilities.dashboard.config import HEADER_STYLE
+from utilities.dashboard.session_profiling import current_tab
+from utilities.dashboard.session_profiling import profile_tab
+
+CALLBACK_WORKERS_ENV = "DASHBOARD_CALLBACK_WORKERS"
+
+DEFAULT_CALLBACK_WORKERS = 2
+
+LOADING_INDICATOR_NAME = "loading_indicator"
+
+logger = logging.getLogger(__name__)
+
+_POOL = {}
+
+
+def callback_workers():
+    return int(os.environ.get(CALLBACK_WORKERS_ENV, DEFAULT_CALLBACK_WORKERS))
+
+
+def loading_indicator(menu_labels):
+    """Create the hidden Div that a component shows while it computes."""
+    # dashboard data built before the label existed lacks it
+    text = menu_labels.get("loading", "Loading ...")
+    return Div(
+        text=text,
+        visible=False,
+        margin=(30, 0, 0, 10),
+        style=HEADER_STYLE,
+        width=120,
+        name=LOADING_INDICATOR_NAME,
+    )
+
+
+class ComponentExecutor:
+    """Run computations for one component of a session off the IO loop.
+
+    Args:
+        doc (bokeh.document.Document): The session document.
+        component (str): Name of the dashboard component.
+        indicator (bokeh.models.Div): Loading indicator of the component. Default
+            is None.
+        workers (int): Threads of the shared pool. Default is to read them from
+            the environment.
+
+    """
+
+    __slots__ = (
+        "doc",
+        "component",
+        "tab",
+        "indicator",
+        "workers",
+        "_latest",
+        "_future",
+    )
+
+    def __init__(self, doc, component, indicator=None, workers=None):
+        self.doc = doc
+        self.component = component
+        # computations are profiled with the tab that is being built
+        self.tab = current_tab()
+        self.indicator = indicator
+        self.workers = callback_workers() if workers is None else workers
+        self._latest = 0
+        self._future = None
+
+    @property
+    def runs_inline(self):
+        return self.workers == 0 or self.doc.session_context is None
+
+    def submit(self, compute, apply):
+        """Run compute() in the pool and then apply(result) on the IO loop.
+
+        Args:
+            compute (callable): Builds the result. Must not touch models that are
+                in the document.
+            apply (callable): Receives the result and updates the document.
+
+        """
+        self._latest += 1
+        if self._future is not None:
+            self._future.cancel()
+        if self.runs_inline:
+            self._future = None
+            apply(compute())
+            return
+
+        measurement = defer_measurement()
+        self._set_loading(True)
+        self._future = _pool(self.workers).submit(self._compute, compute)
+        self._future.add_done_callback(
+            partial(self._schedule, self._latest, apply, measurement)
+        )
+
+    def _compute(self, compute):
+        # runs in the worker thread, where curdoc() is not the session document
+        with profile_tab(self.tab, self.doc):
+            return compute()
+
+    def _schedule(self, submission, apply, measurement, future):
+        # runs in the worker thread, or in the IO loop if the future was cancelled
+        if future.cancelled():
+            return
+        try:
+            self.doc.add_next_tick_callback(
+                partial(self._finish, submission, apply, measurement, future)
+            )
+        except Exception:
+            logger.debug("The session closed before its update was applied.")
+
+    def _finish(self, submission, apply, measurement, future):
+        if submission != self._latest:
+            return
+        self._future = None
+        if measurement is None:
+            self._apply(apply, future)
+        else:
+            with measurement.collecting():
+                self._apply(apply, future)
+            measurement.record()
+
+    def _apply(self, apply, future):
+        self._set_loading(False)
+        exception = future.exception()
+        if exception is not None:
+            logger.error("A dashboard update failed.", exc_info=exception)
+        else:
+            apply(future.result())
+
+    def _set_loading(self, loading):
+        if self.indicator is not None:
+            self.indicator.visible = loading
+
+
+def _pool(workers):
+    # created on first use, so that worker processes forked by the server each
+    # start their own threads
+    if workers not in _POOL:
+        _POOL[workers] = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="dashboard-callback"
+        )
+    return _POOL[workers]
@@ -0,0 +1,92 @@
+"""Hot reload of the dashboard data while the server is running.
+
+The :class:`ArtifactWatcher` polls the fingerprint of the data directory on the
+server's IOLoop. When it changes, the new generation is loaded and validated in a
+background thread and then published, so that new sessions use it. Sessions that
+are already open finish on the generation they started with. A generation that is
+invalid or that changes while it is loaded is skipped until the data is rewritten.
+Pickles that were not rewritten are taken over from the current generation.
+
+Without a manifest, a generation is only loaded once its fingerprint has not
+changed for one polling interval, so a build is not picked up half way.
+
+"""
+import logging
+import weakref
+from pathlib import Path
+
+from tornado.ioloop import IOLoop
+from tornado.ioloop import PeriodicCallback
+
+from utilities.dashboard.artifacts import artifact_fingerprint
+from utilities.dashboard.artifacts import current_generation
+from utilities.dashboard.artifacts import load_generation
+from utilities.dashboard.artifacts import MANIFEST_NAME
+from utilities.dashboard.artifacts import publish_generation
+
+WATCH_INTERVAL_ENV = "DASHBOARD_WATCH_INTERVAL"
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactWatcher:
+    """Reload the dashboard data of data_dir when it is rewritten.
+
+    Args:
+        data_dir (str or pathlib.Path): Dashboard data directory.
+        interval (int): Milliseconds between checks of the data directory.
+
+    """
+
+    def __init__(self, data_dir, interval=5000):
+        self.data_dir = Path(data_dir).resolve()
+        self.interval = interval
+        self._candidate = None
+        self._rejected = None
+        self._loading = False
+        self._callback = None
+
+    def start(self):
+        self._callback = PeriodicCallback(self.check, self.interval)
+        self._callback.start()
+
+    def stop(self):
+        if self._callback is not None:
+            self._callback.stop()
+
+    async def check(self):
+        """Load and publish a new generation if the data was rewritten."""
+        if self._loading:
+            return
+        current = current_generation(self.data_dir)
+        fingerprint = artifact_fingerprint(self.data_dir)
+        if fingerprint in (current.fingerprint, self._rejected):
+            self._candidate = None
+            return
+        has_manifest = (self.data_dir / MANIFEST_NAME).exists()
+        if not has_manifest and fingerprint != self._candidate:
+            self._candidate = fingerprint
+            return
+
+        self._loading = True
+        try:
+            generation = await IOLoop.current().run_in_executor(
+                None, load_generation, self.data_dir, current.number + 1, current
+            )
+        except Exception as e:
+            logger.warning(
+                "Keeping dashboard data generation %s: %s", current.number, e
+            )
+            self._rejected = fingerprint
+        else:
+            publish_generation(self.data_dir, generation)
+            weakref.finalize(
+                current,
+                logger.info,
+                "Freed dashboard data generation %s",
+                current.number,
+            )
+            logger.info("Serving dashboard data generation %s", generation.number)
+        finally:
+            self._candidate = None
+            self._loading = False
@@ -0,0 +1,254 @@
+"""Nested timing and memory spans for the dashboard data build.
+
+Spans are no-ops unless profiling was enabled with :func:`enable_profiling`. Each
+span records wall time, CPU time and the peak memory traced by tracemalloc while
+it was open. Before Python 3.9, where tracemalloc cannot reset its peak, the peak
+of a span is exact if it is a new peak of the build. Otherwise, it is the largest
+traced memory sampled every :data:`SAMPLE_INTERVAL` seconds while the span was
+open. :func:`write_report` stores the span tree as JSON, as an indented
+text report and as collapsed stacks that flame graph tools can read.
+
+Independently of profiling, a :class:`MemoryBudget` warns when the resident memory
+of the build is about to exceed a configured limit.
+
+"""
+import json
+import threading
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+
+REPORT_NAME = "build_profile"
+
+# seconds between two samples of the traced memory before Python 3.9
+SAMPLE_INTERVAL = 0.01
+
+_PROFILE = None
+
+_CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class Span:
+    """A timed section of the build with nested child spans."""
+
+    __slots__ = ("name", "wall", "cpu", "peak_memory", "children", "_peak_so_far")
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = 0
+        self.children = []
+        self._peak_so_far = 0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "peak_memory": self.peak_memory,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def enable_profiling(name="build"):
+    """Start collecting spans and tracing memory allocations.
+
+    Returns:
+        Span: The root span, which stays open until :func:`write_report`.
+
+    """
+    global _PROFILE
+    tracemalloc.start()
+    root = Span(name)
+    _PROFILE = {"stack": [root], "start": _clocks(), "peak_at_reset": 0}
+    if not _CAN_RESET_PEAK:
+        _PROFILE["sampler"] = _start_sampler(_PROFILE["stack"])
+    return root
+
+
+def profiling_enabled():
+    return _PROFILE is not None
+
+
+@contextmanager
+def span(name):
+    """Record wall time, CPU time and peak memory of the enclosed block."""
+    if _PROFILE is None:
+        yield
+        return
+
+    stack = _PROFILE["stack"]
+    parent = stack[-1]
+    current = Span(name)
+    parent.children.append(current)
+    parent._peak_so_far = max(parent._peak_so_far, _traced_peak())
+    _reset_peak()
+    stack.append(current)
+
+    wall, cpu = _clocks()
+    try:
+        yield current
+    finally:
+        end_wall, end_cpu = _clocks()
+        current.wall = end_wall - wall
+        current.cpu = end_cpu - cpu
+        current.peak_memory = max(current._peak_so_far, _traced_peak())
+        parent._peak_so_far = max(parent._peak_so_far, current.peak_memory)
+        _reset_peak()
+        stack.pop()
+
+
+class MemoryBudget:
+    """Warn before the resident memory of the build exceeds a limit.
+
+    Args:
+        limit (float): Limit in MB. Default is None, i.e. no checks.
+
+    """
+
+    __slots__ = ("limit",)
+
+    def __init__(self, limit=None):
+        self.limit = limit
+
+    def check(self, stage, additional=0):
+        """Warn if the resident memory plus additional bytes exceeds the limit.
+
+        Args:
+            stage (str): Description of the next stage of the build.
+            additional (int): Bytes that the next stage is expected to allocate.
+
+        """
+        if self.limit is None:
+            return
+        expected = (resident_memory() + additional) / 1e6
+        if expected > self.limit:
+            warnings.warn(
+                f"{stage} is expected to need {expected:.0f} MB of memory, which "
+                f"exceeds the budget of {self.limit:.0f} MB.",
+                stacklevel=2,
+            )
+
+
+def resident_memory(pid=None):
+    """Return the resident set size of a process in bytes.
+
+    Args:
+        pid (int): Process id. Default is None, i.e. the current process.
+
+    """
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        with open(f"/proc/{pid or 'self'}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    return 0
+
+
+def write_report(out_dir):
+    """Close the root span and write the reports to out_dir.
+
+    Args:
+        out_dir (pathlib.Path): Directory next to the dashboard artifacts.
+
+    Returns:
+        Span: The root span.
+
+    """
+    global _PROFILE
+    root = _PROFILE["stack"][0]
+    wall, cpu = _clocks()
+    root.wall = wall - _PROFILE["start"][0]
+    root.cpu = cpu - _PROFILE["start"][1]
+    root.peak_memory = max(root._peak_so_far, _traced_peak())
+    if "sampler" in _PROFILE:
+        _PROFILE["sampler"].set()
+    _PROFILE = None
+    tracemalloc.stop()
+
+    with open(out_dir / f"{REPORT_NAME}.json", "w", encoding="utf-8") as f:
+        json.dump(root.to_dict(), f, indent=2)
+    with open(out_dir / f"{REPORT_NAME}.txt", "w", encoding="utf-8") as f:
+        f.write(format_report(root))
+    with open(out_dir / f"{REPORT_NAME}.folded", "w", encoding="utf-8") as f:
+        f.write("\n".join(_collapsed_stacks(root)) + "\n")
+    return root
+
+
+def format_report(root, bar_width=30):
+    """Format the span tree as an indented text report with bars of wall time."""
+    header = f"{'wall [s]':>9} {'cpu [s]':>9} {'peak [MB]':>10}  {'':{bar_width}}  span"
+    lines = [header, "-" * len(header)]
+    total = max(root.wall, 1e-9)
+
+    def _add(node, depth):
+        bar = "#" * int(round(bar_width * node.wall / total))
+        lines.append(
+            f"{node.wall:9.3f} {node.cpu:9.3f} {node.peak_memory / 1e6:10.1f}  "
+            f"{bar:{bar_width}}  {'  ' * depth}{node.name}"
+        )
+        for child in node.children:
+            _add(child, depth + 1)
+
+    _add(root, 0)
+    return "\n".join(lines) + "\n"
+
+
+def _collapsed_stacks(node, prefix=""):
+    """Yield "parent;child self_time_in_ms" lines of the span tree."""
+    name = node.name.replace(";", ",")
+    path = f"{prefix};{name}" if prefix else name
+    self_time = node.wall - sum(child.wall for child in node.children)
+    yield f"{path} {max(int(self_time * 1000), 0)}"
+    for child in node.children:
+        yield from _collapsed_stacks(child, path)
+
+
+def _clocks():
+    return time.perf_counter(), time.process_time()
+
+
+def _traced_peak():
+    """Return the peak of the traced memory since the last :func:`_reset_peak`.
+
+    Before Python 3.9, this is only known if the peak of the build was raised since
+    then. Otherwise, the current traced memory is returned and the samples of
+    :func:`_start_sampler` fill in the peak.
+
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    if _CAN_RESET_PEAK or peak > _PROFILE["peak_at_reset"]:
+        return peak
+    return current
+
+
+def _reset_peak():
+    if _CAN_RESET_PEAK:
+        tracemalloc.reset_peak()
+    else:
+        _PROFILE["peak_at_reset"] = tracemalloc.get_traced_memory()[1]
+
+
+def _start_sampler(stack):
+    """Record the traced memory in the open spans every SAMPLE_INTERVAL seconds.
+
+    Returns:
+        threading.Event: Stops the sampler when it is set.
+
+    """
+    stop = threading.Event()
+
+    def _sample():
+        while not stop.wait(SAMPLE_INTERVAL):
+            current = tracemalloc.get_traced_memory()[0]
+            for node in list(stack):
+                node._peak_so_far = max(node._peak_so_far, current)
+
+    threading.Thread(target=_sample, daemon=True).start()
+    return stop
@@ -1,13 +1,65 @@
+import gc
 import pickle
 import sys
+import time
 from pathlib import Path
 
 import click
 import pandas as pd
 
+from utilities.dashboard.artifacts import artifact_path
+from utilities.dashboard.artifacts import write_artifact
+from utilities.dashboard.artifacts import write_manifest
+from utilities.dashboard.build_watch import SourceDependencies
+from utilities.dashboard.build_watch import watch_sources
+from utilities.dashboard.components.run_charts.create_data import (
+    write_run_charts_panel,
+)
 from utilities.dashboard.create_dashboard_data import create_dashboard_data
+from utilities.dashboard.create_dashboard_data import splice_dashboard_data
 from utilities.dashboard.create_description_table import create_description_table
+from utilities.dashboard.instrumentation import enable_profiling
+from utilities.dashboard.instrumentation import MemoryBudget
+from utilities.dashboard.instrumentation import span
+from utilities.dashboard.instrumentation import write_report
 from utilities.dashboard.liss.data_functions import prepare_liss_data
+from utilities.dashboard.sampling import DEV_SAMPLE_KEY
+from utilities.dashboard.sampling import stratified_sample
+from utilities.dashboard.schema import infer_schema
+from utilities.dashboard.schema import load_schema
+from utilities.dashboard.schema import source_digest
+from utilities.dashboard.schema import write_schema
+from utilities.dashboard.shared import create_general_variable_mappings
+
+COMPONENT_TO_SUFFIXES = {
+    "univariate_distributions": ["single", "single_april"],
+    "run_charts": ["waves"],
+    "boxplots": ["boxplot"],
+}
+
+LISS_SOURCES = {
+    "single": "covid_data_2020_03.pickle",
+    "waves": "liss_all_waves_data.pickle",
+    "single_april": "covid_data_2020_04.pickle",
+    "boxplot": "child-long.parquet",
+}
+
+LISS_BACKGROUND = "background_data_merged.pickle"
+
+# ratio of the memory of a loaded pickle to its size on disk, used when the
+# pickle is checked against the memory budget. Numbers need about as much memory
+# as on disk, strings several times more.
+PICKLE_MEMORY_FACTOR = 2
+
+# bytes of a Python string and its pointer, used for columns of strings
+_OBJECT_BYTES = 64
+
+# variables by which development samples are stratified
+STRATA_TYPES = [
+    "Background Variable",
+    "Secondary Background Variable",
+    "Sample Variable",
+]
 
 
 @click.command()
@@ -27,83 +79,310 @@ from utilities.dashboard.liss.data_functions import prepare_liss_data
     prompt="Path to the output directory",
     help='Path to the output directory (e.g. "bld").',
 )
-def process_dashboard_source_data(lang, data_path, out_dir):
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Write a timing and memory report of the build next to the dashboard data.",
+)
+@click.option(
+    "--component",
+    type=click.Choice(list(COMPONENT_TO_SUFFIXES)),
+    multiple=True,
+    help="Only rebuild this component. Can be repeated.",
+)
+@click.option(
+    "--group",
+    multiple=True,
+    help="Only rebuild this group of the univariate distributions. Can be repeated.",
+)
+@click.option(
+    "--outcome",
+    multiple=True,
+    help="Only rebuild this outcome of the run charts and boxplots. Can be repeated.",
+)
+@click.option(
+    "--sample_frac",
+    type=click.FloatRange(0, 1),
+    default=None,
+    help="Build development data from this share of the rows of every dataset.",
+)
+@click.option(
+    "--max_rows",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Build development data from at most about max_rows rows per dataset.",
+)
+@click.option("--seed", default=0, help="Random seed of --sample_frac and --max_rows.")
+@click.option(
+    "--low_memory",
+    is_flag=True,
+    default=False,
+    help="Load each dataset only when it is processed and release it afterwards.",
+)
+@click.option(
+    "--memory_limit",
+    type=float,
+    default=None,
+    help="Warn before the build is expected to use more than this many MB.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help=(
+        "Keep the prepared data in memory and rebuild the affected parts whenever "
+        "a description file changes."
+    ),
+)
+@click.option(
+    "--run_chart_panel",
+    is_flag=True,
+    default=False,
+    help="Also write the run charts panel, from which the dashboard computes splits.",
+)
+def process_dashboard_source_data(
+    lang,
+    data_path,
+    out_dir,
+    profile,
+    component,
+    group,
+    outcome,
+    sample_frac,
+    max_rows,
+    seed,
+    low_memory,
+    memory_limit,
+    watch,
+    run_chart_panel,
+):
     """Convert datasets to dictionaries that will be used by the dashboard
     components.
 
+    With --component, --group or --outcome, only the selected parts are rebuilt and
+    spliced into the existing dashboard data, which must have been built before.
+
+    With --sample_frac or --max_rows, the dashboard data is built from a sample
+    that is stratified by the background variables, such that every category is
+    still displayed. The data is marked as development data, which the dashboard
+    only serves with --dev.
+
+    With --low_memory, only the dataset of the suffix that is processed is held in
+    memory. This lowers the peak memory of the build at the cost of reading the
+    background data once per univariate dataset. The background data is joined on
+    the index instead of merged on an id column, which gives the same datasets
+    without a copy of the background data.
+
+    With --watch, the command keeps running after the build. When a description
+    CSV or a text file of a component changes, only the groups, outcomes or texts
+    that depend on the changed rows are rebuilt and the dashboard data is
+    rewritten.
+
+    The column types of the univariate datasets are inferred once per version of
+    the source files and stored in a "schemas" directory next to the language
+    directories. Later builds from the same files reuse them.
+
+    With --run_chart_panel, the preprocessed waves data is also written to an
+    SQLite file next to the pickles. The dashboard then computes the run charts of
+    any split and of pairs of splits from it.
+
     """
+    if profile:
+        enable_profiling()
+
     if "liss" in data_path:
         data_name = "liss"
     else:
         raise NotImplementedError(f"Only LISS supported so far.")
 
-    # load data
-    if data_name == "liss":
-        raw_data_single = pd.read_pickle(f"{data_path}/covid_data_2020_03.pickle")
-        raw_data_single_april = pd.read_pickle(f"{data_path}/covid_data_2020_04.pickle")
-        raw_data_waves = pd.read_pickle(f"{data_path}/liss_all_waves_data.pickle")
-        bg_data = pd.read_pickle(f"{data_path}/background_data_merged.pickle")
-        raw_data_boxplot = pd.read_parquet(f"{data_path}/child-long.parquet")
+    dashboard_path = Path(__file__).resolve().parent
+    out_subdir = Path(out_dir).resolve() / data_name / lang
+    out_subdir.mkdir(parents=True, exist_ok=True)
+    schema_dir = out_subdir.parent / "schemas"
 
-        # merge data
-        raw_data_single["id"] = raw_data_single.index.get_level_values(0)
-        raw_data_single_april["id"] = raw_data_single_april.index.get_level_values(0)
-        bg_data["id"] = bg_data.index
-        raw_data_single = raw_data_single.merge(bg_data, how="left", on="id")
-        raw_data_single_april = raw_data_single_april.merge(bg_data, how="left", on="id")
+    selections = _select_parts(
+        dashboard_path / data_name, lang, list(component), list(group), list(outcome)
+    )
+    missing = [
+        suffix
+        for suffix, selection in selections.items()
+        if selection is not None and not artifact_path(out_subdir, suffix).exists()
+    ]
+    if missing:
+        raise click.UsageError(
+            f"Selective builds update existing dashboard data, but {missing} "
+            f"are missing in {out_subdir}. Run a full build first."
+        )
 
-    dashboard_path = Path(__file__).resolve().parent
+    if watch and low_memory:
+        raise click.UsageError("--watch keeps the data in memory, unlike --low_memory.")
 
-    dataDict = {"single": raw_data_single, "waves": raw_data_waves, "single_april": raw_data_single_april, "boxplot": raw_data_boxplot}
+    budget = MemoryBudget(memory_limit)
+    if data_name == "liss":
+        if low_memory:
+            sources = _iter_liss_data(data_path, list(selections), budget)
+        else:
+            with span("load data"):
+                sources = _load_liss_data(data_path, list(selections), budget).items()
 
-    for suffix, raw_data in dataDict.items():
-        if suffix == "waves":
-            run_charts_desc = pd.read_csv(
-                dashboard_path / data_name / "run_charts_description.csv",
-                sep=";",
-                encoding="utf8",
-            )
-            kwargs = {
-                "data": raw_data,
-                "run_charts_desc": run_charts_desc,
-                "language": lang,
-                "data_name": "liss",
-            }
-
-        elif suffix == "boxplot":
-            boxplots_desc = pd.read_csv(
-                dashboard_path / data_name / "boxplots_description.csv",
-                sep=";",
-                encoding="latin3",
+    sample = None
+    if sample_frac is not None or max_rows is not None:
+        sample = {"sample_frac": sample_frac, "max_rows": max_rows, "seed": seed}
+
+    desc_dir = dashboard_path / data_name
+    prepared = {}
+    for suffix, raw_data in sources:
+        with span(suffix):
+            schema_key = None
+            if suffix in ["single", "single_april"]:
+                schema_key = (schema_dir, _schema_digest(data_path, suffix))
+            data, schema = _prepare_source(
+                suffix, raw_data, desc_dir, lang, sample, schema_key
             )
-            kwargs = {
-                "data": raw_data,
-                "boxplots_desc": boxplots_desc,
-                "language": lang,
-                "data_name": "liss"
-            }
-
-        elif suffix == "single":
-            data = prepare_liss_data(raw_data, lang, suffix)
-
-            raw_group_info = pd.read_csv(
-                dashboard_path / data_name / "group_info.csv",
-                sep=";",
-                encoding="utf8",
+            _build_suffix(
+                suffix,
+                data,
+                desc_dir,
+                lang,
+                selections[suffix],
+                out_subdir,
+                sample,
+                schema,
             )
-            group_info = raw_group_info[raw_group_info[f"group_{lang}"].notnull()]
+            if run_chart_panel and suffix == "waves":
+                _write_run_chart_panel(data, desc_dir, lang, out_subdir)
+        if watch:
+            prepared[suffix] = (data, schema)
 
-            raw_desc = pd.read_csv(
-                dashboard_path / data_name / "data_description.csv",
-                sep=";",
-                encoding="utf8",
-            )
-            bg_desc = pd.read_csv(
-                dashboard_path / data_name / "background_variables.csv",
-                sep=";",
-                encoding="utf8",
+        if low_memory:
+            # release the frames of this suffix before the next source is loaded
+            del raw_data, data
+            gc.collect()
+
+    # a running dashboard server only reloads the data once all of it is written
+    write_manifest(out_subdir)
+
+    if profile:
+        write_report(out_subdir)
+
+    if watch:
+        sources = raw_data = None
+
+        def rebuild(parts):
+            start = time.perf_counter()
+            for suffix, selection in parts.items():
+                data, schema = prepared[suffix]
+                _build_suffix(
+                    suffix, data, desc_dir, lang, selection, out_subdir, sample, schema
+                )
+                if run_chart_panel and suffix == "waves":
+                    _write_run_chart_panel(data, desc_dir, lang, out_subdir)
+            write_manifest(out_subdir)
+            click.echo(
+                f"Rebuilt {_describe_parts(parts)} in "
+                f"{time.perf_counter() - start:.1f} s."
             )
 
+        click.echo(f"Watching the description files in {desc_dir}. Stop with Ctrl+C.")
+        try:
+            watch_sources(SourceDependencies(desc_dir, lang), rebuild, list(prepared))
+        except KeyboardInterrupt:
+            pass
+
+
+def _prepare_source(suffix, raw_data, desc_dir, lang, sample, schema_key=None):
+    """Prepare and optionally sample the raw data of one suffix.
+
+    The schema of the raw data of the univariate datasets is loaded from schema_key,
+    a tuple of the schema directory and the digest of the source files. If it is not
+    stored yet, it is inferred and stored. Only the columns that the preparation
+    changes are inferred again.
+
+    Returns:
+        tuple: The data and, for the univariate datasets, its schema, else None.
+
+    """
+    schema = None
+    if suffix in ["single", "single_april"]:
+        source_schema = None if schema_key is None else load_schema(*schema_key)
+        if source_schema is None:
+            with span("infer schema"):
+                source_schema = infer_schema(raw_data)
+            if schema_key is not None:
+                write_schema(source_schema, *schema_key)
+        with span("prepare_liss_data"):
+            data = prepare_liss_data(raw_data, lang, suffix, schema=source_schema)
+            schema = infer_schema(data, previous=source_schema)
+        desc_name, cluster = "background_variables.csv", None
+    elif suffix == "waves":
+        data, desc_name, cluster = raw_data, "run_charts_description.csv", "personal_id"
+    else:
+        data, desc_name, cluster = raw_data, "boxplots_description.csv", "hh_id"
+
+    if sample is not None:
+        encoding = "latin3" if suffix == "boxplot" else "utf8"
+        desc = pd.read_csv(desc_dir / desc_name, sep=";", encoding=encoding)
+        with span("sample"):
+            data = _sample(data, desc, sample, cluster=cluster)
+    return data, schema
+
+
+def _schema_digest(data_path, suffix):
+    """Return the digest under which the schema of the sources of suffix is stored."""
+    paths = [Path(data_path) / LISS_SOURCES[suffix], Path(data_path) / LISS_BACKGROUND]
+    return source_digest(paths, suffix)
+
+
+def _create_kwargs(suffix, data, desc_dir, lang, schema=None):
+    """Read the descriptions and prepare the arguments of create_dashboard_data."""
+    if suffix == "waves":
+        run_charts_desc = pd.read_csv(
+            desc_dir / "run_charts_description.csv",
+            sep=";",
+            encoding="utf8",
+        )
+        kwargs = {
+            "data": data,
+            "run_charts_desc": run_charts_desc,
+            "language": lang,
+            "data_name": "liss",
+        }
+
+    elif suffix == "boxplot":
+        boxplots_desc = pd.read_csv(
+            desc_dir / "boxplots_description.csv",
+            sep=";",
+            encoding="latin3",
+        )
+        kwargs = {
+            "data": data,
+            "boxplots_desc": boxplots_desc,
+            "language": lang,
+            "data_name": "liss",
+        }
+
+    else:
+        april = "_april" if suffix == "single_april" else ""
+        raw_group_info = pd.read_csv(
+            desc_dir / f"group_info{april}.csv",
+            sep=";",
+            encoding="utf8",
+        )
+        group_info = raw_group_info[raw_group_info[f"group_{lang}"].notnull()]
+
+        raw_desc = pd.read_csv(
+            desc_dir / f"data_description{april}.csv",
+            sep=";",
+            encoding="utf8",
+        )
+        bg_desc = pd.read_csv(
+            desc_dir / "background_variables.csv",
+            sep=";",
+            encoding="utf8",
+        )
+
+        with span("create_description_table"):
             desc = create_description_table(
                 raw_desc=raw_desc,
                 background_table=bg_desc,
@@ -112,58 +391,252 @@ def process_dashboard_source_data(lang, data_path, out_dir):
                 language=lang,
             )
 
-            kwargs = {
-                "data": data,
-                "data_desc": desc,
-                "group_info": group_info,
-                "language": lang,
-                "data_name": "liss",
-            }
-
-        elif suffix == "single_april":
-            data = prepare_liss_data(raw_data, lang, suffix)
-
-            raw_group_info = pd.read_csv(
-                dashboard_path / data_name / "group_info_april.csv",
-                sep=";",
-                encoding="utf8",
-            )
-            group_info = raw_group_info[raw_group_info[f"group_{lang}"].notnull()]
+        kwargs = {
+            "data": data,
+            "data_desc": desc,
+            "group_info": group_info,
+            "language": lang,
+            "data_name": "liss",
+            "schema": schema,
+        }
+        if april:
+            kwargs["april_wave"] = "yes"
+    return kwargs
 
-            raw_desc = pd.read_csv(
-                dashboard_path / data_name / "data_description_april.csv",
-                sep=";",
-                encoding="utf8",
-            )
-            bg_desc = pd.read_csv(
-                dashboard_path / data_name / "background_variables.csv",
-                sep=";",
-                encoding="utf8",
+
+def _build_suffix(
+    suffix, data, desc_dir, lang, selection, out_subdir, sample, schema=None
+):
+    """Build the selected parts of the dashboard data of suffix and write them."""
+    kwargs = _create_kwargs(suffix, data, desc_dir, lang, schema)
+
+    with span("create_dashboard_data"):
+        dashboard_data = create_dashboard_data(**kwargs, **(selection or {}))
+
+    if selection is not None:
+        with span("splice"):
+            dashboard_data = splice_dashboard_data(
+                pd.read_pickle(artifact_path(out_subdir, suffix)),
+                dashboard_data,
+                **selection,
             )
 
-            desc = create_description_table(
-                raw_desc=raw_desc,
-                background_table=bg_desc,
-                group_info=group_info,
-                data=data,
-                language=lang,
+    if sample is not None:
+        dashboard_data[DEV_SAMPLE_KEY] = sample
+
+    with span("pickle"):
+        write_artifact(dashboard_data, out_subdir, suffix)
+
+
+def _write_run_chart_panel(data, desc_dir, lang, out_subdir):
+    run_charts_desc = pd.read_csv(
+        desc_dir / "run_charts_description.csv", sep=";", encoding="utf8"
+    )
+    variable_mappings = create_general_variable_mappings(
+        data=data, language=lang, data_name="liss", run_charts_desc=run_charts_desc
+    )
+    with span("run chart panel"):
+        write_run_charts_panel(data, variable_mappings, out_subdir)
+
+
+def _describe_parts(parts):
+    described = []
+    for suffix, selection in parts.items():
+        if selection is None:
+            described.append(suffix)
+        else:
+            ((key, items),) = selection.items()
+            described.append(f"{suffix} ({key}: {items or 'texts only'})")
+    return ", ".join(described)
+
+
+def _select_parts(desc_dir, lang, components, groups, outcomes):
+    """Determine which parts of which dashboard data files are rebuilt.
+
+    Args:
+        desc_dir (pathlib.Path): Directory with the description files.
+        lang (str): Dashboard language.
+        components (list): Selected components. Default is all components that
+            contain the selected groups or outcomes.
+        groups (list): Selected groups of the univariate distributions.
+        outcomes (list): Selected outcomes of the run charts and boxplots.
+
+    Returns:
+        dict: Maps the suffixes that are rebuilt to None if they are rebuilt
+            completely, else to a dict with the selected "groups" or "outcomes".
+
+    """
+    selectable = {
+        "single": _groups(desc_dir / "group_info.csv", lang),
+        "single_april": _groups(desc_dir / "group_info_april.csv", lang),
+        "waves": _outcomes(desc_dir / "run_charts_description.csv", "utf8"),
+        "boxplot": _outcomes(desc_dir / "boxplots_description.csv", "latin3"),
+    }
+    for name, selected, suffixes in [
+        ("group", groups, ["single", "single_april"]),
+        ("outcome", outcomes, ["waves", "boxplot"]),
+    ]:
+        known = set().union(*[selectable[suffix] for suffix in suffixes])
+        unknown = [item for item in selected if item not in known]
+        if unknown:
+            raise click.BadParameter(
+                f"Unknown {name}s {unknown}. Choose from {sorted(known)}.",
+                param_hint=f"--{name}",
             )
 
-            kwargs = {
-                "data": data,
-                "data_desc": desc,
-                "group_info": group_info,
-                "language": lang,
-                "data_name": "liss",
-                "april_wave": "yes"
-            }
+    if not components:
+        components = list(COMPONENT_TO_SUFFIXES)
+        if groups and not outcomes:
+            components = ["univariate_distributions"]
+        elif outcomes and not groups:
+            components = ["run_charts", "boxplots"]
 
-        dashboard_data = create_dashboard_data(**kwargs)
+    selections = {}
+    for component in components:
+        for suffix in COMPONENT_TO_SUFFIXES[component]:
+            if component == "univariate_distributions":
+                key, selected = "groups", groups
+            else:
+                key, selected = "outcomes", outcomes
+            if not selected:
+                selections[suffix] = None
+            else:
+                parts = [item for item in selected if item in selectable[suffix]]
+                if parts:
+                    selections[suffix] = {key: parts}
+    return selections
 
-        out_subdir = Path(out_dir).resolve() / data_name / lang
-        out_subdir.mkdir(parents=True, exist_ok=True)
 
-        pd.to_pickle(dashboard_data, out_subdir / f"dashboard_data_{suffix}.pickle")
+def _sample(data, desc, sample, cluster=None):
+    """Sample data, stratified by the background variables in desc."""
+    if "type" in desc.columns:
+        strata = desc.loc[desc["type"].isin(STRATA_TYPES), "new_name"]
+    else:
+        strata = desc["new_name"]
+    return stratified_sample(
+        data,
+        strata=list(strata),
+        frac=sample["sample_frac"],
+        max_rows=sample["max_rows"],
+        cluster=cluster,
+        seed=sample["seed"],
+    )
+
+
+def _groups(path, lang):
+    group_info = pd.read_csv(path, sep=";", encoding="utf8")
+    return set(group_info[f"group_{lang}"].dropna())
+
+
+def _outcomes(path, encoding):
+    desc = pd.read_csv(path, sep=";", encoding=encoding)
+    return set(desc.loc[desc["type"] == "Outcome Variable", "new_name"])
+
+
+def _load_liss_data(data_path, suffixes, budget):
+    """Load and merge the raw LISS datasets that are needed for suffixes."""
+    raw = {
+        suffix: _read_source(data_path, file_name, budget)
+        for suffix, file_name in LISS_SOURCES.items()
+        if suffix in suffixes
+    }
+    single_suffixes = [suffix for suffix in ["single", "single_april"] if suffix in raw]
+    if single_suffixes:
+        bg_data = _read_source(data_path, LISS_BACKGROUND, budget)
+        # merge data
+        with span("merge background data"):
+            bg_data["id"] = bg_data.index
+            for suffix in single_suffixes:
+                raw[suffix]["id"] = raw[suffix].index.get_level_values(0)
+                raw[suffix] = raw[suffix].merge(bg_data, how="left", on="id")
+    return raw
+
+
+def _iter_liss_data(data_path, suffixes, budget):
+    """Load and join the raw LISS datasets one at a time.
+
+    A dataset is only loaded when the next suffix is requested. The generator keeps
+    no reference to the datasets it yielded, so the caller can release them.
+
+    Yields:
+        tuple: The suffix and its raw data.
+
+    """
+    for suffix in LISS_SOURCES:
+        if suffix in suffixes:
+            yield suffix, _load_liss_source(data_path, suffix, budget)
+
+
+def _load_liss_source(data_path, suffix, budget):
+    data = _read_source(data_path, LISS_SOURCES[suffix], budget)
+    if suffix in ["single", "single_april"]:
+        bg_data = _read_source(data_path, LISS_BACKGROUND, budget)
+        with span("join background data"):
+            data = _join_background(data, bg_data)
+    return data
+
+
+def _read_source(data_path, file_name, budget):
+    path = Path(data_path) / file_name
+    if budget.limit is not None:
+        budget.check(f"Loading {file_name}", additional=_expected_memory(path))
+    with span(path.stem):
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+
+def _expected_memory(path):
+    """Estimate the memory of the DataFrame in path in bytes.
+
+    For parquet files, the number of rows and the column types are read from the
+    metadata. Columns of strings are counted with :data:`_OBJECT_BYTES` per value.
+    Pickles have no such metadata, so their size on disk is scaled by
+    :data:`PICKLE_MEMORY_FACTOR`.
+
+    """
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            pass
+        else:
+            metadata = pq.read_metadata(path)
+            res = 0
+            for field in metadata.schema.to_arrow_schema():
+                dtype = field.type
+                if pa.types.is_dictionary(dtype):
+                    dtype = dtype.index_type
+                try:
+                    width = max(dtype.bit_width // 8, 1)
+                except ValueError:
+                    width = _OBJECT_BYTES
+                res += width * metadata.num_rows
+            return res
+    return path.stat().st_size * PICKLE_MEMORY_FACTOR
+
+
+def _join_background(data, bg_data):
+    """Left join bg_data on the first index level of data.
+
+    The result is the same as that of the merge on an id column in
+    :func:`_load_liss_data`, including the id column and the suffixes "_x" and "_y"
+    of columns that are in both datasets. Instead of adding an id column to bg_data,
+    which copies it, bg_data is joined on its index. data gets the id column in
+    place, like in the merge.
+
+    """
+    data["id"] = data.index.get_level_values(0)
+    if "id" in bg_data.columns:
+        # the merge replaces the column with the index
+        bg_data = bg_data.drop(columns="id")
+    overlap = data.columns.intersection(bg_data.columns)
+    data = data.rename(columns={c: f"{c}_x" for c in overlap}, copy=False)
+    bg_data = bg_data.rename(columns={c: f"{c}_y" for c in overlap}, copy=False)
+    joined = data.join(bg_data, on="id")
+    joined.index = pd.RangeIndex(len(joined))
+    return joined
 
 
 if __name__ == "__main__":
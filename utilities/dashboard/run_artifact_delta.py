@@ -0,0 +1,104 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+import pandas as pd
+
+from utilities.dashboard.artifact_delta import apply_delta
+from utilities.dashboard.artifact_delta import create_delta
+from utilities.dashboard.artifact_delta import summarize_delta
+from utilities.dashboard.artifacts import artifact_path
+from utilities.dashboard.artifacts import ARTIFACTS
+from utilities.dashboard.artifacts import MANIFEST_NAME
+
+
+@click.group()
+def run_artifact_delta():
+    """Ship only the changed entries of the dashboard data to a server.
+
+    Create a delta from the manifest of the data on the server and a new build, copy
+    it to the server and apply it there. The file extension of the delta selects the
+    compression, e.g. ".pickle.gz".
+
+    """
+
+
+@run_artifact_delta.command()
+@click.option(
+    "--base",
+    required=True,
+    type=click.Path(exists=True),
+    help="Manifest of the data on the server, or a data directory with it.",
+)
+@click.option(
+    "--data_dir",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Dashboard data directory of the new build.",
+)
+@click.option("--out", required=True, help="Path of the delta.")
+def create(base, data_dir, out):
+    """Write the entries of the new build that differ from the base."""
+    base = Path(base)
+    if base.is_dir():
+        base = base / MANIFEST_NAME
+    with open(base, "r", encoding="utf-8") as f:
+        base_manifest = json.load(f)
+
+    try:
+        delta = create_delta(base_manifest, data_dir)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    pd.to_pickle(delta, out)
+
+    full_size = sum(
+        artifact_path(data_dir, suffix).stat().st_size for suffix in ARTIFACTS
+    )
+    click.echo(_format_summary(summarize_delta(delta)))
+    click.echo(
+        f"Wrote {out}: {Path(out).stat().st_size / 1e6:.2f} MB instead of "
+        f"{full_size / 1e6:.2f} MB for the full build."
+    )
+
+
+@run_artifact_delta.command()
+@click.option(
+    "--delta", required=True, type=click.Path(exists=True), help="Path of the delta."
+)
+@click.option(
+    "--data_dir",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Dashboard data directory on the server.",
+)
+def apply(delta, data_dir):
+    """Patch the dashboard data with a delta.
+
+    Exits with status 1 if the data is not the base of the delta. The data is not
+    modified in this case.
+
+    """
+    try:
+        rewritten = apply_delta(pd.read_pickle(delta), data_dir)
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    click.echo(f"Rewrote {', '.join(rewritten) or 'no pickles'} in {data_dir}.")
+
+
+def _format_summary(summary):
+    lines = []
+    for suffix, counts in summary.items():
+        if not counts["rewritten"]:
+            lines.append(f"{suffix}: unchanged ({counts['entries']} entries)")
+        else:
+            lines.append(
+                f"{suffix}: {counts['added']} added, {counts['changed']} changed, "
+                f"{counts['removed']} removed of {counts['entries']} entries"
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    run_artifact_delta()
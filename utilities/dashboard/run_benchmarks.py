@@ -0,0 +1,118 @@
+import sys
+from pathlib import Path
+
+import click
+
+from utilities.dashboard.benchmarks.suite import BENCHMARKS
+from utilities.dashboard.benchmarks.suite import compare_to_baseline
+from utilities.dashboard.benchmarks.suite import DEFAULT_CONFIG
+from utilities.dashboard.benchmarks.suite import format_results
+from utilities.dashboard.benchmarks.suite import load_baseline
+from utilities.dashboard.benchmarks.suite import run_benchmarks
+from utilities.dashboard.benchmarks.suite import save_baseline
+
+
+@click.command()
+@click.option(
+    "--n_rows",
+    default=DEFAULT_CONFIG["n_rows"],
+    help="Number of rows of each synthetic dataset.",
+)
+@click.option(
+    "--n_categories",
+    default=DEFAULT_CONFIG["n_categories"],
+    help="Number of categories of the univariate distribution variables.",
+)
+@click.option(
+    "--n_bg_categories",
+    default=DEFAULT_CONFIG["n_bg_categories"],
+    help="Number of categories of the background variables.",
+)
+@click.option(
+    "--lang",
+    type=click.Choice(["english", "german"], case_sensitive=False),
+    default=DEFAULT_CONFIG["language"],
+    help="Dashboard language.",
+)
+@click.option("--seed", default=DEFAULT_CONFIG["seed"], help="Random seed.")
+@click.option("--repeat", default=5, help="Number of timed repetitions.")
+@click.option(
+    "--select",
+    "-k",
+    multiple=True,
+    help="Only run benchmarks whose name contains this string. Can be repeated.",
+)
+@click.option(
+    "--baseline",
+    default="benchmark_baseline.json",
+    help="Path to the JSON file with the baseline timings.",
+)
+@click.option(
+    "--save_baseline",
+    "save",
+    is_flag=True,
+    default=False,
+    help="Store the timings as new baseline instead of comparing against it.",
+)
+@click.option(
+    "--threshold",
+    default=0.2,
+    help="Relative slowdown against the baseline that counts as a regression.",
+)
+def run_dashboard_benchmarks(
+    n_rows,
+    n_categories,
+    n_bg_categories,
+    lang,
+    seed,
+    repeat,
+    select,
+    baseline,
+    save,
+    threshold,
+):
+    """Time the dashboard data preparation and plot setup on synthetic LISS data.
+
+    Exits with status 1 if a benchmark is slower than the baseline by more than
+    the threshold.
+
+    """
+    config = {
+        "n_rows": n_rows,
+        "n_categories": n_categories,
+        "n_bg_categories": n_bg_categories,
+        "language": lang,
+        "seed": seed,
+    }
+    names = [
+        name for name in BENCHMARKS if not select or any(s in name for s in select)
+    ]
+    results = run_benchmarks(config, names=names, repeat=repeat)
+
+    baseline_path = Path(baseline)
+    comparison = None
+    if save:
+        save_baseline(baseline_path, config, results)
+    elif baseline_path.exists():
+        stored = load_baseline(baseline_path)
+        if stored["config"] == config:
+            comparison = compare_to_baseline(results, stored, threshold)
+        else:
+            click.echo(
+                f"The baseline in {baseline_path} was recorded with a different "
+                f"configuration ({stored['config']}) and is ignored."
+            )
+
+    click.echo(format_results(results, comparison))
+
+    if save:
+        click.echo(f"Stored baseline in {baseline_path}.")
+    elif comparison is not None:
+        regressions = [name for name, comp in comparison.items() if comp["regression"]]
+        if regressions:
+            click.echo(f"Regressions above {threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_dashboard_benchmarks()
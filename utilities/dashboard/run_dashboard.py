@@ -1,10 +1,21 @@
+import logging
 import os
-import sys
 from pathlib import Path
 
 import click
 
 from utilities.dashboard.config import APP_DIR
+from utilities.dashboard.executor import CALLBACK_WORKERS_ENV
+from utilities.dashboard.executor import DEFAULT_CALLBACK_WORKERS
+from utilities.dashboard.hot_reload import WATCH_INTERVAL_ENV
+from utilities.dashboard.sampling import ALLOW_DEV_DATA_ENV
+from utilities.dashboard.server import create_server
+from utilities.dashboard.session_profiling import PROFILE_DIR_ENV
+from utilities.dashboard.session_profiling import PROFILE_FRACTION_ENV
+from utilities.dashboard.session_profiling import PROFILE_TAB_ENV
+from utilities.dashboard.session_profiling import PROFILER_ENV
+from utilities.dashboard.session_profiling import PROFILERS
+from utilities.dashboard.view_state import TAB_SLUGS
 
 
 @click.command()
@@ -13,19 +24,171 @@ from utilities.dashboard.config import APP_DIR
     prompt="Dashboard data directory",
     help="Path to dashboard data directory.",
 )
-def run_dashboard(data_dir):
+@click.option("--port", default=5006, help="Port of the dashboard server.")
+@click.option(
+    "--address", default=None, help="Address to bind to. Default is all addresses."
+)
+@click.option(
+    "--num_procs",
+    default=1,
+    help="Number of worker processes. 0 starts one per CPU. Not supported on Windows.",
+)
+@click.option(
+    "--warm_up/--no_warm_up",
+    default=True,
+    help="Build one document before accepting connections.",
+)
+@click.option(
+    "--allow_websocket_origin",
+    multiple=True,
+    help="Host that may connect in addition to localhost. Can be repeated.",
+)
+@click.option(
+    "--unused_session_lifetime",
+    default=15000,
+    help="Milliseconds after which unused sessions are destroyed.",
+)
+@click.option(
+    "--check_unused_sessions",
+    default=17000,
+    help="Milliseconds between checks for unused sessions.",
+)
+@click.option(
+    "--keep_alive",
+    default=37000,
+    help="Milliseconds between keep-alive pings. 0 disables them.",
+)
+@click.option(
+    "--watch_interval",
+    default=None,
+    type=int,
+    help="Reload rewritten dashboard data, checking every watch_interval ms.",
+)
+@click.option(
+    "--callback_workers",
+    default=DEFAULT_CALLBACK_WORKERS,
+    type=click.IntRange(min=0),
+    help="Threads per process that build plots for callbacks. 0 builds them on "
+    "the IO loop.",
+)
+@click.option("--show/--no_show", default=True, help="Open the dashboard in a browser.")
+@click.option(
+    "--dev",
+    is_flag=True,
+    default=False,
+    help="Serve dashboard data that was built from a sample for development.",
+)
+@click.option(
+    "--metrics",
+    is_flag=True,
+    default=False,
+    help="Record callback metrics and serve them at /metrics to localhost.",
+)
+@click.option(
+    "--profile_dir",
+    default=None,
+    help="Write profiles of sessions to this directory.",
+)
+@click.option(
+    "--profile_fraction",
+    default=1.0,
+    help="Share of sessions that are profiled if --profile_dir is given.",
+)
+@click.option(
+    "--profile_tab",
+    type=click.Choice(TAB_SLUGS),
+    default=None,
+    help="Only profile the construction and callbacks of the tab with this slug.",
+)
+@click.option(
+    "--profiler",
+    type=click.Choice(PROFILERS),
+    default="cprofile",
+    help="cprofile writes pstats files, sampler writes collapsed stacks.",
+)
+def run_dashboard(
+    data_dir,
+    port,
+    address,
+    num_procs,
+    warm_up,
+    allow_websocket_origin,
+    unused_session_lifetime,
+    check_unused_sessions,
+    keep_alive,
+    watch_interval,
+    callback_workers,
+    show,
+    dev,
+    metrics,
+    profile_dir,
+    profile_fraction,
+    profile_tab,
+    profiler,
+):
     """Run dashboard.
 
+    The dashboard data is loaded and validated before the server accepts
+    connections.
+
     Args:
-        APP_DIR (str): Path to app directory.
         data_dir (str): Path to data directory.
+        port (int): Port of the server.
+        address (str): Address to bind to.
+        num_procs (int): Number of worker processes.
+        warm_up (bool): Build one document before accepting connections.
+        allow_websocket_origin (tuple): Additional hosts that may connect.
+        unused_session_lifetime (int): Milliseconds after which unused sessions
+            are destroyed.
+        check_unused_sessions (int): Milliseconds between checks for unused
+            sessions.
+        keep_alive (int): Milliseconds between keep-alive pings.
+        watch_interval (int): Milliseconds between checks for new dashboard data.
+            Default is None, in which case the data is never reloaded.
+        callback_workers (int): Threads per process that build plots for
+            callbacks.
+        show (bool): Open the dashboard in a browser.
+        dev (bool): Serve dashboard data that was built from a sample.
+        metrics (bool): Record the callback metrics and serve them on the port of
+            the server.
+        profile_dir (str): Directory of session profiles. Default is None, in which
+            case no session is profiled.
+        profile_fraction (float): Share of sessions that are profiled.
+        profile_tab (str): Slug of the tab that is profiled. Default is None, i.e.
+            all.
+        profiler (str): "cprofile" or "sampler".
 
     """
-    data_dir = Path(data_dir)
-    path_to_app = Path(__file__).resolve().parent / "app"
-    command = f"bokeh serve --show {APP_DIR} --args {data_dir}"  # noqa
-    print("\n\n", 80 * "-", "\n\n", command, "\n\n", 80 * "-", "\n\n")
-    os.system(command)
+    # like bokeh serve, log the server's info messages
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if dev:
+        os.environ[ALLOW_DEV_DATA_ENV] = "1"
+    if watch_interval is not None:
+        os.environ[WATCH_INTERVAL_ENV] = str(watch_interval)
+    os.environ[CALLBACK_WORKERS_ENV] = str(callback_workers)
+    if profile_dir is not None:
+        os.environ[PROFILE_DIR_ENV] = str(Path(profile_dir).resolve())
+        os.environ[PROFILE_FRACTION_ENV] = str(profile_fraction)
+        os.environ[PROFILE_TAB_ENV] = profile_tab or ""
+        os.environ[PROFILER_ENV] = profiler
+    server = create_server(
+        data_dir=Path(data_dir),
+        port=port,
+        address=address,
+        num_procs=num_procs,
+        warm_up=warm_up,
+        allow_websocket_origin=allow_websocket_origin,
+        unused_session_lifetime=unused_session_lifetime,
+        check_unused_sessions=check_unused_sessions,
+        keep_alive=keep_alive,
+        metrics=metrics,
+    )
+    url = f"http://{address or 'localhost'}:{port}/{APP_DIR.name}"
+    line = 80 * "-"
+    print(f"\n\n{line}\n\nServing the dashboard at {url}\n\n{line}\n\n")
+    if show:
+        server.io_loop.add_callback(server.show, f"/{APP_DIR.name}")
+    server.run_until_shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import click
+
+from utilities.dashboard.benchmarks.equivalence import ATOL
+from utilities.dashboard.benchmarks.equivalence import CASE_MAKERS
+from utilities.dashboard.benchmarks.equivalence import format_equivalence_results
+from utilities.dashboard.benchmarks.equivalence import import_engine
+from utilities.dashboard.benchmarks.equivalence import RTOL
+from utilities.dashboard.benchmarks.equivalence import run_equivalence_checks
+from utilities.dashboard.benchmarks.equivalence import write_reproducers
+
+
+@click.command()
+@click.option("--n_cases", default=20, help="Number of random inputs per path.")
+@click.option("--seed", default=0, help="Random seed of the inputs.")
+@click.option(
+    "--path",
+    "-p",
+    type=click.Choice(list(CASE_MAKERS)),
+    multiple=True,
+    help="Only check this aggregation path. Can be repeated. Default is all.",
+)
+@click.option(
+    "--candidate",
+    "-c",
+    multiple=True,
+    help="Check an engine instead of the current implementation of a path, given "
+    "as path=package.module:function. Can be repeated.",
+)
+@click.option("--rtol", default=RTOL, help="Relative tolerance of numbers.")
+@click.option("--atol", default=ATOL, help="Absolute tolerance of numbers.")
+@click.option(
+    "--out",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory for the minimized reproducers of failing cases.",
+)
+def run_dashboard_equivalence_checks(n_cases, seed, path, candidate, rtol, atol, out):
+    """Compare the data preparation with the frozen reference engines.
+
+    Exits with status 1 if a result differs from the reference on a random input.
+
+    """
+    candidates = {}
+    for spec in candidate:
+        name, _, engine = spec.partition("=")
+        if name not in CASE_MAKERS or not engine:
+            raise click.BadParameter(
+                f"{spec} is not of the form path=package.module:function with a path "
+                f"in {list(CASE_MAKERS)}.",
+                param_hint="--candidate",
+            )
+        candidates[name] = import_engine(engine)
+
+    results = run_equivalence_checks(
+        paths=list(path) or None,
+        n_cases=n_cases,
+        seed=seed,
+        candidates=candidates,
+        rtol=rtol,
+        atol=atol,
+    )
+    reproducers = {} if out is None else write_reproducers(results, Path(out))
+    click.echo(format_equivalence_results(results, n_cases, reproducers))
+    if any(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_dashboard_equivalence_checks()
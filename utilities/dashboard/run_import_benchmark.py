@@ -0,0 +1,53 @@
+import json
+import sys
+
+import click
+
+from utilities.dashboard.benchmarks.import_time import DEFAULT_BUDGETS
+from utilities.dashboard.benchmarks.import_time import format_import_results
+from utilities.dashboard.benchmarks.import_time import run_import_benchmark
+
+
+@click.command()
+@click.option(
+    "--budget",
+    multiple=True,
+    help=(
+        "Budget in seconds of one target, e.g. app=1.0. Can be repeated. Defaults: "
+        + ", ".join(f"{k}={v}" for k, v in DEFAULT_BUDGETS.items())
+        + "."
+    ),
+)
+@click.option("--repeat", default=5, help="Number of fresh interpreters per target.")
+@click.option("--out", default=None, help="Path of a JSON file for the results.")
+def run_dashboard_import_benchmark(budget, repeat, out):
+    """Measure the cold import time of the app, the build CLI and the server CLI.
+
+    Exits with status 1 if a target exceeds its budget.
+
+    """
+    budgets = {}
+    for item in budget:
+        target, _, seconds = item.partition("=")
+        if target not in DEFAULT_BUDGETS or not seconds:
+            raise click.BadParameter(
+                f"Expected <target>=<seconds> with a target in "
+                f"{list(DEFAULT_BUDGETS)}, got {item!r}.",
+                param_hint="--budget",
+            )
+        budgets[target] = float(seconds)
+
+    results = run_import_benchmark(budgets, repeat=repeat)
+    click.echo(format_import_results(results))
+    if out is not None:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    over_budget = [target for target, res in results.items() if res["over_budget"]]
+    if over_budget:
+        click.echo(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_dashboard_import_benchmark()
@@ -0,0 +1,70 @@
+import json
+import tempfile
+from pathlib import Path
+
+import click
+
+from utilities.dashboard.benchmarks.load_test import format_summary
+from utilities.dashboard.benchmarks.load_test import run_load_test
+from utilities.dashboard.benchmarks.load_test import summarize
+from utilities.dashboard.benchmarks.synthetic_data import (
+    write_synthetic_dashboard_data,
+)
+
+
+@click.command()
+@click.option(
+    "--data_dir",
+    default=None,
+    help="Path to dashboard data directory. Default is synthetic dashboard data.",
+)
+@click.option(
+    "--n_rows",
+    default=1000,
+    help="Number of rows of the synthetic datasets if no data_dir is given.",
+)
+@click.option("--n_sessions", default=10, help="Number of simulated sessions.")
+@click.option("--concurrency", default=5, help="Number of simultaneous sessions.")
+@click.option(
+    "--changes_per_selector",
+    default=3,
+    help="Number of options that are selected in each selector.",
+)
+@click.option("--port", default=5080, help="Local port of the started server.")
+@click.option(
+    "--url",
+    default=None,
+    help="URL of an already running dashboard. No server is started if given.",
+)
+@click.option("--out", default=None, help="Path of a JSON file for the summary.")
+def run_dashboard_load_test(
+    data_dir, n_rows, n_sessions, concurrency, changes_per_selector, port, url, out
+):
+    """Open simulated sessions against a local dashboard server and replay
+    selector changes on every tab.
+
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if data_dir is None and url is None:
+            data_dir = Path(tmp)
+            click.echo(f"Creating synthetic dashboard data with {n_rows} rows.")
+            write_synthetic_dashboard_data(data_dir, n_rows=n_rows)
+
+        results = run_load_test(
+            data_dir=data_dir,
+            n_sessions=n_sessions,
+            concurrency=concurrency,
+            changes_per_selector=changes_per_selector,
+            port=port,
+            url=url,
+        )
+
+    summary = summarize(results)
+    click.echo(format_summary(summary))
+    if out is not None:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    run_dashboard_load_test()
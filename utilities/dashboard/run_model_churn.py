@@ -0,0 +1,64 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import click
+
+from utilities.dashboard.benchmarks.model_churn import churn_growth
+from utilities.dashboard.benchmarks.model_churn import format_churn_results
+from utilities.dashboard.benchmarks.model_churn import run_model_churn
+from utilities.dashboard.benchmarks.synthetic_data import (
+    write_synthetic_dashboard_data,
+)
+
+
+@click.command()
+@click.option(
+    "--data_dir",
+    default=None,
+    help="Path to dashboard data directory. Default is synthetic dashboard data.",
+)
+@click.option(
+    "--n_rows",
+    default=1000,
+    help="Number of rows of the synthetic datasets if no data_dir is given.",
+)
+@click.option(
+    "--run_chart_panel",
+    is_flag=True,
+    default=False,
+    help="Write the run charts panel with the synthetic data, see --run_chart_panel "
+    "of process_dashboard_source_data.py.",
+)
+@click.option("--n_changes", default=2000, help="Minimal number of selector changes.")
+@click.option("--out", default=None, help="Path of a JSON file for the results.")
+def run_dashboard_model_churn(data_dir, n_rows, run_chart_panel, n_changes, out):
+    """Replay selector changes in one session and check that its models stay flat.
+
+    Exits with status 1 if the session has more models or more data after the last
+    cycle of selector changes than after the first.
+
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if data_dir is None:
+            data_dir = Path(tmp)
+            click.echo(f"Creating synthetic dashboard data with {n_rows} rows.")
+            write_synthetic_dashboard_data(
+                data_dir, n_rows=n_rows, run_chart_panel=run_chart_panel
+            )
+        results = run_model_churn(data_dir, n_changes=n_changes)
+
+    click.echo(format_churn_results(results))
+    if out is not None:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    growth = churn_growth(results)
+    if any(value > 0 for value in growth.values()):
+        click.echo(f"The session grew by {growth}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_dashboard_model_churn()
@@ -0,0 +1,69 @@
+import sys
+
+import click
+
+from utilities.dashboard.benchmarks.plot_type_checks import check_entry_points
+from utilities.dashboard.benchmarks.plot_type_checks import format_check_results
+from utilities.dashboard.benchmarks.plot_type_checks import run_plot_type_checks
+from utilities.dashboard.benchmarks.suite import DEFAULT_CONFIG
+
+
+@click.command()
+@click.option(
+    "--n_rows",
+    default=DEFAULT_CONFIG["n_rows"],
+    help="Number of rows of each synthetic dataset.",
+)
+@click.option(
+    "--n_categories",
+    default=DEFAULT_CONFIG["n_categories"],
+    help="Number of categories of the univariate distribution variables.",
+)
+@click.option(
+    "--n_bg_categories",
+    default=DEFAULT_CONFIG["n_bg_categories"],
+    help="Number of categories of the background variables.",
+)
+@click.option(
+    "--lang",
+    type=click.Choice(["english", "german"], case_sensitive=False),
+    default=DEFAULT_CONFIG["language"],
+    help="Dashboard language.",
+)
+@click.option("--seed", default=DEFAULT_CONFIG["seed"], help="Random seed.")
+@click.option(
+    "--plot_type",
+    "-p",
+    multiple=True,
+    help="Only check this plot type. Can be repeated. Default is all.",
+)
+def run_dashboard_plot_type_checks(
+    n_rows, n_categories, n_bg_categories, lang, seed, plot_type
+):
+    """Check that every registered plot type fulfills the plot type contract.
+
+    Exits with status 1 if a plot type violates the contract on the synthetic data,
+    or if an entry point that cannot be loaded is not skipped.
+
+    """
+    config = {
+        "n_rows": n_rows,
+        "n_categories": n_categories,
+        "n_bg_categories": n_bg_categories,
+        "language": lang,
+        "seed": seed,
+    }
+    results = run_plot_type_checks(config, names=list(plot_type) or None)
+    click.echo(format_check_results(results))
+    entry_point_problems = check_entry_points()
+    if entry_point_problems:
+        click.echo(f"entry points: {len(entry_point_problems)} problems")
+        click.echo("\n".join(f"  {problem}" for problem in entry_point_problems))
+    else:
+        click.echo("entry points: ok")
+    if any(res["problems"] for res in results.values()) or entry_point_problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_dashboard_plot_type_checks()
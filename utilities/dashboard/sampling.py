@@ -0,0 +1,100 @@
+"""Stratified subsamples of the source data for fast development builds.
+
+A development build only needs realistic coverage of the categories that the
+dashboard renders, not all rows. :func:`stratified_sample` draws the same share of
+rows from every combination of the background variables and then adds rows until
+every category of every background variable is covered.
+
+Dashboard data built from a sample is marked with the entry ``DEV_SAMPLE_KEY``.
+The server refuses to serve such data unless development data is allowed.
+
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+DEV_SAMPLE_KEY = "dev_sample"
+
+ALLOW_DEV_DATA_ENV = "DASHBOARD_ALLOW_DEV_DATA"
+
+
+def stratified_sample(data, strata, frac=None, max_rows=None, cluster=None, seed=0):
+    """Draw a subsample of data that covers all categories of strata.
+
+    Args:
+        data (pd.DataFrame): The source data.
+        strata (list): Columns by which the sample is stratified. Columns that are
+            not in data are ignored.
+        frac (float): Share of rows in the sample. Default is None, i.e. all rows.
+        max_rows (int): Maximal number of rows in the sample. Covering all
+            categories can require a few more rows.
+        cluster (str): Name of an index level whose values are sampled as a whole,
+            e.g. the person id of a panel. The strata of a cluster are taken from
+            its first row. Default is None, i.e. rows are sampled.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: The sample, with rows in their original order.
+
+    """
+    n_target = len(data) if frac is None else math.ceil(frac * len(data))
+    n_target = n_target if max_rows is None else min(n_target, max_rows)
+    if n_target >= len(data):
+        return data
+
+    strata = [col for col in strata if col in data.columns]
+    if cluster is None:
+        units = data[strata].reset_index(drop=True)
+    else:
+        clusters = data.index.get_level_values(cluster)
+        units = data[strata].groupby(clusters, sort=False).first()
+
+    rng = np.random.RandomState(seed)
+    selected = _proportional_draw(units, strata, n_target / len(data), rng)
+    selected = _cover_categories(units, strata, selected, rng)
+
+    if cluster is None:
+        return data[selected]
+    return data[clusters.isin(units.index[selected])]
+
+
+def _proportional_draw(units, strata, share, rng):
+    """Select the share of units of each stratum, with randomized rounding."""
+    order = rng.permutation(len(units))
+    shuffled = units.iloc[order]
+    if strata:
+        groups = shuffled.groupby(strata, dropna=False, sort=False, observed=True)
+        position = groups.cumcount().to_numpy()
+        size = position + groups.cumcount(ascending=False).to_numpy() + 1
+    else:
+        position = np.arange(len(units))
+        size = np.full(len(units), len(units))
+    expected = share * size
+    n_drawn = np.floor(expected) + (rng.random_sample(len(units)) < expected % 1)
+    selected = np.zeros(len(units), dtype=bool)
+    selected[order] = position < n_drawn
+    return selected
+
+
+def _cover_categories(units, strata, selected, rng):
+    """Add one unit for every category of strata that is not covered yet.
+
+    Categories of later strata may already be covered by the added units.
+
+    """
+    selected = selected.copy()
+    for col in strata:
+        values = units[col]
+        covered = set(values[selected].dropna())
+        for value in pd.unique(values.dropna()):
+            if value not in covered:
+                candidates = np.flatnonzero((values == value).to_numpy())
+                pick = rng.choice(candidates)
+                selected[pick] = True
+    return selected
+
+
+def dev_data_allowed():
+    return bool(os.environ.get(ALLOW_DEV_DATA_ENV))
@@ -0,0 +1,183 @@
+"""Semantic types of the columns of a dataset, inferred once per source file.
+
+The type detection of the build used to inspect the values of every float column to
+find 0/1 variables, and the components inspected the dtypes of the variables of
+every group again. :func:`infer_schema` determines the kind of every column in one
+sweep:
+
+- "categorical", "boolean" and "integer" follow from the dtype,
+- float columns are "binary" if their only values are 0 and 1, else "float". The
+  values are checked for blocks of columns at once with their minimum, maximum and
+  whether any value is neither 0 nor 1,
+- all other columns are "other".
+
+A :class:`Schema` also keeps the dtype of every column, so the components can check
+dtypes without accessing the data. ``process_dashboard_source_data`` stores the
+schema of every source in a file that is named after the sizes and modification
+times of the source files, see :func:`source_digest`, and reuses it in later builds.
+Columns that are added or whose dtype changes during the data preparation are
+inferred again with ``infer_schema(data, previous=schema)``. Increase
+:data:`SCHEMA_VERSION` whenever the inference changes, so that stored schemas are
+not reused.
+
+"""
+import hashlib
+import os
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype
+from pandas.api.types import is_categorical_dtype
+from pandas.api.types import is_float_dtype
+from pandas.api.types import is_integer_dtype
+
+KINDS = ["categorical", "boolean", "integer", "binary", "float", "other"]
+
+SCHEMA_VERSION = 1
+
+# float columns whose values are checked at once, which bounds the memory of a sweep
+_BLOCK_SIZE = 64
+
+
+class Schema:
+    """Kinds and dtypes of the columns of a dataset.
+
+    Args:
+        kinds (dict): Maps columns to one of :data:`KINDS`.
+        dtypes (dict): Maps columns to their dtypes.
+
+    """
+
+    __slots__ = ("kinds", "dtypes")
+
+    def __init__(self, kinds, dtypes):
+        self.kinds = kinds
+        self.dtypes = dtypes
+
+    def columns(self, kind):
+        """Return the columns of a kind in the order of the dataset."""
+        return [col for col, col_kind in self.kinds.items() if col_kind == kind]
+
+    def check_same_dtype(self, variables):
+        """Check that variables have the same dtype.
+
+        For categorical variables this means that they have the same categories.
+
+        Raises:
+            ValueError: If the dtypes differ.
+
+        """
+        dtype = self.dtypes[variables[0]]
+        for var in variables:
+            if self.dtypes[var] != dtype:
+                raise ValueError(
+                    f"Variables have to have the same dtype. Not the case for {var}"
+                )
+
+    def __contains__(self, column):
+        return column in self.kinds
+
+    def __repr__(self):
+        counts = {kind: len(self.columns(kind)) for kind in KINDS}
+        counts = {kind: n for kind, n in counts.items() if n}
+        return f"Schema({counts})"
+
+
+def infer_schema(data, previous=None):
+    """Infer the kind of every column of data in one sweep.
+
+    Args:
+        data (pd.DataFrame): Dataset.
+        previous (Schema): Schema of an earlier version of data. Its kinds are kept
+            for columns whose dtype did not change. Default is None.
+
+    Returns:
+        Schema
+
+    """
+    dtypes = data.dtypes.to_dict()
+    kinds = {}
+    floats = []
+    for col, dtype in dtypes.items():
+        if previous is not None and col in previous and previous.dtypes[col] == dtype:
+            kinds[col] = previous.kinds[col]
+        elif is_categorical_dtype(dtype):
+            kinds[col] = "categorical"
+        elif is_bool_dtype(dtype):
+            kinds[col] = "boolean"
+        elif is_integer_dtype(dtype):
+            kinds[col] = "integer"
+        elif is_float_dtype(dtype):
+            kinds[col] = "float"
+            floats.append(col)
+        else:
+            kinds[col] = "other"
+
+    for start in range(0, len(floats), _BLOCK_SIZE):
+        block = floats[start : start + _BLOCK_SIZE]
+        for col, binary in zip(block, _binary_columns(data[block])):
+            if binary:
+                kinds[col] = "binary"
+    return Schema(kinds, dtypes)
+
+
+def source_digest(paths, *extra):
+    """Hash the names, sizes and modification times of the source files.
+
+    The contents are not read, so the digest costs the same for any file size. A
+    source file that is rewritten gets a new modification time and thereby a new
+    digest, unless it keeps its size and is rewritten within the resolution of the
+    modification times of the file system. Such a change is not detected.
+
+    Args:
+        paths (list): Paths of the source files of a dataset.
+        extra: Further parts of the key, e.g. the data suffix.
+
+    Returns:
+        str: Hex digest that also depends on :data:`SCHEMA_VERSION`.
+
+    """
+    digest = hashlib.sha256(f"schema {SCHEMA_VERSION}".encode())
+    for path in paths:
+        stat = Path(path).stat()
+        digest.update(f"{Path(path).name} {stat.st_size} {stat.st_mtime_ns}".encode())
+    for part in extra:
+        digest.update(str(part).encode())
+    return digest.hexdigest()
+
+
+def schema_path(cache_dir, digest):
+    return Path(cache_dir) / f"schema_{digest}.pickle"
+
+
+def load_schema(cache_dir, digest):
+    """Return the stored schema of digest or None if there is none."""
+    path = schema_path(cache_dir, digest)
+    if not path.exists():
+        return None
+    return pd.read_pickle(path)
+
+
+def write_schema(schema, cache_dir, digest):
+    """Store schema such that readers never see a partial file."""
+    path = schema_path(cache_dir, digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    pd.to_pickle(schema, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _binary_columns(data):
+    """Return a boolean array that marks columns whose only values are 0 and 1."""
+    values = data.to_numpy(dtype=float, na_value=np.nan)
+    if len(values) == 0:
+        return np.zeros(values.shape[1], dtype=bool)
+    with warnings.catch_warnings():
+        # columns without any values
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lower = np.nanmin(values, axis=0)
+        upper = np.nanmax(values, axis=0)
+    other = ~(np.isnan(values) | (values == 0) | (values == 1))
+    return (lower == 0) & (upper == 1) & ~other.any(axis=0)
@@ -0,0 +1,98 @@
+"""Embedded Bokeh server of the dashboard app.
+
+:func:`create_server` loads and validates the dashboard data before the server
+accepts connections. Optionally, it builds one warm-up document such that the
+imports and caches of the components are populated before the first visitor
+arrives. With several worker processes, both happen before the workers are
+forked, so the workers share the loaded data.
+
+"""
+from pathlib import Path
+
+from bokeh.command.util import build_single_handler_application
+from bokeh.document import Document
+from bokeh.server.server import Server
+
+from utilities.dashboard.artifacts import load_artifacts
+from utilities.dashboard.callback_metrics import enable_callback_metrics
+from utilities.dashboard.callback_metrics import METRICS_PATTERNS
+from utilities.dashboard.config import APP_DIR
+
+
+def create_server(
+    data_dir,
+    port=5006,
+    address=None,
+    num_procs=1,
+    warm_up=True,
+    allow_websocket_origin=None,
+    unused_session_lifetime=15000,
+    check_unused_sessions=17000,
+    keep_alive=37000,
+    metrics=False,
+):
+    """Create a Bokeh server that serves the dashboard at /app.
+
+    Args:
+        data_dir (str or pathlib.Path): Dashboard data directory.
+        port (int): Port of the server.
+        address (str): Address to bind to. Default is None, i.e. all addresses.
+        num_procs (int): Number of worker processes. 0 starts one per CPU.
+        warm_up (bool): Build one document before accepting connections.
+        allow_websocket_origin (list): Hosts that may connect in addition to
+            localhost:<port>.
+        unused_session_lifetime (int): Milliseconds after which unused sessions
+            are destroyed.
+        check_unused_sessions (int): Milliseconds between checks for unused
+            sessions.
+        keep_alive (int): Milliseconds between keep-alive pings. 0 disables them.
+        metrics (bool): Record the callback metrics and serve them at /metrics and
+            /sessions to requests from localhost. Default is False.
+
+    Returns:
+        bokeh.server.server.Server: The server, which is not started yet.
+
+    """
+    data_dir = Path(data_dir).resolve()
+    load_artifacts(data_dir)
+    if warm_up:
+        warm_up_app(data_dir)
+
+    extra_patterns = []
+    if metrics:
+        # enabled before the workers are forked, which inherit the setting
+        enable_callback_metrics()
+        extra_patterns = METRICS_PATTERNS
+
+    origins = [f"localhost:{port}"] + list(allow_websocket_origin or [])
+    application = build_single_handler_application(str(APP_DIR), [str(data_dir)])
+    return Server(
+        {f"/{APP_DIR.name}": application},
+        port=port,
+        address=address,
+        num_procs=num_procs,
+        allow_websocket_origin=origins,
+        unused_session_lifetime_milliseconds=unused_session_lifetime,
+        check_unused_sessions_milliseconds=check_unused_sessions,
+        keep_alive_milliseconds=keep_alive,
+        extra_patterns=extra_patterns,
+    )
+
+
+def warm_up_app(data_dir):
+    """Build one document of the app outside of any session.
+
+    The document is built by a separate application. The served application has
+    not run yet, so Bokeh still allows to fork worker processes.
+
+    Raises:
+        RuntimeError: If the app fails to build the document.
+
+    """
+    application = build_single_handler_application(str(APP_DIR), [str(data_dir)])
+    application.initialize_document(Document())
+    for handler in application.handlers:
+        if handler.failed:
+            raise RuntimeError(
+                f"Building the warm-up document failed:\n{handler.error_detail}"
+            )
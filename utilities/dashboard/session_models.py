@@ -0,0 +1,83 @@
+"""Number and estimated size of the Bokeh models of live dashboard sessions.
+
+Callbacks replace plots of the boxplots and univariate distributions by new
+figures, and the run charts update their legend. Bokeh drops models that are no
+longer reachable from a root of the document, so a session should keep about the
+number of models it started with, however many selections it makes. The app
+registers every session document with :func:`track_session`. The metrics server
+exposes :func:`session_stats` and the Prometheus gauges of :func:`format_prometheus`.
+
+The estimated size counts the data of the ColumnDataSources, which dominates what a
+session holds and what a full sync sends. The other properties of the models are
+not counted.
+
+"""
+import os
+import sys
+import weakref
+
+import numpy as np
+from bokeh.models import ColumnDataSource
+
+_SESSIONS = weakref.WeakKeyDictionary()
+
+
+def track_session(doc):
+    """Register the document of a session. It is forgotten once it is freed."""
+    _SESSIONS[doc] = doc.session_context.id if doc.session_context else str(id(doc))
+
+
+def model_stats(doc):
+    """Count the models of doc and estimate the size of their data.
+
+    Returns:
+        dict: "models" and "data_bytes".
+
+    """
+    data_bytes = 0
+    for model in doc.models:
+        if isinstance(model, ColumnDataSource):
+            data_bytes += sum(_column_bytes(col) for col in model.data.values())
+    return {"models": len(doc.models), "data_bytes": data_bytes}
+
+
+def session_stats():
+    """Return the model stats of every tracked session, keyed by session id."""
+    return {session_id: model_stats(doc) for doc, session_id in _SESSIONS.items()}
+
+
+def format_prometheus():
+    """Return gauges of the live sessions in the Prometheus text format."""
+    stats = list(session_stats().values())
+    gauges = [
+        ("sessions", "Live dashboard sessions.", len(stats)),
+        (
+            "session_models_total",
+            "Bokeh models of all live sessions.",
+            sum(s["models"] for s in stats),
+        ),
+        (
+            "session_models_max",
+            "Bokeh models of the largest live session.",
+            max([s["models"] for s in stats], default=0),
+        ),
+        (
+            "session_data_bytes_total",
+            "Estimated bytes of the data sources of all live sessions.",
+            sum(s["data_bytes"] for s in stats),
+        ),
+    ]
+    lines = []
+    for name, help_text, value in gauges:
+        lines += [
+            f"# HELP dashboard_{name} {help_text}",
+            f"# TYPE dashboard_{name} gauge",
+            f'dashboard_{name}{{pid="{os.getpid()}"}} {value}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _column_bytes(column):
+    if isinstance(column, np.ndarray):
+        return column.nbytes
+    return sys.getsizeof(column) + sum(sys.getsizeof(value) for value in column)
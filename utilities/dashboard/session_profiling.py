@@ -0,0 +1,283 @@
+"""Opt-in profiling of live dashboard sessions.
+
+Profiling is configured with environment variables, which ``run_dashboard`` sets
+from its command line options:
+
+- ``DASHBOARD_PROFILE_DIR``: Directory of the profiles. Profiling is off if unset.
+- ``DASHBOARD_PROFILE_FRACTION``: Share of sessions that are profiled. Default 1.
+- ``DASHBOARD_PROFILE_TAB``: Only profile one tab, given by its slug in the URL,
+  e.g. "april".
+- ``DASHBOARD_PROFILER``: "cprofile" (default) or "sampler".
+
+A profiled session runs the construction of its tabs and its callbacks under
+cProfile or under a stack sampler that runs in a background thread. So do the
+computations that its callbacks submit to the thread pool of
+:mod:`utilities.dashboard.executor`. Callbacks and executors belong to the tab in
+whose :func:`building_tab` block they were created. Every thread gets its own
+profiler per block. After each profiled block, its profile is added to the
+session's profile. The profile is written to ``session_<id>.pstats`` or
+``session_<id>.folded`` (collapsed stacks) when the session is destroyed and at
+most every :data:`WRITE_INTERVAL` seconds before, so profiles survive a shutdown
+of the server. If no session is profiled, callbacks only pay for checking that a
+dictionary is empty.
+
+"""
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from bokeh.io import curdoc
+
+PROFILE_DIR_ENV = "DASHBOARD_PROFILE_DIR"
+PROFILE_FRACTION_ENV = "DASHBOARD_PROFILE_FRACTION"
+PROFILE_TAB_ENV = "DASHBOARD_PROFILE_TAB"
+PROFILER_ENV = "DASHBOARD_PROFILER"
+
+PROFILERS = ["cprofile", "sampler"]
+
+# seconds between two writes of the profile of a live session
+WRITE_INTERVAL = 30
+
+_SESSION_PROFILERS = weakref.WeakKeyDictionary()
+
+# slug of the tab that is being built, per thread
+_BUILDING = threading.local()
+
+
+def get_profiling_config():
+    """Read the profiling configuration from the environment.
+
+    Returns:
+        dict or None: None if profiling is off.
+
+    """
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if not directory:
+        return None
+    profiler = os.environ.get(PROFILER_ENV, "cprofile")
+    if profiler not in PROFILERS:
+        raise ValueError(f"{PROFILER_ENV} must be one of {PROFILERS}.")
+    return {
+        "directory": Path(directory),
+        "fraction": float(os.environ.get(PROFILE_FRACTION_ENV, 1)),
+        "tab": os.environ.get(PROFILE_TAB_ENV) or None,
+        "profiler": profiler,
+    }
+
+
+def start_session_profiler(doc, config=None):
+    """Decide whether the session of doc is profiled and set up its profiler.
+
+    Args:
+        doc (bokeh.document.Document): The session document.
+        config (dict): As returned by :func:`get_profiling_config`. Default is to
+            read it from the environment.
+
+    Returns:
+        SessionProfiler or None: None if the session is not profiled.
+
+    """
+    config = get_profiling_config() if config is None else config
+    if config is None or random.random() >= config["fraction"]:
+        return None
+
+    session_id = doc.session_context.id if doc.session_context else id(doc)
+    profiler = SessionProfiler(
+        path=config["directory"] / f"session_{session_id}",
+        profiler=config["profiler"],
+        tab=config["tab"],
+    )
+    _SESSION_PROFILERS[doc] = profiler
+    doc.on_session_destroyed(lambda session_context: profiler.write())
+    return profiler
+
+
+@contextmanager
+def building_tab(tab):
+    """Build the tab in the enclosed block, profiled if the session profiles it.
+
+    Callbacks and executors that are created in the block are profiled with the
+    tab, see :func:`current_tab`.
+
+    Args:
+        tab (str): Slug of the tab.
+
+    """
+    outer = current_tab()
+    _BUILDING.tab = tab
+    try:
+        with profile_tab(tab):
+            yield
+    finally:
+        _BUILDING.tab = outer
+
+
+def current_tab():
+    """Return the slug of the tab that is being built, or None."""
+    return getattr(_BUILDING, "tab", None)
+
+
+@contextmanager
+def profile_tab(tab, doc=None):
+    """Profile the enclosed block if the session of doc profiles tab.
+
+    Args:
+        tab (str): Slug of the tab. None if the block belongs to no tab, in which
+            case it is only profiled if all tabs are.
+        doc (bokeh.document.Document): The session document. Default is curdoc(),
+            which must be passed explicitly outside of the IO loop.
+
+    """
+    if not _SESSION_PROFILERS:
+        profiler = None
+    else:
+        profiler = _SESSION_PROFILERS.get(curdoc() if doc is None else doc)
+    if profiler is None or not profiler.wants(tab):
+        yield
+    else:
+        with profiler.profiling():
+            yield
+
+
+def profile_call(tab, func, *args):
+    """Call func(*args), profiled if the current session profiles tab."""
+    if not _SESSION_PROFILERS:
+        return func(*args)
+    with profile_tab(tab):
+        return func(*args)
+
+
+class SessionProfiler:
+    """Collect a profile of one session across many profiled blocks.
+
+    Args:
+        path (pathlib.Path): Path of the profile without suffix.
+        profiler (str): "cprofile" or "sampler".
+        tab (str): Only profile the tab with this slug. Default is None, i.e. all.
+        write_interval (float): Seconds between two writes of the profile.
+
+    """
+
+    def __init__(self, path, profiler="cprofile", tab=None, write_interval=None):
+        self.path = path
+        self.tab = tab
+        self.profiler = profiler
+        self.write_interval = (
+            WRITE_INTERVAL if write_interval is None else write_interval
+        )
+        self._stats = None
+        self._written = time.monotonic()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def wants(self, tab):
+        return self.tab is None or self.tab == tab
+
+    @contextmanager
+    def profiling(self):
+        # nested blocks, e.g. callbacks triggered by callbacks, are already covered
+        local = self._local
+        local.depth = getattr(local, "depth", 0) + 1
+        if local.depth == 1:
+            local.profiler = (
+                cProfile.Profile() if self.profiler == "cprofile" else StackSampler()
+            )
+            local.profiler.enable()
+        try:
+            yield
+        finally:
+            local.depth -= 1
+            if local.depth == 0:
+                local.profiler.disable()
+                self._add(local.profiler)
+                local.profiler = None
+
+    def _add(self, profiler):
+        # blocks end in the IO loop and in the worker threads
+        with self._lock:
+            if self.profiler == "cprofile":
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+            else:
+                if self._stats is None:
+                    self._stats = StackSampler()
+                self._stats.stacks.update(profiler.stacks)
+            if time.monotonic() - self._written >= self.write_interval:
+                self._write()
+
+    def write(self):
+        """Write the profile that was collected so far."""
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        self._written = time.monotonic()
+        if self._stats is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        suffix = "pstats" if self.profiler == "cprofile" else "folded"
+        self._stats.dump_stats(f"{self.path}.{suffix}")
+
+
+class StackSampler:
+    """Sample the call stack of one thread at a fixed interval.
+
+    The sampler has the same enable / disable / dump_stats interface as
+    cProfile.Profile. Between enable and disable, a background thread records
+    the stack of the thread that called enable. dump_stats writes collapsed
+    stacks ("outer;inner n_samples"), which flame graph tools can read.
+
+    Args:
+        interval (float): Seconds between samples.
+
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = None
+        self._thread = None
+
+    def enable(self):
+        target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, args=(target, self._stop), daemon=True
+        )
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def dump_stats(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self, target, stop):
+        while not stop.is_set():
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+            stop.wait(self.interval)
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
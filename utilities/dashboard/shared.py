@@ -1,6 +1,7 @@
 from bokeh.models.widgets import Div
 
 from utilities.dashboard.config import HEADER_STYLE
+from utilities.dashboard.variable_registry import VariableRegistry
 
 
 def adjust_lower_level_selection_menu_to_higher_level(
@@ -38,7 +39,13 @@ def create_caption_for_variable_group(
 
 
 def create_general_variable_mappings(
-    data, language, data_name, data_desc=None, group_info=None, run_charts_desc=None, boxplots_desc=None
+    data,
+    language,
+    data_name,
+    data_desc=None,
+    group_info=None,
+    run_charts_desc=None,
+    boxplots_desc=None,
 ):
     """Create a dict of dicts that allows to look up metadata of variables.
 
@@ -89,131 +96,70 @@ def create_general_variable_mappings(
     """
     res = {}
 
+    if group_info is not None or data_desc is not None:
+        registry = VariableRegistry(data_desc, language, group_info=group_info)
+
     if group_info is not None:
         # information on groups for distribution plots
-        raw_groups = group_info[f"group_{language}"].unique().tolist()  # noqa
-        raw_topics = group_info[f"topic_{language}"].unique().tolist()  # noqa
         res["topics"] = [
-            topic for topic in raw_topics if topic != "Background Variables"
+            topic for topic in registry.topics if topic != "Background Variables"
         ]
-
-        res["topic_to_groups"] = _dict_of_uniques_from_df(
-            group_info, f"topic_{language}", f"group_{language}"
-        )
-
-        res["group_to_header"] = group_info.set_index(f"group_{language}")[
-            f"header_{language}"
-        ].to_dict()
-        res["group_to_caption"] = group_info.set_index(f"group_{language}")[
-            f"caption_{language}"
-        ].to_dict()
+        res["topic_to_groups"] = registry.topic_to_groups()
+        res["group_to_header"] = registry.group_mapping("header")
+        res["group_to_caption"] = registry.group_mapping("caption")
 
     if data_desc is not None:
         # description of data for distribution plots
-        res["group_to_variables"] = _dict_of_uniques_from_df(
-            data_desc, f"group_{language}", "new_name"
-        )
-
-        nice_names = data_desc.set_index("new_name")[f"nice_name_{language}"].to_dict()
-        res["variable_to_nice_name"] = nice_names
-        res["variable_to_label"] = data_desc.set_index("new_name")[
-            f"label_{language}"
-        ].to_dict()
-
-        res["nice_name_to_variable"] = {v: k for k, v in nice_names.items()}
+        res["group_to_variables"] = registry.group_to_variables()
+        res["variable_to_nice_name"] = registry.mapping("nice_name")
+        res["variable_to_label"] = registry.mapping("label")
+        res["nice_name_to_variable"] = registry.inverse_mapping("nice_name")
 
     if run_charts_desc is not None:
         # description of data for run charts
-        res["outcome_variables"] = run_charts_desc.query("type == 'Outcome Variable'")[
-            "new_name"
-        ].values.tolist()
-        res["background_variables"] = run_charts_desc.query(
-            "type == 'Background Variable'"
-        )["new_name"].values.tolist()
-
-        nice_names = run_charts_desc.set_index("new_name")[
-            f"nice_name_{language}"
-        ].to_dict()
-        res["nice_names_run_charts"] = nice_names
-
-        outcome_variable_to_nice_name = (
-            run_charts_desc.set_index("new_name")
-            .query("type == 'Outcome Variable'")[f"nice_name_{language}"]
-            .to_dict()
+        registry = VariableRegistry(run_charts_desc, language)
+        res.update(_outcome_and_background_mappings(registry))
+        # splits that are only computed on demand from the run charts panel
+        query = "Query Background Variable"
+        res["query_background_variables"] = registry.variables(type=query)
+        res["background_variable_to_nice_name"].update(
+            registry.mapping("nice_name", type=query)
         )
-        res["outcome_variable_to_nice_name"] = outcome_variable_to_nice_name
-        res["nice_name_to_outcome"] = {
-            v: k for k, v in outcome_variable_to_nice_name.items()
-        }
-
-        background_variable_to_nice_name = (
-            run_charts_desc.set_index("new_name")
-            .query("type == 'Background Variable'")[f"nice_name_{language}"]
-            .to_dict()
+        res["nice_name_to_background"].update(
+            registry.inverse_mapping("nice_name", type=query)
         )
-        res["background_variable_to_nice_name"] = background_variable_to_nice_name
-        res["nice_name_to_background"] = {
-            v: k for k, v in background_variable_to_nice_name.items()
-        }
+        res["nice_names_run_charts"] = registry.mapping("nice_name")
 
     if boxplots_desc is not None:
         # description of data for boxplots
-        res["outcome_variables"] = boxplots_desc.query("type == 'Outcome Variable'")[
-            "new_name"].values.tolist()
-        res["background_variables"] = boxplots_desc.query(
-            "type == 'Background Variable'"
-        )["new_name"].values.tolist()
-        res["secondary_background_variable"] = boxplots_desc.query(
-            "type == 'Secondary Background Variable'"
-        )["new_name"].values[0]
-        res["sample_variable"] = boxplots_desc.query(
-            "type == 'Sample Variable'"
-        )["new_name"].values[0]
-        res["sample_categories"] = boxplots_desc.query(
-            "type == 'Sample Category'"
-        )["new_name"].values.tolist()
-
-        nice_names = boxplots_desc.set_index("new_name")[
-            f"nice_name_{language}"
-        ].to_dict()
-        res["nice_names_boxplots"] = nice_names
-
-        outcome_variable_to_nice_name = (
-            boxplots_desc.set_index("new_name")
-            .query("type == 'Outcome Variable'")[f"nice_name_{language}"]
-            .to_dict()
+        registry = VariableRegistry(boxplots_desc, language)
+        res.update(_outcome_and_background_mappings(registry))
+        res["secondary_background_variable"] = registry.variables(
+            type="Secondary Background Variable"
+        )[0]
+        res["sample_variable"] = registry.variables(type="Sample Variable")[0]
+        res["sample_categories"] = registry.variables(type="Sample Category")
+        res["nice_names_boxplots"] = registry.mapping("nice_name")
+        res["sample_cat_to_nice_name"] = registry.mapping(
+            "nice_name", type="Sample Category"
         )
-        res["outcome_variable_to_nice_name"] = outcome_variable_to_nice_name
-        res["nice_name_to_outcome"] = {
-            v: k for k, v in outcome_variable_to_nice_name.items()
-        }
-
-        background_variable_to_nice_name = (
-            boxplots_desc.set_index("new_name")
-            .query("type == 'Background Variable'")[f"nice_name_{language}"]
-            .to_dict()
+        res["nice_name_to_sample_cat"] = registry.inverse_mapping(
+            "nice_name", type="Sample Category"
         )
-        res["background_variable_to_nice_name"] = background_variable_to_nice_name
-        res["nice_name_to_background"] = {
-            v: k for k, v in background_variable_to_nice_name.items()
-        }
-
-        sample_cat_to_nice_name = (
-            boxplots_desc.set_index("new_name")
-            .query("type == 'Sample Category'")[f"nice_name_{language}"]
-            .to_dict()
-        )
-        res["sample_cat_to_nice_name"] = sample_cat_to_nice_name
-        res["nice_name_to_sample_cat"] = {
-            v: k for k, v in sample_cat_to_nice_name.items()
-        }
 
     return res
 
 
-def _dict_of_uniques_from_df(df, key_col, val_col):
-    raw = df.groupby(key_col)[val_col].unique().to_dict()
-    return {k: val.tolist() for k, val in raw.items()}
+def _outcome_and_background_mappings(registry):
+    res = {}
+    for kind, type_ in [
+        ("outcome", "Outcome Variable"),
+        ("background", "Background Variable"),
+    ]:
+        res[f"{kind}_variables"] = registry.variables(type=type_)
+        res[f"{kind}_variable_to_nice_name"] = registry.mapping("nice_name", type=type_)
+        res[f"nice_name_to_{kind}"] = registry.inverse_mapping("nice_name", type=type_)
+    return res
 
 
 def get_menu_labels(language):
@@ -223,20 +169,24 @@ def get_menu_labels(language):
             "topic": "Topic",
             "subtopic": "Subtopic",
             "split_by": "Split By",
+            "and_by": "And By",
             "nothing_category": "Nothing",
             "question": "Question",
             "outcome": "Outcome",
             "sample": "Sample",
+            "loading": "Loading ...",
         }
     elif language == "german":
         res = {
             "topic": "Bereich",
             "subtopic": "Thema",
             "split_by": "Gruppieren nach",
+            "and_by": "und nach",
             "nothing_category": "Nichts",
             "question": "Frage",
             "outcome": "Variable",
             "sample": "Lohnarbeitsverteilung",
+            "loading": "Wird geladen ...",
         }
 
     return res
@@ -0,0 +1,275 @@
+"""Indexed access to the dashboard artifacts.
+
+The artifacts are nested dicts that are keyed the way the data was built, e.g.
+``boxplots_data[outcome][sample][(bg_var_1, bg_var_2)]``. A :class:`DashboardStore`
+wraps the artifacts of a generation in one object per component, which answers the
+queries of the component's selectors with dict lookups and memoizes values that are
+derived from the artifacts, such as y-axis bounds, nice-named factors and the shares
+of splits by two background variables. If the data directory has a run charts panel,
+the run charts also answer splits that were not precomputed from it.
+
+The store belongs to a generation and is shared by all sessions that use it. Like
+the artifacts, the records it returns must not be modified.
+
+"""
+from functools import lru_cache
+
+from utilities.dashboard.components.univariate_distributions.share_cube import (
+    ShareCube,
+)
+
+# derived splits that are kept per group
+SPLIT_CACHE_SIZE = 8
+
+
+class DashboardStore:
+    """The artifacts of a generation, indexed for the dashboard components.
+
+    Args:
+        artifacts (dict): Maps the suffixes in ``artifacts.ARTIFACTS`` to the
+            dashboard data.
+        run_charts_panel (PanelStore): Panel of the run charts, see
+            ``panel_store.open_panel_store``. Default is None.
+
+    """
+
+    __slots__ = (
+        "language",
+        "intro_page",
+        "distributions",
+        "shared",
+        "run_charts",
+        "run_charts_mapping",
+        "boxplots",
+        "boxplots_mapping",
+    )
+
+    def __init__(self, artifacts, run_charts_panel=None):
+        self.language = artifacts["single"]["shared_data"]["language"]
+        self.intro_page = artifacts["single"]["intro_page_data"]
+        self.distributions = {
+            suffix: DistributionsStore(
+                artifacts[suffix]["univariate_distributions_data"]
+            )
+            for suffix in ["single", "single_april"]
+        }
+        self.shared = {
+            suffix: artifacts[suffix]["shared_data"]
+            for suffix in ["single", "single_april"]
+        }
+        self.run_charts = RunChartsStore(
+            artifacts["waves"]["run_charts_data"], panel=run_charts_panel
+        )
+        self.run_charts_mapping = artifacts["waves"]["mapping"]
+        self.boxplots = BoxplotsStore(artifacts["boxplot"]["boxplots_data"])
+        self.boxplots_mapping = artifacts["boxplot"]["mapping"]
+
+
+class RunChartsStore:
+    """Lines and y-axis bounds of the run charts.
+
+    Args:
+        run_charts_data (dict): Run charts data as returned by
+            ``lineplot.prepare_data``, possibly with texts.
+        panel (PanelStore): Panel from which splits that were not precomputed are
+            computed. Default is None, i.e. only the precomputed splits are shown.
+
+    """
+
+    __slots__ = ("data", "periods", "nice_names", "texts", "panel", "_lines", "_ylim")
+
+    def __init__(self, run_charts_data, panel=None):
+        self.data = run_charts_data["data"]
+        self.periods = self.data["period"]
+        if panel is not None and panel.n_periods != len(self.periods):
+            raise ValueError(
+                f"The run charts panel {panel.path} has {panel.n_periods} periods, "
+                f"but the run charts data has {len(self.periods)}. Rebuild both."
+            )
+        self.panel = panel
+        self.nice_names = run_charts_data["nice_names"]
+        self.texts = {
+            key: run_charts_data[key]
+            for key in ["title", "top_text", "bottom_text"]
+            if key in run_charts_data
+        }
+        # line keys are (outcome, background value, background variable)
+        self._lines = {
+            (outcome, bg_var): tuple((*sel, bg_var) for sel in selectors)
+            for (outcome, bg_var), selectors in run_charts_data["selectors"].items()
+        }
+        bounds = run_charts_data["bounds"]
+        self._ylim = {
+            outcome: (
+                bounds[(outcome, "min_outcome")],
+                bounds[(outcome, "max_outcome")],
+            )
+            for outcome, kind in bounds
+            if kind == "min_outcome"
+        }
+
+    def line_keys(self):
+        """Return the keys of all lines, in the order of the data."""
+        return [key for key in self.data if key != "period"]
+
+    def lines(self, outcome, bg_var):
+        """Return the keys of the lines of outcome split by bg_var."""
+        return self._lines[(outcome, bg_var)]
+
+    def precomputed(self, outcome, bg_var, bg_var_2="None"):
+        """Return whether the lines of a split are in the run charts data."""
+        return bg_var_2 == "None" and (outcome, bg_var) in self._lines
+
+    def split_lines(self, outcome, bg_var, bg_var_2="None"):
+        """Return the lines of outcome split by up to two variables from the panel.
+
+        Returns:
+            dict: Maps tuples of categories, one per split other than "None", to
+                the values of the line.
+
+        """
+        bg_vars = tuple(dict.fromkeys(v for v in (bg_var, bg_var_2) if v != "None"))
+        return self.panel.means(outcome, bg_vars)
+
+    def ylim(self, outcome):
+        """Return the start and end of the y-axis of outcome."""
+        return self._ylim[outcome]
+
+
+class BoxplotRecord:
+    """Quantities of one boxplot, with factors and legend entries in nice names."""
+
+    __slots__ = ("factors", "quantities", "order")
+
+    def __init__(self, factors, quantities, order):
+        self.factors = factors
+        self.quantities = quantities
+        self.order = order
+
+
+class BoxplotsStore:
+    """Boxplots by outcome, sample and background variables.
+
+    Args:
+        boxplots_data (dict): Boxplots data as returned by ``boxplot.process_data``,
+            possibly with texts.
+
+    """
+
+    __slots__ = ("data", "nice_names", "texts", "_records")
+
+    def __init__(self, boxplots_data):
+        self.data = boxplots_data
+        self.nice_names = boxplots_data["nice_names"]
+        self.texts = {
+            key: boxplots_data[key]
+            for key in ["title", "top_text", "bottom_text"]
+            if key in boxplots_data
+        }
+        self._records = {}
+
+    def boxplot(self, outcome, sample, bg_var_1, bg_var_2):
+        """Return the :class:`BoxplotRecord` of a selection.
+
+        Args:
+            outcome (str): Outcome variable.
+            sample (str): Category of the sample variable or "all".
+            bg_var_1 (str): Main background variable.
+            bg_var_2 (str): Secondary background variable.
+
+        """
+        key = (outcome, sample, bg_var_1, bg_var_2)
+        if key not in self._records:
+            raw = self.data[outcome][sample][(bg_var_1, bg_var_2)]
+            nice = self.nice_names
+            self._records[key] = BoxplotRecord(
+                factors=[(nice[s], nice[f]) for s, f in raw["cats"]],
+                quantities=raw["data"],
+                order=[nice[s] for s in raw["order"]],
+            )
+        return self._records[key]
+
+
+class GroupRecord:
+    """Plot data of one group of the univariate distributions.
+
+    Attributes:
+        plot_type (str): Plot type of the group.
+        data (dict): Keyword arguments of the plot type's ``setup_plot``.
+
+    """
+
+    __slots__ = ("plot_type", "data", "_share_cube", "split_data")
+
+    def __init__(self, plot_type, data):
+        self.plot_type = plot_type
+        self.data = data
+        self._share_cube = None
+        self.split_data = lru_cache(maxsize=SPLIT_CACHE_SIZE)(self._split_data)
+
+    @property
+    def has_cube(self):
+        return "cube" in self.data
+
+    def share_cube(self):
+        """Return the ShareCube of the group. It is created on the first call."""
+        if self._share_cube is None:
+            self._share_cube = ShareCube(**self.data["cube"])
+        return self._share_cube
+
+    def _split_data(self, split, nothing_string):
+        """Return shares and selectors of a split that was not precomputed.
+
+        Args:
+            split (tuple): Nice names of two background variables.
+            nothing_string (str): name of the "Nothing" category
+
+        Returns:
+            dict: See ``general_barplot.prepare_split_data``.
+
+        """
+        # the plotting module is only imported by the app, not by the build
+        from utilities.dashboard.components.univariate_distributions.general_barplot import (  # noqa
+            prepare_split_data,
+        )
+
+        return prepare_split_data(
+            share_cube=self.share_cube(),
+            shares=self.data["shares"],
+            split=split,
+            nothing_string=nothing_string,
+        )
+
+
+class DistributionsStore:
+    """Plot data of the groups of a univariate distributions tab.
+
+    Args:
+        univariate_distributions_data (dict): As returned by
+            ``create_univariate_distributions_data``.
+
+    """
+
+    __slots__ = ("background_variables", "texts", "_groups")
+
+    def __init__(self, univariate_distributions_data):
+        self.background_variables = univariate_distributions_data[
+            "background_variables"
+        ]
+        plot_data = univariate_distributions_data["plot_data"]
+        self.texts = {
+            key: plot_data[key] for key in ["title", "plot_intro"] if key in plot_data
+        }
+        group_to_plot_type = univariate_distributions_data["group_to_plot_type"]
+        self._groups = {
+            group: GroupRecord(plot_type, plot_data[group])
+            for group, plot_type in group_to_plot_type.items()
+            if group in plot_data
+        }
+
+    def group(self, group):
+        """Return the :class:`GroupRecord` of group."""
+        return self._groups[group]
+
+    def groups(self):
+        return list(self._groups)
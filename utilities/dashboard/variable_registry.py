@@ -0,0 +1,114 @@
+"""Indexed registry of the variable and group metadata of the description tables."""
+import pandas as pd
+
+
+class VariableRegistry:
+    """Look up metadata of variables and groups through hashed indexes.
+
+    The description tables are scanned once when the registry is built. All
+    lookups afterwards are dictionary accesses, so building the variable mappings
+    of a component does not scale with the size of the questionnaire.
+
+    Args:
+        desc (pd.DataFrame): Description of variables with a "new_name" column and
+            optionally the columns "type", f"nice_name_{language}",
+            f"label_{language}", f"group_{language}" and f"topic_{language}".
+        language (str): One of ["english", "german"].
+        group_info (pd.DataFrame): Description of groups, as defined for the
+            univariate distributions dashboard tabs. Default is None.
+
+    """
+
+    def __init__(self, desc, language, group_info=None):
+        self.language = language
+        self._names = {}
+        self._attributes = {}
+        self._by_nice_name = {}
+        self._by_type = {}
+        self._by_group = {}
+
+        desc = pd.DataFrame(columns=["new_name"]) if desc is None else desc
+        columns = {
+            "nice_name": f"nice_name_{language}",
+            "label": f"label_{language}",
+            "group": f"group_{language}",
+            "topic": f"topic_{language}",
+            "type": "type",
+        }
+        columns = {attr: col for attr, col in columns.items() if col in desc}
+        for attr in columns:
+            self._attributes[attr] = {}
+
+        for record in desc[["new_name"] + list(columns.values())].itertuples(
+            index=False, name=None
+        ):
+            name, values = record[0], dict(zip(columns, record[1:]))
+            self._names[name] = None
+            for attr, value in values.items():
+                self._attributes[attr][name] = value
+            if "nice_name" in values:
+                self._by_nice_name[values["nice_name"]] = name
+            if "type" in values:
+                self._by_type.setdefault(values["type"], {})[name] = None
+            if "group" in values:
+                self._by_group.setdefault(values["group"], {})[name] = None
+
+        self._group_attributes = {"topic": {}, "header": {}, "caption": {}}
+        self._by_topic = {}
+        if group_info is not None:
+            cols = [f"{attr}_{language}" for attr in self._group_attributes]
+            for group, *values in group_info[[f"group_{language}"] + cols].itertuples(
+                index=False, name=None
+            ):
+                for attr, value in zip(self._group_attributes, values):
+                    self._group_attributes[attr][group] = value
+                self._by_topic.setdefault(values[0], {})[group] = None
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    @property
+    def groups(self):
+        return list(self._group_attributes["topic"])
+
+    @property
+    def topics(self):
+        return list(self._by_topic)
+
+    def attribute(self, name, attr):
+        """Return an attribute ("nice_name", "label", "group", ...) of a variable."""
+        return self._attributes[attr][name]
+
+    def name(self, nice_name):
+        """Return the variable name that belongs to a nice name."""
+        return self._by_nice_name[nice_name]
+
+    def variables(self, group=None, type=None):
+        """Return the variables of a group or of a type, in order of appearance."""
+        if group is not None:
+            return list(self._by_group.get(group, []))
+        elif type is not None:
+            return list(self._by_type.get(type, []))
+        return list(self._names)
+
+    def mapping(self, attr, type=None):
+        """Return a dict mapping variables (of a type) to an attribute."""
+        values = self._attributes[attr]
+        if type is None:
+            return dict(values)
+        return {name: values[name] for name in self._by_type.get(type, [])}
+
+    def inverse_mapping(self, attr, type=None):
+        """Return a dict mapping an attribute to variables (of a type)."""
+        return {v: k for k, v in self.mapping(attr, type).items()}
+
+    def group_to_variables(self):
+        return {group: list(names) for group, names in self._by_group.items()}
+
+    def topic_to_groups(self):
+        return {topic: list(groups) for topic, groups in self._by_topic.items()}
+
+    def group_mapping(self, attr):
+        """Return a dict mapping groups to "topic", "header" or "caption"."""
+        return dict(self._group_attributes[attr])
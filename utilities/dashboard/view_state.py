@@ -0,0 +1,115 @@
+"""Selector state of the dashboard tabs in the URL of a session.
+
+The arguments of the session URL select the tab that is shown first and the view of
+every component, e.g. ``?tab=childcare&childcare.outcome=...&childcare.sample=...``.
+The tab is one of :data:`TAB_SLUGS`. The view of a tab is given by arguments
+"<tab>.<key>", where the keys are the values of :data:`VIEW_KEYS`. Values are the
+options of the selectors as they are shown in the browser. Unknown tabs and keys and
+values that are not an option are ignored, so the component shows its first option.
+
+The browser keeps the URL up to date. :func:`link_tabs` and :func:`link_selectors`
+attach JavaScript callbacks that replace the arguments of the page URL when the tab
+or a selector changes, without reloading the page. A copied URL opens the same view.
+
+"""
+from bokeh.models import CustomJS
+from bokeh.models import Select
+
+TAB_SLUGS = ["intro", "march", "april", "labor_supply", "childcare"]
+
+# names of the selectors in the components and their keys in the URL
+VIEW_KEYS = {
+    "topic_selector": "topic",
+    "subtopic_selector": "subtopic",
+    "background_variable_selector": "bg_var",
+    "second_background_variable_selector": "bg_var_2",
+    "outcome_variable_selector": "outcome",
+    "sample_category_selector": "sample",
+}
+
+_SET_TAB = """
+const url = new URL(window.location.href);
+url.searchParams.set("tab", slugs[cb_obj.active]);
+window.history.replaceState(window.history.state, "", url);
+"""
+
+_SET_ARGUMENT = """
+const url = new URL(window.location.href);
+url.searchParams.set(key, cb_obj.value);
+window.history.replaceState(window.history.state, "", url);
+"""
+
+
+def session_arguments(doc):
+    """Return the arguments of the URL that opened the session of doc.
+
+    Returns:
+        dict: Maps names to lists of bytes. Empty for documents that do not belong
+            to a server session.
+
+    """
+    context = doc.session_context
+    request = getattr(context, "request", None) if context is not None else None
+    return request.arguments if request is not None else {}
+
+
+def parse_view_state(arguments):
+    """Read the active tab and the views of the tabs from URL arguments.
+
+    Args:
+        arguments (dict): Maps names to lists of bytes, see
+            :func:`session_arguments`.
+
+    Returns:
+        tuple: The index of the active tab and a dict that maps the slugs of the
+            tabs to dicts from view keys to values.
+
+    """
+    values = {}
+    for name, raw in arguments.items():
+        if raw:
+            values[name] = raw[-1].decode("utf-8", errors="replace")
+
+    tab = values.pop("tab", None)
+    active = TAB_SLUGS.index(tab) if tab in TAB_SLUGS else 0
+    views = {slug: {} for slug in TAB_SLUGS}
+    keys = set(VIEW_KEYS.values())
+    for name, value in values.items():
+        slug, _, key = name.partition(".")
+        if slug in views and key in keys:
+            views[slug][key] = value
+    return active, views
+
+
+def view_value(view, key, options):
+    """Return the value of key in view if it is an option and the first option else.
+
+    Args:
+        view (dict): View of a tab, see :func:`parse_view_state`. May be None.
+        key (str): View key of a selector.
+        options (list): Options of the selector.
+
+    """
+    value = (view or {}).get(key)
+    return value if value in options else options[0]
+
+
+def link_tabs(tabs):
+    """Write the active tab to the URL whenever it changes."""
+    tabs.js_on_change("active", CustomJS(args={"slugs": TAB_SLUGS}, code=_SET_TAB))
+
+
+def link_selectors(layout, slug):
+    """Write the values of the named selectors of a tab to the URL when they change.
+
+    Args:
+        layout (bokeh layout): Layout of the tab.
+        slug (str): Slug of the tab in :data:`TAB_SLUGS`.
+
+    """
+    for select in layout.select({"type": Select}):
+        if select.name in VIEW_KEYS:
+            key = f"{slug}.{VIEW_KEYS[select.name]}"
+            select.js_on_change(
+                "value", CustomJS(args={"key": key}, code=_SET_ARGUMENT)
+            )